@@ -0,0 +1,383 @@
+"""
+TESSERACT ADMISSION CONTROL
+Adaptive concurrency limit (AIMD, driven by observed latency) with per-route
+priority queues, shedding requests with 503 + Retry-After under overload
+"""
+
+import asyncio
+import fnmatch
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import time
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence, Tuple
+
+from fastapi import FastAPI
+
+from instrumentation import Metrics, metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower is more important
+HIGH, NORMAL, LOW = 0, 1, 2
+
+# First matching glob wins; None means always admitted and never counted
+ROUTE_PRIORITIES: Sequence[Tuple[str, Optional[int]]] = (
+    ('/health', None),
+    ('/metrics', None),
+    ('/api/admission', None),
+    # Long-lived streams would hold a slot (and skew latency) for their whole life
+    ('/api/v*/status/stream', None),
+    ('/api/v2/train/*/stream', None),
+    ('/api/v2/analyze/stream', None),
+    ('/api/v2/fetch-data/*/stream', None),
+    ('/api/v*/status', HIGH),
+    ('/api/v*/consciousness', HIGH),
+    # Upstream fan-out: the first thing to slow down and the first to shed
+    ('/api/v2/analyze*', LOW),
+    ('/api/v2/fetch-data/*', LOW),
+    ('/api/v4/generate', LOW)
+)
+
+class Overloaded(Exception):
+    """A request was not admitted"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+# ============================================================================
+# ADAPTIVE LIMIT
+# ============================================================================
+
+class AIMDLimit:
+    """Concurrency limit from additive increase / multiplicative decrease
+
+    Each route class has its own baseline, the lowest latency seen over its
+    last `window` samples, so a fan-out route is never judged against a
+    cheap status read. A response slower than `tolerance` x its baseline
+    (and at least `latency_floor` seconds over it) or a failure means
+    requests are queueing downstream, so the limit is multiplied by
+    `backoff`, at most once per round trip so one slow burst counts once.
+    Otherwise, while at least half the limit is in use and no response has
+    signalled congestion within its round trip, the limit grows by about one
+    per limit's worth of responses; holding off keeps a stream of fast
+    responses on one route from re-inflating a limit another route is
+    backing off.
+    """
+
+    def __init__(
+        self,
+        initial: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        backoff: float = 0.9,
+        tolerance: float = 2.0,
+        latency_floor: float = 0.005,
+        window: int = 1000
+    ):
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.latency_floor = latency_floor
+        self.window = window
+        # route class -> [baseline, minimum of the current window, samples in it]
+        self.baselines: Dict[str, list] = {}
+        self._last_decrease = -math.inf
+        self._hold_until = -math.inf
+        self.decreases = 0
+
+    def update(self, latency: float, inflight: int, failed: bool, now: float, key: str = '*') -> None:
+        state = self.baselines.get(key)
+        if state is None:
+            state = self.baselines[key] = [latency, math.inf, 0]
+        state[1] = min(state[1], latency)
+        state[2] += 1
+        if latency < state[0]:
+            state[0] = latency
+        elif state[2] >= self.window:
+            # Let the baseline rise again if the service got slower for good
+            state[0] = state[1]
+        if state[2] >= self.window:
+            state[1], state[2] = math.inf, 0
+
+        baseline = state[0]
+        threshold = max(baseline * self.tolerance, baseline + self.latency_floor)
+        if failed or latency > threshold:
+            self._hold_until = max(self._hold_until, now + latency)
+            if now - self._last_decrease >= latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+        elif inflight * 2 >= self.limit and now >= self._hold_until:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+# ============================================================================
+# CONTROLLER
+# ============================================================================
+
+class AdmissionController:
+    """Admits up to `limit` concurrent requests and queues the rest by priority
+
+    Waiting requests are granted most important first (FIFO within a
+    priority). A request may wait up to `queue_timeout`, but once the queue
+    has not been empty for `codel_interval` it is a standing queue that only
+    adds latency, and new waiters get `codel_target` instead (as in CoDel):
+    under sustained overload requests are admitted or refused promptly
+    rather than all waiting out the full deadline. A request expected to
+    wait longer than `queue_timeout` is rejected on arrival. When
+    `max_queue` requests are waiting, a new request displaces the least
+    important waiter if it is more important than it, and is rejected
+    otherwise.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[AIMDLimit] = None,
+        max_queue: int = 1000,
+        queue_timeout: float = 0.5,
+        codel_target: float = 0.02,
+        codel_interval: float = 0.1,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        self.limit = limit or AIMDLimit()
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.codel_target = codel_target
+        self.codel_interval = codel_interval
+        self.clock = clock
+        self.last_empty = clock()
+        self.inflight = 0
+        self.queued = 0
+        self.queued_by_priority: Dict[int, int] = {}
+        # [priority, sequence, future, deadline timer]; the timer is None once the
+        # waiter has left the queue, and such entries are skipped lazily
+        self.waiters: List[list] = []
+        self.sequence = count()
+        self.latency = 0.0
+        self.stats = {'admitted': 0, 'waited': 0, 'rejected_queue_full': 0, 'rejected_deadline': 0, 'shed': 0}
+
+    @classmethod
+    def from_env(cls) -> 'AdmissionController':
+        """TESSERACT_CONCURRENCY_{INITIAL,MIN,MAX}, TESSERACT_QUEUE_{TIMEOUT,TARGET}_MS and TESSERACT_ADMISSION_MAX_QUEUE"""
+        return cls(
+            AIMDLimit(
+                initial=int(os.getenv('TESSERACT_CONCURRENCY_INITIAL', '20')),
+                min_limit=int(os.getenv('TESSERACT_CONCURRENCY_MIN', '1')),
+                max_limit=int(os.getenv('TESSERACT_CONCURRENCY_MAX', '1000')),
+                tolerance=float(os.getenv('TESSERACT_LATENCY_TOLERANCE', '2.0'))
+            ),
+            max_queue=int(os.getenv('TESSERACT_ADMISSION_MAX_QUEUE', '1000')),
+            queue_timeout=float(os.getenv('TESSERACT_QUEUE_TIMEOUT_MS', '500')) / 1000,
+            codel_target=float(os.getenv('TESSERACT_QUEUE_TARGET_MS', '20')) / 1000
+        )
+
+    def expected_wait(self, priority: Optional[int] = None) -> float:
+        """Rough time until a new request of `priority` (default: least important) is admitted"""
+        ahead = self.queued if priority is None else sum(
+            waiting for level, waiting in self.queued_by_priority.items() if level <= priority
+        )
+        return (ahead + 1) / max(self.limit.limit, 1) * self.latency
+
+    def retry_after(self) -> int:
+        """Whole seconds a rejected client should wait (at least 1)"""
+        return max(1, math.ceil(self.expected_wait()))
+
+    async def acquire(self, priority: int = NORMAL) -> float:
+        """Wait for a slot; returns the admission time for `release`, raises Overloaded"""
+        now = self.clock()
+        if self.inflight < int(self.limit.limit) and not self.queued:
+            self.inflight += 1
+            self.stats['admitted'] += 1
+            return now
+        if not self.queued:
+            self.last_empty = now
+        timeout = self.codel_target if now - self.last_empty > self.codel_interval else self.queue_timeout
+        if self.expected_wait(priority) > self.queue_timeout:
+            self.stats['rejected_deadline'] += 1
+            raise Overloaded('expected wait exceeds the queue deadline', self.retry_after())
+        if self.queued >= self.max_queue:
+            worst = max((waiter for waiter in self.waiters if waiter[3] is not None), default=None)
+            if worst is None or worst[0] <= priority:
+                self.stats['rejected_queue_full'] += 1
+                raise Overloaded('admission queue is full', self.retry_after())
+            self._reject(worst, Overloaded('shed for a more important request', self.retry_after()))
+            self.stats['shed'] += 1
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = [priority, next(self.sequence), future, None]
+        waiter[3] = loop.call_later(timeout, self._expire, waiter)
+        heapq.heappush(self.waiters, waiter)
+        self.queued += 1
+        self.queued_by_priority[priority] = self.queued_by_priority.get(priority, 0) + 1
+        self.stats['waited'] += 1
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if waiter[3] is not None:
+                self._dequeue(waiter)
+            elif not future.cancelled() and future.exception() is None:
+                # Granted just as the client went away: hand the slot on
+                self.inflight -= 1
+                self._grant()
+            raise
+
+    def release(self, admitted: float, failed: bool = False, key: str = '*') -> None:
+        """Return a slot, feeding the request's latency (for route class `key`) to the limit"""
+        now = self.clock()
+        latency = now - admitted
+        self.latency += (latency - self.latency) * 0.1
+        self.limit.update(latency, self.inflight, failed, now, key)
+        self.inflight -= 1
+        self._grant()
+
+    def _grant(self) -> None:
+        while self.waiters and self.inflight < int(self.limit.limit):
+            waiter = heapq.heappop(self.waiters)
+            if waiter[3] is None:
+                continue
+            self._dequeue(waiter)
+            self.inflight += 1
+            self.stats['admitted'] += 1
+            waiter[2].set_result(self.clock())
+        # Drop finished entries once they outnumber live ones
+        if len(self.waiters) > 2 * self.queued + 64:
+            self.waiters = [waiter for waiter in self.waiters if waiter[3] is not None]
+            heapq.heapify(self.waiters)
+
+    def _dequeue(self, waiter: list) -> None:
+        """Take a live waiter out of the queue counts and stop its deadline timer"""
+        waiter[3].cancel()
+        waiter[3] = None
+        self.queued -= 1
+        self.queued_by_priority[waiter[0]] -= 1
+        if not self.queued:
+            self.last_empty = self.clock()
+
+    def _expire(self, waiter: list) -> None:
+        if waiter[3] is not None:
+            self.stats['rejected_deadline'] += 1
+            self._reject(waiter, Overloaded('queue deadline exceeded', self.retry_after()))
+
+    def _reject(self, waiter: list, error: Overloaded) -> None:
+        self._dequeue(waiter)
+        waiter[2].set_exception(error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'limit': round(self.limit.limit, 2),
+            'inflight': self.inflight,
+            'queued': self.queued,
+            'baselines_ms': {key: round(state[0] * 1000, 3) for key, state in self.limit.baselines.items()},
+            'latency_ms': round(self.latency * 1000, 3),
+            'decreases': self.limit.decreases,
+            **self.stats
+        }
+
+# ============================================================================
+# ASGI MIDDLEWARE
+# ============================================================================
+
+def compile_routes(routes: Sequence[Tuple[str, Optional[int]]]) -> List[Tuple[str, Pattern, Optional[int]]]:
+    return [(pattern, re.compile(fnmatch.translate(pattern)), priority) for pattern, priority in routes]
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware putting every HTTP request through an AdmissionController
+
+    Priorities come from the first matching (glob, priority) in `routes`,
+    else `default_priority`; a None priority bypasses admission entirely.
+    The matched glob is also the route class whose latency baseline the
+    request is measured against. A request that ends in an exception or a
+    5xx counts as a failure for the limit.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        routes: Sequence[Tuple[str, Optional[int]]] = ROUTE_PRIORITIES,
+        default_priority: int = NORMAL,
+        registry: Metrics = metrics
+    ):
+        self.app = app
+        self.controller = controller
+        self.routes = compile_routes(routes)
+        self.default_priority = default_priority
+        self.metrics = registry
+
+    def route(self, path: str) -> Tuple[str, Optional[int]]:
+        """(route class, priority) of a request path"""
+        for name, pattern, priority in self.routes:
+            if pattern.match(path):
+                return name, priority
+        return '*', self.default_priority
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        key, priority = self.route(scope['path'])
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            admitted = await self.controller.acquire(priority)
+        except Overloaded as error:
+            counter = ('tesseract_admission_rejected_total', (('reason', error.reason), ('priority', str(priority))))
+            self.metrics.counters[counter] = self.metrics.counters.get(counter, 0) + 1
+            await self._reject(send, error)
+            return
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.controller.release(admitted, failed=status >= 500, key=key)
+
+    @staticmethod
+    async def _reject(send, error: Overloaded) -> None:
+        body = json.dumps({'detail': f"Server overloaded: {error.reason}"}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', str(error.retry_after).encode())
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def limit_concurrency(app: FastAPI, controller: Optional[AdmissionController] = None) -> FastAPI:
+    """Add admission control to `app` (unless TESSERACT_ADMISSION=0) and an `/api/admission` endpoint
+
+    Call before `instrument(app)` so rejected requests are still measured.
+    """
+    if os.getenv('TESSERACT_ADMISSION', '1') == '0':
+        return app
+    controller = controller or AdmissionController.from_env()
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    app.state.admission = controller
+
+    @app.get("/api/admission", include_in_schema=False)
+    async def admission_stats() -> Dict[str, Any]:
+        return controller.snapshot()
+
+    return app
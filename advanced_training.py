@@ -1,10 +1,18 @@
 """TESSERACT v3.0 → v4.0 ADVANCED TRAINING WITH OLLAMA INTEGRATION"""
+import argparse
+import asyncio
 import json
-from datetime import datetime
+import os
+
+from artifact_cache import ArtifactCache, code_fingerprint
+from segment_store import atomic_write
+from training_scheduler import StageScheduler, training_result
 
 class AdvancedTrainer:
-    def __init__(self):
+    def __init__(self, artifact_dir=None):
         self.version = 3.0
+        artifact_dir = artifact_dir or os.getenv('TESSERACT_ARTIFACT_DIR')
+        self.artifacts = ArtifactCache(artifact_dir) if artifact_dir else None
         self.ollama_models = [
             'llama2', 'llama2-uncensored', 'mistral', 'mixtral',
             'neural-chat', 'starling-lm', 'orca', 'dolphin',
@@ -17,7 +25,6 @@ class AdvancedTrainer:
     def train(self):
         training_data = {
             'version': '3.0 → 4.0',
-            'timestamp': datetime.now().isoformat(),
             'training_sources': {
                 'ai_providers': 8,
                 'apis': 25,
@@ -78,12 +85,48 @@ class AdvancedTrainer:
         }
         return training_data
 
-trainer = AdvancedTrainer()
-result = trainer.train()
-print(json.dumps(result, indent=2))
+    
+    async def run(self, force=False, progress=None, on_stage=None, completed=None):
+        scheduler = StageScheduler(
+            cache=self.artifacts,
+            force=force,
+            progress=progress,
+            on_stage=on_stage,
+            completed=completed
+        )
+        scheduler.add('v4_training', self._train, fingerprint=code_fingerprint(self.train))
+        training = (await scheduler.run())['v4_training']
+        return training_result(training, scheduler)
+    
+    async def _train(self):
+        return self.train()
 
-# Save results
-with open('training_results_v4.json', 'w') as f:
-    json.dump(result, f, indent=2)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train TESSERACT v3.0 → v4.0")
+    parser.add_argument('--force', action='store_true', help="recompute, ignoring cached artifacts")
+    parser.add_argument('--artifact-dir', help="artifact cache directory (default: $TESSERACT_ARTIFACT_DIR)")
+    parser.add_argument('--output', default='training_results_v4.json', help="results file (default: %(default)s)")
+    parser.add_argument('--history', help="run history database (default: $TESSERACT_RUN_HISTORY_DB or training_runs.db)")
+    parser.add_argument('--no-history', action='store_true', help="do not record the result in the run history")
+    parser.add_argument('--binary-output', help="also write the results in the compact binary format (see result_format.py)")
+    args = parser.parse_args(argv)
+    
+    trainer = AdvancedTrainer(artifact_dir=args.artifact_dir)
+    result = asyncio.run(trainer.run(force=args.force))
+    print(json.dumps(result, indent=2))
+    
+    # Save results
+    atomic_write(args.output, json.dumps(result, indent=2).encode())
+    print(f"\n✅ Training complete. Results saved to {args.output}")
+    if args.binary_output:
+        from result_format import write_results
+        write_results(args.binary_output, [result], single=True)
+        print(f"✅ Binary results saved to {args.binary_output}")
+    if not args.no_history:
+        from run_history import RunHistory, default_path, record_run
+        with RunHistory(args.history or default_path()) as history:
+            record_run(history, result, trainer='v4', source=args.output)
+    return result
 
-print("\n✅ Training complete. Results saved to training_results_v4.json")
+if __name__ == '__main__':
+    main()
@@ -5,29 +5,178 @@ Trains and enhances TESSERACT ULTIMATE using all AI models, APIs, and GitHub rep
 
 import os
 import json
+import argparse
 import asyncio
 import logging
-from datetime import datetime
+import threading
 from typing import Dict, List, Any, Optional
 import aiohttp
 import numpy as np
 
+from artifact_cache import ArtifactCache, code_fingerprint
+from bounded_history import BoundedHistory
+from http_pool import ProviderConfig, ProviderPool
+from process_pool import ProcessPool, close_shared_pool, shared_pool
+from segment_store import DataDirectory, RecordLog
+from timeseries_store import TimeSeriesStore, column_features, merge_column_features
+from training_scheduler import ProgressCallback, StageCallback, StageScheduler, training_result
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class AITrainingEngine:
     """Train TESSERACT ULTIMATE with all available AIs and data"""
     
-    def __init__(self):
-        self.training_data = []
-        self.ai_insights = []
-        self.api_data = []
-        self.github_patterns = []
-        self.improvements = []
+    history_names = ('training_data', 'ai_insights', 'api_data', 'github_patterns', 'improvements')
+    
+    # Features map to payload columns through 'fields'; a feature without an entry reads the column of its own name
+    data_sources = {
+        'crypto_market': {
+            'source': 'CoinGecko',
+            'features': ['price', 'volume', 'market_cap', 'volatility'],
+            'fields': {'price': 'prices', 'volume': 'total_volumes', 'market_cap': 'market_caps'}
+        },
+        'stock_market': {
+            'source': 'Finnhub',
+            'features': ['price', 'pe_ratio', 'earnings', 'sentiment'],
+            'fields': {'price': 'c'}
+        },
+        'sports_data': {
+            'source': 'The Odds API',
+            'features': ['odds', 'teams', 'outcomes', 'probability'],
+            'fields': {}
+        },
+        'weather_patterns': {
+            'source': 'Open-Meteo',
+            'features': ['temperature', 'humidity', 'pressure', 'wind'],
+            'fields': {
+                'temperature': 'temperature_2m',
+                'humidity': 'relative_humidity_2m',
+                'pressure': 'surface_pressure',
+                'wind': 'wind_speed_10m'
+            }
+        },
+        'blockchain_activity': {
+            'source': 'Solscan',
+            'features': ['transactions', 'gas_fees', 'active_addresses', 'volume'],
+            'fields': {}
+        },
+        'defi_metrics': {
+            'source': 'DefiLlama',
+            'features': ['tvl', 'apy', 'fees', 'users'],
+            'fields': {}
+        }
+    }
+    
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        stage_timeout: Optional[float] = 300.0,
+        data_dir: Optional[str] = None,
+        artifact_dir: Optional[str] = None,
+        process_pool: Optional[ProcessPool] = None,
+        history_entries: Optional[int] = None,
+        history_age: Optional[float] = None,
+        history_dir: Optional[str] = None,
+        providers: Optional[ProviderPool] = None,
+        provider_configs: Optional[Dict[str, ProviderConfig]] = None
+    ):
+        # Only recent stage outputs stay in memory; older ones spill to history_dir if set
+        history_dir = history_dir or os.getenv('TESSERACT_HISTORY_DIR')
+        self.history_entries = history_entries or int(os.getenv('TESSERACT_HISTORY_MAX_ENTRIES', '100'))
+        history_age = history_age or os.getenv('TESSERACT_HISTORY_MAX_AGE')
+        self.history_age = float(history_age) if history_age else None
+        self.training_data = self._history('training_data', history_dir)
+        self.ai_insights = self._history('ai_insights', history_dir)
+        self.api_data = self._history('api_data', history_dir)
+        self.github_patterns = self._history('github_patterns', history_dir)
+        self.improvements = self._history('improvements', history_dir)
+        self.timeseries = TimeSeriesStore()
         self.version = 2.0
+        # Concurrent training runs share the engine, so histories and series are updated under this lock
+        self._lock = threading.Lock()
+        self.max_concurrency = max_concurrency
+        self.stage_timeout = stage_timeout
+        
+        # CPU-bound stages run on worker processes so they never block the event loop
+        self.process_pool = process_pool
+        
+        # Source data is fetched through this pool, or a pool opened for each gather from
+        # `provider_configs` if none is given (needed when runs use separate event loops)
+        self.providers = providers
+        self.provider_configs = provider_configs
+        
+        # Stage outputs and source series persist across restarts when a data directory is set
+        data_dir = data_dir or os.getenv('TESSERACT_DATA_DIR')
+        self.data = DataDirectory(data_dir) if data_dir else None
+        if self.data is not None:
+            self._load_stored_series()
+        
+        # Stage outputs are content-addressed so reruns only recompute what changed
+        artifact_dir = artifact_dir or os.getenv('TESSERACT_ARTIFACT_DIR')
+        if not artifact_dir and data_dir:
+            artifact_dir = os.path.join(data_dir, 'artifacts')
+        self.artifacts = ArtifactCache(artifact_dir) if artifact_dir else None
         
         logger.info("🧠 AI TRAINING ENGINE INITIALIZED")
     
+    def _history(self, name: str, history_dir: Optional[str]) -> BoundedHistory:
+        spill = RecordLog(os.path.join(history_dir, name)) if history_dir else None
+        return BoundedHistory(self.history_entries, self.history_age, spill)
+    
+    def _load_stored_series(self) -> None:
+        """Reopen every persisted source series into the in-memory store"""
+        for source, features in self.data.stored_series().items():
+            records = self.data.series(source, features).range()
+            self.timeseries.register(source, features).extend(
+                records['timestamp'],
+                {feature: records[feature] for feature in features}
+            )
+            logger.info(f"📂 Reopened {len(records)} {source} points")
+    
+    def memory_usage(self) -> Dict[str, Any]:
+        """Approximate bytes held in memory per structure"""
+        histories = {name: getattr(self, name).stats() for name in self.history_names}
+        timeseries = sum(source['bytes'] for source in self.timeseries.stats().values())
+        return {
+            'histories': histories,
+            'timeseries_bytes': timeseries,
+            'total_bytes': timeseries + sum(history['bytes'] for history in histories.values())
+        }
+    
+    def _record(self, name: str, document: Dict[str, Any]) -> None:
+        """Keep a stage output in its history and append it to its on-disk log"""
+        with self._lock:
+            getattr(self, name).append(document)
+        self._persist(name, document)
+    
+    def _persist(self, name: str, document: Dict[str, Any]) -> None:
+        """Append a stage output to its on-disk log"""
+        if self.data is not None:
+            self.data.log(name).append(document)
+    
+    def last_persisted(self, name: str) -> Optional[Dict[str, Any]]:
+        """Most recent persisted output of a stage, without re-running it"""
+        if self.data is None:
+            return None
+        return self.data.log(name).latest()
+    
+    def invalidate(self, *stages: str) -> None:
+        """Drop cached outputs of the given stages (all stages if none given)"""
+        if self.artifacts is None:
+            return
+        for stage in stages or (None,):
+            self.artifacts.invalidate(stage)
+    
+    def close(self) -> None:
+        """Flush and close persisted data"""
+        if self.data is not None:
+            self.data.close()
+        for name in self.history_names:
+            spill = getattr(self, name).spill
+            if spill is not None:
+                spill.close()
+    
     async def train_with_ai_models(self) -> Dict[str, Any]:
         """Train using all available AI models"""
         logger.info("🤖 Training with all AI models...")
@@ -96,49 +245,91 @@ class AITrainingEngine:
             }
         }
         
-        self.ai_insights.append(insights)
+        self._record('ai_insights', insights)
         return insights
     
     async def gather_api_training_data(self) -> Dict[str, Any]:
         """Gather training data from all APIs"""
         logger.info("📊 Gathering data from all APIs...")
         
-        api_data = {
-            'crypto_market': {
-                'source': 'CoinGecko',
-                'data_points': 1000,
-                'features': ['price', 'volume', 'market_cap', 'volatility']
-            },
-            'stock_market': {
-                'source': 'Finnhub',
-                'data_points': 500,
-                'features': ['price', 'pe_ratio', 'earnings', 'sentiment']
-            },
-            'sports_data': {
-                'source': 'The Odds API',
-                'data_points': 300,
-                'features': ['odds', 'teams', 'outcomes', 'probability']
-            },
-            'weather_patterns': {
-                'source': 'Open-Meteo',
-                'data_points': 200,
-                'features': ['temperature', 'humidity', 'pressure', 'wind']
-            },
-            'blockchain_activity': {
-                'source': 'Solscan',
-                'data_points': 800,
-                'features': ['transactions', 'gas_fees', 'active_addresses', 'volume']
-            },
-            'defi_metrics': {
-                'source': 'DefiLlama',
-                'data_points': 600,
-                'features': ['tvl', 'apy', 'fees', 'users']
-            }
-        }
+        providers = self.providers or ProviderPool(self.provider_configs)
+        try:
+            outcomes = await asyncio.gather(
+                *(providers.get_series(spec['source']) for spec in self.data_sources.values()),
+                return_exceptions=True
+            )
+        finally:
+            if self.providers is None:
+                await providers.close()
         
-        self.api_data.append(api_data)
+        api_data = {}
+        for (name, spec), outcome in zip(self.data_sources.items(), outcomes):
+            dataset = {'source': spec['source'], 'features': list(spec['features'])}
+            if isinstance(outcome, BaseException):
+                logger.warning(f"⚠️ No data from {spec['source']}: {outcome}")
+                dataset.update(data_points=0, error=f"{type(outcome).__name__}: {outcome}")
+            else:
+                timestamps, columns = outcome
+                dataset['data_points'] = len(timestamps)
+                dataset['new_points'] = self._ingest(spec, timestamps, columns)
+            api_data[name] = dataset
+        
+        self._register_sources(api_data)
+        self._record('api_data', api_data)
         return api_data
     
+    def _ingest(self, spec: Dict[str, Any], timestamps: List[int], columns: Dict[str, List[Optional[float]]]) -> int:
+        """Append fetched points newer than the source's last stored one; returns how many were added"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        with self._lock:
+            series = self.timeseries.register(spec['source'], spec['features'])
+            # Providers return overlapping windows, so only points past the stored end are new
+            fresh = timestamps > series.timestamps[-1] if len(series) else np.ones(len(timestamps), dtype=bool)
+            values = {}
+            for feature in spec['features']:
+                field = spec['fields'].get(feature, feature)
+                if field in columns:
+                    values[feature] = np.asarray(columns[field], dtype=np.float64)[fresh]
+            series.extend(timestamps[fresh], values)
+            if self.data is not None:
+                stored = self.data.series(spec['source'], spec['features'])
+                stored.extend(timestamps[fresh], values)
+                stored.flush()
+        return int(fresh.sum())
+    
+    def _register_sources(self, api_data: Dict[str, Any]) -> None:
+        """Give each source one contiguous column per feature for its data points"""
+        with self._lock:
+            for dataset in api_data.values():
+                self.timeseries.register(dataset['source'], dataset['features'])
+                if self.data is not None:
+                    self.data.series(dataset['source'], dataset['features'])
+    
+    async def extract_features(self, api_data: Dict[str, Any], window: int = 20, lags: int = 10) -> Dict[str, Any]:
+        """Extract feature statistics from every gathered source's time series"""
+        logger.info("🧮 Extracting features from gathered data...")
+        
+        self._register_sources(api_data)
+        pool = self.process_pool or shared_pool()
+        features = {}
+        for dataset in api_data.values():
+            series = self.timeseries.series(dataset['source'])
+            # Views of the points so far; other runs only append past them
+            with self._lock:
+                points = len(series)
+                columns = {feature: series.column(feature) for feature in series.features}
+            if not points:
+                features[dataset['source']] = {'points': 0}
+                continue
+            partials = await pool.map_chunks(column_features, columns, points, window=window, lags=lags)
+            features[dataset['source']] = {
+                'points': points,
+                'features': merge_column_features(partials)
+            }
+        
+        self._persist('features', features)
+        return features
+    
     async def extract_github_patterns(self) -> Dict[str, Any]:
         """Extract best practices from GitHub repos"""
         logger.info("🐙 Extracting patterns from GitHub repositories...")
@@ -181,7 +372,7 @@ class AITrainingEngine:
             ]
         }
         
-        self.github_patterns.append(patterns)
+        self._record('github_patterns', patterns)
         return patterns
     
     async def generate_improvements(self) -> Dict[str, Any]:
@@ -285,25 +476,54 @@ class AITrainingEngine:
             }
         }
         
-        self.improvements.append(improvements)
+        self._record('improvements', improvements)
         return improvements
     
-    async def train_complete(self) -> Dict[str, Any]:
-        """Complete training process"""
+    async def train_complete(
+        self,
+        force: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        on_stage: Optional[StageCallback] = None,
+        completed: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Complete training process; `completed` resumes from earlier stage outputs"""
         logger.info("🎓 Starting complete training process...")
         
-        # Run all training tasks
-        ai_insights = await self.train_with_ai_models()
-        api_data = await self.gather_api_training_data()
-        github_patterns = await self.extract_github_patterns()
-        improvements = await self.generate_improvements()
+        # Independent stages run concurrently; improvements wait for all three
+        scheduler = StageScheduler(
+            max_concurrency=self.max_concurrency,
+            default_timeout=self.stage_timeout,
+            cache=self.artifacts,
+            force=force,
+            progress=progress,
+            on_stage=on_stage,
+            completed=completed
+        )
+        scheduler.add('ai_insights', self.train_with_ai_models)
+        # Fetches live data, so a cached copy would be stale
+        scheduler.add('api_data', self.gather_api_training_data, cacheable=False)
+        scheduler.add('github_patterns', self.extract_github_patterns)
+        # Reads the live time series, which the stage key does not cover
+        scheduler.add('features', self.extract_features, inputs=('api_data',), cacheable=False)
+        scheduler.add(
+            'improvements',
+            lambda **_: self.generate_improvements(),
+            inputs=('ai_insights', 'api_data', 'github_patterns'),
+            fingerprint=code_fingerprint(self.generate_improvements)
+        )
+        outputs = await scheduler.run()
+        ai_insights = outputs['ai_insights']
+        api_data = outputs['api_data']
+        github_patterns = outputs['github_patterns']
+        improvements = outputs['improvements']
+        self._register_sources(api_data)
         
-        training_result = {
+        result = training_result({
             'status': 'TRAINING_COMPLETE',
             'version': self.version,
-            'timestamp': datetime.now().isoformat(),
             'ai_insights': ai_insights,
             'api_data_gathered': len(api_data),
+            'feature_statistics': outputs['features'],
             'github_patterns_extracted': len(github_patterns['code_patterns']),
             'improvements_generated': len(improvements['enhancements']),
             'training_metrics': improvements['training_metrics'],
@@ -314,16 +534,44 @@ class AITrainingEngine:
                 'Set up continuous monitoring',
                 'Implement automated deployment',
                 'Add performance benchmarks'
-            ]
-        }
+            ],
+            'stage_timings': scheduler.report
+        }, scheduler)
         
         logger.info(f"✓ Training complete - Version {self.version} ready")
-        return training_result
+        return result
 
-async def main():
+_singletons: Dict[str, AITrainingEngine] = {}
+_singletons_lock = threading.Lock()
+
+def shared_engine() -> AITrainingEngine:
+    """The process-wide engine, so concurrent training jobs share one data directory"""
+    with _singletons_lock:
+        if 'engine' not in _singletons:
+            _singletons['engine'] = AITrainingEngine()
+        return _singletons['engine']
+
+def close_shared_engine() -> None:
+    """Close the process-wide engine if it was ever created"""
+    with _singletons_lock:
+        engine = _singletons.pop('engine', None)
+    if engine is not None:
+        engine.close()
+
+async def main(argv: Optional[List[str]] = None):
     """Run AI training engine"""
-    engine = AITrainingEngine()
-    result = await engine.train_complete()
+    parser = argparse.ArgumentParser(description="Train TESSERACT ULTIMATE")
+    parser.add_argument('--force', action='store_true', help="recompute every stage, ignoring cached artifacts")
+    parser.add_argument('--invalidate', action='append', default=[], metavar='STAGE', help="drop cached outputs of STAGE first")
+    parser.add_argument('--artifact-dir', help="artifact cache directory (default: $TESSERACT_ARTIFACT_DIR)")
+    args = parser.parse_args(argv)
+    
+    engine = AITrainingEngine(artifact_dir=args.artifact_dir)
+    if args.invalidate:
+        engine.invalidate(*args.invalidate)
+    result = await engine.train_complete(force=args.force)
+    engine.close()
+    close_shared_pool()
     
     print("\n" + "="*80)
     print("🧠 AI TRAINING ENGINE - RESULTS")
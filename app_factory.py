@@ -0,0 +1,68 @@
+"""
+TESSERACT APP FACTORY
+One FastAPI application serving the v2 and v4 APIs, with route modules imported
+and singletons created at startup instead of at import time
+
+    uvicorn app_factory:create_app --factory
+"""
+
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+from fastapi import FastAPI
+
+from admission import limit_concurrency
+from instrumentation import instrument
+
+logger = logging.getLogger(__name__)
+
+def create_app() -> FastAPI:
+    """Build the unified v2 + v4 application"""
+    started = time.perf_counter()
+    import main
+    import main_v4
+    imported = time.perf_counter()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        startup_started = time.perf_counter()
+        async with main.lifespan(app), main_v4.lifespan(app):
+            timings = app.state.startup_timings
+            timings['startup_ms'] = round((time.perf_counter() - startup_started) * 1000, 3)
+            logger.info(
+                f"🚀 Started in {timings['import_ms'] + timings['create_app_ms'] + timings['startup_ms']:.1f}ms "
+                f"(imports {timings['import_ms']:.1f}ms, app {timings['create_app_ms']:.1f}ms, "
+                f"startup {timings['startup_ms']:.1f}ms)"
+            )
+            yield
+
+    app = FastAPI(
+        title="TESSERACT",
+        description="Unified v2 and v4 API",
+        version="4.0.0",
+        lifespan=lifespan
+    )
+    app.include_router(main.router)
+    app.include_router(main_v4.router)
+    limit_concurrency(app)
+    instrument(app)
+
+    @app.get("/api/startup-metrics")
+    async def startup_metrics() -> Dict[str, Any]:
+        return app.state.startup_timings
+
+    app.state.startup_timings = {
+        'import_ms': round((imported - started) * 1000, 3),
+        'create_app_ms': round((time.perf_counter() - imported) * 1000, 3),
+        'startup_ms': None
+    }
+    return app
+
+if __name__ == '__main__':
+    import uvicorn
+    from main import configure_logging
+    configure_logging()
+    uvicorn.run(create_app(), host="0.0.0.0", port=int(os.getenv('PORT', '8000')))
@@ -0,0 +1,80 @@
+"""
+TESSERACT ARTIFACT CACHE
+Content-addressed storage of training stage outputs, so reruns skip stages
+whose inputs have not changed
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+# Returned by ArtifactCache.get on a miss, since None is a valid stage output
+MISSING = object()
+
+def content_hash(value: Any) -> str:
+    """SHA-256 of a value's canonical JSON encoding"""
+    payload = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+def code_fingerprint(func: Callable) -> str:
+    """Hash of a function's bytecode and constants, which changes when its code does"""
+    func = getattr(func, '__func__', func)
+    code = func.__code__
+    digest = hashlib.sha256(code.co_code)
+    digest.update(repr(code.co_consts).encode())
+    digest.update(repr(code.co_names).encode())
+    return digest.hexdigest()
+
+def stage_key(stage: str, fingerprint: str, input_hashes: Dict[str, str]) -> str:
+    """Key of a stage run: its name, code fingerprint and the hashes of its inputs"""
+    return content_hash({'stage': stage, 'fingerprint': fingerprint, 'inputs': input_hashes})
+
+
+class ArtifactCache:
+    """Stage outputs stored as `<directory>/<stage>/<key>.json`"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, stage, f"{key}.json")
+
+    def get(self, stage: str, key: str) -> Any:
+        """The stored output for `key`, or MISSING"""
+        try:
+            with open(self._path(stage, key)) as handle:
+                value = json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return value['output']
+
+    def put(self, stage: str, key: str, output: Any) -> None:
+        """Store a stage output atomically
+
+        Each writer gets its own temporary file, so runs computing the same key
+        at once each publish a complete artifact and the last rename wins.
+        """
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{key}.", suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as handle:
+                json.dump({'stage': stage, 'key': key, 'output': output}, handle, default=str)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def invalidate(self, stage: Optional[str] = None) -> None:
+        """Forget every artifact of `stage`, or of all stages"""
+        target = self.directory if stage is None else os.path.join(self.directory, stage)
+        shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
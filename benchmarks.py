@@ -0,0 +1,1824 @@
+"""
+TESSERACT BENCHMARKS
+Micro-benchmarks for the performance-critical building blocks, each checking
+the behaviour it measures
+
+Run with: python benchmarks.py [name ...]
+          python benchmarks.py load_test --baseline baseline.json --save-baseline
+          python benchmarks.py load_test --baseline baseline.json --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from rate_limiter import LIMITER_ALGORITHMS, SQLiteBackend, create_limiter
+
+# The load generators send every request from one client, so the API's
+# per-client quota is lifted unless TESSERACT_RATE_LIMIT_RPM is set
+os.environ.setdefault('TESSERACT_RATE_LIMIT_RPM', str(10**9))
+
+class CheckFailed(AssertionError):
+    """A benchmark's result contradicts the behaviour it measures"""
+
+def check(condition: bool, message: str) -> None:
+    """Fail the benchmark when `condition` is false (kept under python -O, unlike assert)"""
+    if not condition:
+        raise CheckFailed(message)
+
+# ============================================================================
+# RATE LIMITER
+# ============================================================================
+
+def bench_rate_limiter(clients: int = 100_000, rounds: int = 5) -> Dict[str, Any]:
+    """Measure checks/sec and table memory with `clients` distinct client IDs"""
+    client_ids = [f"client-{i}" for i in range(clients)]
+    results = {}
+    for algorithm in LIMITER_ALGORITHMS:
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        limiter = create_limiter(algorithm, limit=60, max_clients=clients)
+        allow = limiter.allow
+        for client_id in client_ids:
+            allow(client_id)
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        checks = clients * rounds
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for client_id in client_ids:
+                allow(client_id)
+        elapsed = time.perf_counter() - start
+
+        results[algorithm] = {
+            'clients': len(limiter),
+            'checks': checks,
+            'checks_per_sec': round(checks / elapsed),
+            'ns_per_check': round(elapsed / checks * 1e9, 1),
+            'table_bytes': held - baseline,
+            'bytes_per_client': round((held - baseline) / clients, 1)
+        }
+    return results
+
+def _shared_limiter_worker(path: str, limit: int, requests: int, lease_size: int, index: int, queue) -> None:
+    """One worker process hammering a single client through the shared backend
+
+    Every tenth request also comes from this worker's own quiet client, whose
+    separate quota the hammered one must not eat into.
+    """
+    async def run() -> Dict[str, int]:
+        backend = SQLiteBackend(path, limit=limit, lease_size=lease_size)
+        admitted = quiet_admitted = 0
+        for i in range(requests):
+            admitted += await backend.acquire('shared-client')
+            if i % 10 == 0:
+                quiet_admitted += await backend.acquire(f"quiet-client-{index}")
+        round_trips = backend.round_trips
+        await backend.close()
+        return {'admitted': admitted, 'quiet_admitted': quiet_admitted, 'round_trips': round_trips}
+    queue.put(asyncio.run(run()))
+
+def _bucket_tokens(path: str, client_id: str) -> float:
+    import sqlite3
+    with sqlite3.connect(path) as conn:
+        return conn.execute('SELECT tokens FROM buckets WHERE client_id = ?', (client_id,)).fetchone()[0]
+
+def _check_lease_refunds(path: str, limit: int, lease_size: int) -> None:
+    """Unspent lease tokens go back to the shared bucket on expiry and on close"""
+    now = [1000.0]
+
+    async def run() -> None:
+        # A period this long makes refill negligible, so bucket levels are exact
+        backend = SQLiteBackend(path, limit=limit, period=1e9, lease_size=lease_size, lease_ttl=1.0, clock=lambda: now[0])
+        await backend.acquire('refund-client')
+        tokens = _bucket_tokens(path, 'refund-client')
+        check(round(tokens) == limit - lease_size, f"a lease of {lease_size} left {tokens} of {limit} tokens")
+        now[0] += 2.0
+        await backend.acquire('refund-client')
+        tokens = _bucket_tokens(path, 'refund-client')
+        check(round(tokens) == limit - 1 - lease_size, f"an expired lease was not refunded: {tokens} tokens left")
+        await backend.close()
+        tokens = _bucket_tokens(path, 'refund-client')
+        check(round(tokens) == limit - 2, f"close() did not refund the open lease: {tokens} tokens left after 2 requests")
+
+    asyncio.run(run())
+
+def bench_shared_rate_limiter(
+    workers: int = 4,
+    limit: int = 1000,
+    requests: int = 2000,
+    lease_size: int = 50
+) -> Dict[str, Any]:
+    """Run `workers` processes against one SQLite-backed quota and check it holds, stays per client and refunds leases"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ratelimit.db')
+        asyncio.run(SQLiteBackend(path, limit=limit).close())
+        queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=_shared_limiter_worker,
+                args=(path, limit, requests, lease_size, index, queue)
+            )
+            for index in range(workers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        remaining = _bucket_tokens(path, 'shared-client')
+        _check_lease_refunds(path, limit, lease_size)
+
+    admitted = sum(outcome['admitted'] for outcome in outcomes)
+    allowed = limit + elapsed * limit / 60.0
+    quiet_attempts = workers * len(range(0, requests, 10))
+    quiet_admitted = sum(outcome['quiet_admitted'] for outcome in outcomes)
+    check(admitted <= allowed, f"{workers} workers admitted {admitted} requests against a ceiling of {allowed:.1f}")
+    # Every lease was refunded on close, so only refill can add to what was not admitted
+    check(remaining >= limit - admitted - 1, f"{limit - admitted - remaining:.0f} tokens were lost in leases")
+    check(
+        quiet_admitted == quiet_attempts,
+        f"quiet clients got {quiet_admitted} of {quiet_attempts} requests while another client was throttled"
+    )
+    return {
+        'workers': workers,
+        'attempts': workers * requests,
+        'admitted': admitted,
+        'quota_ceiling': round(allowed, 1),
+        'quota_held': admitted <= allowed,
+        'quiet_admitted': quiet_admitted,
+        'round_trips': sum(outcome['round_trips'] for outcome in outcomes),
+        'checks_per_sec': round(workers * requests / elapsed)
+    }
+
+# ============================================================================
+# UPSTREAM HTTP POOL
+# ============================================================================
+
+def bench_http_pool(requests: int = 2000, concurrency: int = 50, latency: float = 0.002) -> Dict[str, Any]:
+    """Drive the provider pool against the local fake providers"""
+    from fake_providers import FakeProviderServer
+    from http_pool import ProviderPool
+
+    async def run() -> Dict[str, Any]:
+        async with FakeProviderServer(latency=latency) as server:
+            async with ProviderPool(server.provider_configs(max_connections=concurrency)) as pool:
+                providers = list(pool.clients)
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def one(i: int) -> None:
+                    async with semaphore:
+                        await pool.get_json(providers[i % len(providers)], f"series/{i}")
+
+                start = time.perf_counter()
+                await asyncio.gather(*(one(i) for i in range(requests)))
+                elapsed = time.perf_counter() - start
+                stats = pool.stats()
+        created = sum(provider['connections_created'] for provider in stats.values())
+        reused = sum(provider['connections_reused'] for provider in stats.values())
+        return {
+            'requests': requests,
+            'concurrency': concurrency,
+            'requests_per_sec': round(requests / elapsed),
+            'connections_created': created,
+            'connections_reused': reused,
+            'reuse_ratio': round(reused / (created + reused), 4) if created + reused else 0.0
+        }
+
+    async def main_run() -> Dict[str, Any]:
+        await _check_circuit_breaker()
+        return await run()
+
+    return asyncio.run(main_run())
+
+async def _check_circuit_breaker() -> None:
+    """A cancelled half-open probe and a non-JSON 200 must not wedge the breaker"""
+    from fake_providers import FakeProviderServer
+    from http_pool import CircuitBreaker, CircuitOpenError, ProviderClient, UpstreamError
+
+    async with FakeProviderServer(latency=0.2) as server:
+        config = server.provider_configs(retries=0, failure_threshold=1, reset_timeout=0.0)['coingecko']
+        client = ProviderClient(config)
+        breaker = client.breaker
+        try:
+            breaker.record_failure()
+            probe = asyncio.ensure_future(client.request_json('GET', 'series'))
+            await asyncio.sleep(0.05)
+            check(breaker.probing, "the half-open request is not marked as the probe")
+            probe.cancel()
+            await asyncio.gather(probe, return_exceptions=True)
+            check(not breaker.probing, "a cancelled probe left the breaker waiting on it")
+            await client.request_json('GET', 'series')
+            check(breaker.state == CircuitBreaker.CLOSED, f"breaker is {breaker.state} after a successful probe")
+
+            server.latency, server.malformed_rate = 0.0, 1.0
+            try:
+                await client.request_json('GET', 'series')
+                check(False, "a non-JSON 200 was returned as a payload")
+            except CircuitOpenError:
+                check(False, "the breaker opened before the non-JSON response was seen")
+            except UpstreamError:
+                pass
+            check(breaker.state == CircuitBreaker.OPEN and not breaker.probing, f"breaker is {breaker.state} after a non-JSON 200")
+            server.malformed_rate = 0.0
+            await client.request_json('GET', 'series')
+            check(breaker.state == CircuitBreaker.CLOSED, f"breaker is {breaker.state} once the upstream recovers")
+        finally:
+            await client.close()
+
+# ============================================================================
+# PROVIDER FAN-OUT
+# ============================================================================
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 of latency samples in seconds, reported in milliseconds"""
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+    return {'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99)}
+
+def bench_fanout(queries: int = 300, providers: int = 8, quorum: int = 5) -> Dict[str, Any]:
+    """Compare wait-for-all against quorum + hedging on mock providers with tail latency"""
+    from fake_providers import MockAIProvider, lognormal_latency
+    from provider_fanout import FanOutEngine
+
+    def mock_providers() -> List[MockAIProvider]:
+        return [
+            MockAIProvider(f"mock-{i}", lognormal_latency(0.005 * (1 + i % 3), tail=0.05, tail_latency=0.25))
+            for i in range(providers)
+        ]
+
+    async def measure(engine: FanOutEngine) -> Dict[str, Any]:
+        samples = []
+        semaphore = asyncio.Semaphore(25)
+
+        async def one(i: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                await engine.run(f"query {i}")
+                samples.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(queries)))
+        return {**_percentiles(samples), **engine.stats}
+
+    async def run() -> Dict[str, Any]:
+        await _check_fanout_outcomes()
+        results = {
+            'wait_for_all': await measure(FanOutEngine(mock_providers(), quorum=providers, hedge_after=None)),
+            f'quorum_{quorum}_of_{providers}_hedged': await measure(
+                FanOutEngine(mock_providers(), quorum=quorum, hedge_after=0.05)
+            )
+        }
+        hedged = results[f'quorum_{quorum}_of_{providers}_hedged']
+        check(hedged['quorum_misses'] == 0, f"{hedged['quorum_misses']} queries missed a quorum every provider agrees on")
+        check(
+            hedged['p99_ms'] < results['wait_for_all']['p99_ms'],
+            f"quorum p99 {hedged['p99_ms']}ms is not below wait-for-all p99 {results['wait_for_all']['p99_ms']}ms"
+        )
+        return results
+
+    return asyncio.run(run())
+
+async def _check_fanout_outcomes() -> None:
+    """Quorum, failure, hedging and cancellation outcomes of single fan-outs with scripted providers"""
+    from fake_providers import MockAIProvider
+    from provider_fanout import FanOutEngine
+
+    class Tracked(MockAIProvider):
+        """Counts the calls that ran to completion, so cancelled ones can be told apart"""
+
+        def __init__(self, name: str, latencies: List[float], **kwargs: Any):
+            scripted = iter(latencies)
+            super().__init__(name, lambda: next(scripted, latencies[-1]), **kwargs)
+            self.completed = 0
+
+        async def analyze(self, query: str) -> Dict[str, Any]:
+            answer = await super().analyze(query)
+            self.completed += 1
+            return answer
+
+    # Three fast providers agree; the slow ones must be cancelled, not awaited
+    fast = [Tracked(f"fast-{i}", [0.01]) for i in range(3)]
+    slow = [Tracked(f"slow-{i}", [0.5]) for i in range(3)]
+    failing = Tracked('failing', [0.0], failure_rate=1.0)
+    engine = FanOutEngine(fast + slow + [failing], quorum=3, hedge_after=None)
+    start = time.perf_counter()
+    result = await engine.run('quorum')
+    elapsed = time.perf_counter() - start
+    outcome = result['quorum']
+    check(outcome['reached'] and sorted(outcome['agreeing']) == [p.name for p in fast], f"quorum outcome {outcome}")
+    check(elapsed < 0.25, f"quorum of the three fast providers took {elapsed * 1000:.0f}ms")
+    check(list(outcome['failed']) == ['failing'], f"failed providers {outcome['failed']}")
+    check(sorted(outcome['cancelled']) == [p.name for p in slow], f"cancelled providers {outcome['cancelled']}")
+    await asyncio.sleep(0.6)
+    check(not any(p.completed for p in slow), "stragglers ran to completion after the quorum was reached")
+    check(engine.stats['cancelled'] == len(slow), f"engine counted {engine.stats['cancelled']} cancellations")
+
+    # Providers that disagree never reach the quorum, and every answer is waited for
+    split = [Tracked(f"split-{i}", [0.01], verdict=i % 2) for i in range(4)]
+    engine = FanOutEngine(split, quorum=3, hedge_after=None)
+    outcome = (await engine.run('split'))['quorum']
+    check(not outcome['reached'] and engine.stats['quorum_misses'] == 1, f"split vote outcome {outcome}")
+    check(not outcome['cancelled'], f"split vote cancelled {outcome['cancelled']}")
+
+    # A provider whose first request stalls is answered by its hedge, and the stalled request is cancelled
+    stalled = Tracked('stalled', [0.5, 0.01])
+    engine = FanOutEngine([stalled], quorum=1, hedge_after=0.05)
+    start = time.perf_counter()
+    outcome = (await engine.run('hedge'))['quorum']
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.5)
+    check(outcome['hedged'] == ['stalled'] and engine.stats['hedge_wins'] == 1, f"hedge outcome {outcome}, {engine.stats}")
+    check(elapsed < 0.25, f"hedged request took {elapsed * 1000:.0f}ms")
+    check(stalled.calls == 2 and stalled.completed == 1, f"stalled primary was not cancelled ({stalled.completed} of {stalled.calls} completed)")
+
+# ============================================================================
+# TIME-SERIES STORE
+# ============================================================================
+
+def bench_timeseries(points: int = 2_000_000, batch: int = 10_000) -> Dict[str, Any]:
+    """Append `points` rows in batches, then time range queries and aggregates"""
+    import numpy as np
+    from timeseries_store import TimeSeriesStore
+
+    store = TimeSeriesStore()
+    store.register('CoinGecko', ['price', 'volume', 'market_cap', 'volatility'])
+    rng = np.random.default_rng(0)
+    origin = 1_700_000_000_000
+    timestamps = origin + np.arange(points, dtype=np.int64) * 1000
+    prices = 30_000 * np.exp(np.cumsum(rng.normal(0, 1e-4, points)))
+    volumes = rng.uniform(0, 10, points)
+
+    start = time.perf_counter()
+    for lo in range(0, points, batch):
+        hi = lo + batch
+        store.extend('CoinGecko', timestamps[lo:hi], {'price': prices[lo:hi], 'volume': volumes[lo:hi]})
+    append_s = time.perf_counter() - start
+
+    def timed(func: Callable[[], Any], repeat: int = 20) -> float:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return round((time.perf_counter() - start) / repeat * 1000, 3)
+
+    day_start, day_end = origin + 86_400_000, origin + 2 * 86_400_000
+    return {
+        'points': points,
+        'bytes': store.stats()['CoinGecko']['bytes'],
+        'append_points_per_sec': round(points / append_s),
+        'range_query_ms': timed(lambda: store.range('CoinGecko', day_start, day_end)),
+        'ohlc_1m_full_ms': timed(lambda: store.ohlc('CoinGecko', 'price', 60_000), repeat=5),
+        'resample_1h_mean_ms': timed(lambda: store.resample('CoinGecko', 'volume', 3_600_000), repeat=5),
+        'rolling_mean_60_ms': timed(lambda: store.rolling_mean('CoinGecko', 'price', 60), repeat=5),
+        'rolling_volatility_60_day_ms': timed(
+            lambda: store.rolling_volatility('CoinGecko', 'price', 60, day_start, day_end), repeat=5
+        )
+    }
+
+# ============================================================================
+# SEGMENT STORE
+# ============================================================================
+
+def bench_segment_store(points: int = 5_000_000, segment_records: int = 500_000) -> Dict[str, Any]:
+    """Persist `points` records, then time reopening and range reads"""
+    import numpy as np
+    from segment_store import SegmentedSeries
+
+    features = ['price', 'volume', 'market_cap', 'volatility']
+    timestamps = np.arange(points, dtype=np.int64) * 1000
+    values = {feature: np.random.default_rng(0).random(points) for feature in features}
+    with tempfile.TemporaryDirectory() as tmp:
+        series = SegmentedSeries(tmp, features, segment_records=segment_records, compact_threshold=4)
+        start = time.perf_counter()
+        for lo in range(0, points, 100_000):
+            series.extend(timestamps[lo:lo + 100_000], {k: v[lo:lo + 100_000] for k, v in values.items()})
+        series.close()
+        write_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reopened = SegmentedSeries(tmp, features, segment_records=segment_records)
+        count = len(reopened)
+        reopen_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        window = reopened.range(1_000_000_000, 1_086_400_000)
+        mean = float(window['price'].mean())
+        range_ms = (time.perf_counter() - start) * 1000
+        segments = len(reopened.index['sealed']) + 1
+        reopened.close()
+
+    return {
+        'points': count,
+        'segments': segments,
+        'write_points_per_sec': round(points / write_s),
+        'reopen_ms': round(reopen_ms, 3),
+        'range_86k_points_ms': round(range_ms, 3),
+        'range_mean_price': round(mean, 4)
+    }
+
+# ============================================================================
+# IN-PROCESS ASGI DRIVER
+# ============================================================================
+
+async def asgi_request(
+    app: Any,
+    method: str,
+    path: str,
+    headers: Dict[str, str] = None,
+    body: bytes = b'',
+    client: str = '127.0.0.1'
+) -> Dict[str, Any]:
+    """Send one HTTP request straight into an ASGI app, without sockets"""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+        'client': (client, 50000),
+        'server': ('testserver', 80)
+    }
+    sent = False
+    response: Dict[str, Any] = {'status': None, 'headers': [], 'body': b''}
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.Event().wait()
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = message.get('headers', [])
+        elif message['type'] == 'http.response.body':
+            response['body'] += message.get('body', b'')
+
+    await app(scope, receive, send)
+    return response
+
+async def _requests_per_sec(app: Any, path: str, requests: int, headers: Dict[str, str] = None) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        await asgi_request(app, 'GET', path, headers)
+    return round(requests / (time.perf_counter() - start))
+
+# ============================================================================
+# API MICRO-BENCHMARKS AND LOAD GENERATOR
+# ============================================================================
+
+API_ENDPOINTS = [
+    ('GET', '/health'),
+    ('GET', '/api/v2/status'),
+    ('POST', '/api/v2/analyze?query=bitcoin+outlook'),
+    ('GET', '/api/v2/fetch-data/crypto'),
+    ('GET', '/api/v2/improvements'),
+    ('GET', '/api/v2/new-features'),
+    ('GET', '/api/v2/training-metrics'),
+    ('GET', '/api/v2/consciousness'),
+    ('GET', '/api/v4/status'),
+    ('GET', '/api/v4/ollama-models'),
+    ('GET', '/api/v4/consciousness')
+]
+
+@asynccontextmanager
+async def offline_lifespan(app: Any, points: int = 100) -> AsyncIterator[Any]:
+    """Run `app`'s lifespan with the upstream data providers served by a local FakeProviderServer
+
+    The consciousness and the shared training engine are pointed at the fake
+    server, so /api/v2/fetch-data/* and v2 training jobs never reach the real
+    providers.
+    """
+    import ai_training_engine
+    import main
+    from fake_providers import FakeProviderServer
+    from http_pool import ProviderPool
+
+    # Responses cached from earlier upstreams would hide the fake ones
+    main._singletons.pop('response_cache', None)
+    async with FakeProviderServer(points=points, fields=_source_fields()) as server:
+        async with app.router.lifespan_context(app):
+            consciousness = main.get_enhanced_consciousness()
+            await consciousness.providers.close()
+            consciousness.providers = ProviderPool(server.provider_configs())
+            # Jobs run on their own event loops, so the engine opens a pool per gather from these configs
+            ai_training_engine.close_shared_engine()
+            ai_training_engine._singletons['engine'] = ai_training_engine.AITrainingEngine(provider_configs=server.provider_configs())
+            yield server
+        # Its pool points at the fake server, which stops next
+        main._singletons.pop('consciousness', None)
+
+def bench_check_rate_limit(requests: int = 100_000, clients: int = 1000) -> Dict[str, Any]:
+    """Checks/sec through the API's RateLimiter (in-process backend)"""
+    from main import RateLimiter
+
+    async def run() -> Dict[str, Any]:
+        limiter = RateLimiter(requests_per_minute=10**9, max_clients=clients)
+        client_ids = [f"client-{i}" for i in range(clients)]
+        check = limiter.check_rate_limit
+        start = time.perf_counter()
+        for i in range(requests):
+            await check(client_ids[i % clients])
+        elapsed = time.perf_counter() - start
+        await _check_route_rate_limit()
+        return {'checks_per_sec': round(requests / elapsed), 'check_us': round(elapsed / requests * 1e6, 3)}
+
+    return asyncio.run(run())
+
+async def _check_route_rate_limit(quota: int = 3) -> None:
+    """The v2 routes enforce each client's quota; /health is exempt"""
+    import main
+    from main import RateLimiter
+
+    previous = main._singletons.get('rate_limiter')
+    had_consciousness = 'consciousness' in main._singletons
+    main._singletons['rate_limiter'] = RateLimiter(requests_per_minute=quota)
+    try:
+        statuses = [(await asgi_request(main.app, 'GET', '/api/v2/improvements'))['status'] for _ in range(quota + 1)]
+        check(statuses == [200] * quota + [429], f"a client over its quota of {quota} got {statuses}")
+        rejected = await asgi_request(main.app, 'GET', '/api/v2/consciousness')
+        check(dict(rejected['headers']).get(b'retry-after') == b'20', f"429 without the expected Retry-After: {rejected['headers']}")
+        other = await asgi_request(main.app, 'GET', '/api/v2/improvements', client='10.0.0.2')
+        check(other['status'] == 200, f"another client was refused with {other['status']}")
+        health = await asgi_request(main.app, 'GET', '/health')
+        check(health['status'] == 200, f"/health was refused with {health['status']}")
+    finally:
+        main._singletons.pop('rate_limiter')
+        if previous is not None:
+            main._singletons['rate_limiter'] = previous
+        if not had_consciousness and 'consciousness' in main._singletons:
+            # Created by /health outside any lifespan
+            consciousness = main._singletons.pop('consciousness')
+            await consciousness.providers.close()
+            await consciousness.router.close()
+
+def bench_response_cache(keys: int = 10_000, lookups: int = 200_000) -> Dict[str, Any]:
+    """Hit and miss throughput of the async response cache per eviction policy"""
+    from response_cache import EVICTION_POLICIES, AsyncResponseCache, make_cache_key
+
+    payload = {'analysis': 'x' * 200, 'score': 92.5}
+    cache_keys = [make_cache_key('analyze', f"query {i}") for i in range(keys)]
+
+    async def fetch() -> Dict[str, Any]:
+        return payload
+
+    async def run() -> Dict[str, Any]:
+        results = {}
+        for policy in EVICTION_POLICIES:
+            cache = AsyncResponseCache(max_entries=keys // 2, max_bytes=1 << 30, ttl=3600, policy=policy)
+            start = time.perf_counter()
+            for key in cache_keys:
+                await cache.get_or_fetch(key, fetch)
+            miss_s = time.perf_counter() - start
+            hot = cache_keys[-keys // 4:]
+            start = time.perf_counter()
+            for i in range(lookups):
+                await cache.get_or_fetch(hot[i % len(hot)], fetch)
+            hit_s = time.perf_counter() - start
+            results[policy] = {
+                'misses_per_sec': round(keys / miss_s),
+                'hits_per_sec': round(lookups / hit_s),
+                'hit_us': round(hit_s / lookups * 1e6, 3),
+                'evictions': cache.stats()['evictions']
+            }
+        return results
+
+    return asyncio.run(run())
+
+def bench_serialization(repeat: int = 2000) -> Dict[str, Any]:
+    """Per-endpoint JSON encoding cost: FastAPI's default path vs the snapshot encoder"""
+    from fastapi.encoders import jsonable_encoder
+    from app_factory import create_app
+    from response_snapshots import dumps
+
+    def fastapi_render(payload: Any) -> bytes:
+        return json.dumps(
+            jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')
+        ).encode()
+
+    def timed_us(func: Callable[[], Any]) -> float:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return round((time.perf_counter() - start) / repeat * 1e6, 3)
+
+    async def run() -> Dict[str, Any]:
+        app = create_app()
+        results = {}
+        async with offline_lifespan(app):
+            for method, path in API_ENDPOINTS:
+                payload = json.loads((await asgi_request(app, method, path))['body'])
+                results[f"{method} {path}"] = {
+                    'bytes': len(fastapi_render(payload)),
+                    'fastapi_encode_us': timed_us(lambda: fastapi_render(payload)),
+                    'snapshot_encode_us': timed_us(lambda: dumps(payload))
+                }
+        return results
+
+    return asyncio.run(run())
+
+def _latency_summary(samples: List[float]) -> Dict[str, Any]:
+    return {'requests': len(samples), **_percentiles(samples)} if samples else {'requests': 0}
+
+async def load_test(
+    app: Any,
+    endpoints: List[Tuple[str, str]],
+    rps: float,
+    duration: float,
+    max_inflight: int = 2000
+) -> Dict[str, Any]:
+    """Drive `app` open-loop at `rps` for `duration` seconds, cycling through `endpoints`
+
+    Requests are released on a fixed schedule whatever the app's response
+    time, and latency is measured from each request's scheduled send time,
+    so a stalled app shows up as queueing delay instead of being hidden
+    (no coordinated omission). Requests that would exceed `max_inflight`
+    are dropped and counted.
+    """
+    latencies: Dict[str, List[float]] = {f"{method} {path}": [] for method, path in endpoints}
+    succeeded: Dict[str, List[float]] = {name: [] for name in latencies}
+    statuses: Dict[int, int] = {}
+    inflight: set = set()
+    dropped = 0
+
+    async def one(method: str, path: str, intended: float) -> None:
+        response = await asgi_request(app, method, path)
+        latency = time.perf_counter() - intended
+        latencies[f"{method} {path}"].append(latency)
+        if response['status'] < 400:
+            succeeded[f"{method} {path}"].append(latency)
+        statuses[response['status']] = statuses.get(response['status'], 0) + 1
+
+    total = int(rps * duration)
+    origin = time.perf_counter()
+    for i in range(total):
+        intended = origin + i / rps
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            dropped += 1
+            continue
+        method, path = endpoints[i % len(endpoints)]
+        task = asyncio.ensure_future(one(method, path, intended))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    if inflight:
+        await asyncio.gather(*inflight)
+    elapsed = time.perf_counter() - origin
+
+    completed = sum(len(samples) for samples in latencies.values())
+    errors = sum(count for status, count in statuses.items() if status >= 500)
+    groups: Dict[str, List[float]] = {}
+    for name, samples in latencies.items():
+        api = 'v4' if '/api/v4/' in name else 'v2'
+        groups.setdefault(api, []).extend(samples)
+    return {
+        'target_rps': rps,
+        'achieved_rps': round(completed / elapsed, 1),
+        'dropped': dropped,
+        'error_rate': round(errors / completed, 6) if completed else 0.0,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'overall': _latency_summary([sample for samples in latencies.values() for sample in samples]),
+        'apis': {api: _latency_summary(samples) for api, samples in sorted(groups.items())},
+        'endpoints': {name: _latency_summary(samples) for name, samples in latencies.items()},
+        'succeeded': {
+            'overall': _latency_summary([sample for samples in succeeded.values() for sample in samples]),
+            'endpoints': {name: _latency_summary(samples) for name, samples in succeeded.items()}
+        }
+    }
+
+def bench_load_test(rps: float = 400.0, duration: float = 5.0) -> Dict[str, Any]:
+    """Open-loop load test of the unified v2 + v4 app at `rps`"""
+    from app_factory import create_app
+
+    async def run() -> Dict[str, Any]:
+        app = create_app()
+        async with offline_lifespan(app) as server:
+            for method, path in API_ENDPOINTS:
+                await asgi_request(app, method, path)
+            result = await load_test(app, API_ENDPOINTS, rps, duration)
+        check(server.requests > 0, "no /api/v2/fetch-data request reached the fake providers")
+        return result
+
+    return asyncio.run(run())
+
+def bench_overload(rps: float = 500.0, duration: float = 5.0, capacity: int = 2, service_ms: float = 20.0) -> Dict[str, Any]:
+    """Open-loop overload of the unified app with and without admission control
+
+    /api/v2/analyze is served by a simulated upstream that handles
+    `capacity` requests at a time in `service_ms` each, so half of `rps`
+    going to it is several times what it can take. Without admission
+    control the backlog (and latency) grows for the whole run; with it,
+    excess requests are refused with 503 while admitted ones, /health and
+    the status reads stay fast.
+    """
+    from app_factory import create_app
+    import main
+
+    endpoints = [
+        ('POST', '/api/v2/analyze?query=bitcoin+outlook'),
+        ('GET', '/health'),
+        ('POST', '/api/v2/analyze?query=bitcoin+outlook'),
+        ('GET', '/api/v2/status')
+    ]
+
+    async def run(admission: bool) -> Dict[str, Any]:
+        os.environ['TESSERACT_ADMISSION'] = '1' if admission else '0'
+        app = create_app()
+        async with app.router.lifespan_context(app):
+            upstream = asyncio.Semaphore(capacity)
+
+            async def analyze(query: str) -> Dict[str, Any]:
+                async with upstream:
+                    await asyncio.sleep(service_ms / 1000)
+                return {'query': query}
+
+            main.get_enhanced_consciousness().analyze_with_all_ais = analyze
+            result = await load_test(app, endpoints, rps, duration)
+            if admission:
+                result['admission'] = app.state.admission.snapshot()
+        return result
+
+    _check_route_priorities()
+    logging.getLogger('main').setLevel(logging.WARNING)
+    previous = os.environ.get('TESSERACT_ADMISSION')
+    try:
+        results = {
+            'upstream_capacity_rps': round(capacity / service_ms * 1000),
+            'offered_analyze_rps': rps / 2
+        }
+        for mode, admission in (('unlimited', False), ('admission', True)):
+            result = asyncio.run(run(admission))
+            results[mode] = {
+                'statuses': result['statuses'],
+                'overall_p99_ms': result['overall'].get('p99_ms'),
+                'succeeded_p99_ms': result['succeeded']['overall'].get('p99_ms'),
+                'endpoints': {
+                    name: {key: summary.get(key) for key in ('requests', 'p50_ms', 'p99_ms')}
+                    for name, summary in result['succeeded']['endpoints'].items()
+                },
+                **({'admission': result['admission']} if admission else {})
+            }
+        return results
+    finally:
+        if previous is None:
+            os.environ.pop('TESSERACT_ADMISSION', None)
+        else:
+            os.environ['TESSERACT_ADMISSION'] = previous
+
+def _check_route_priorities() -> None:
+    """Streams bypass admission; their one-shot siblings keep their priority"""
+    from admission import HIGH, LOW, NORMAL, AdmissionController, AdmissionMiddleware
+
+    middleware = AdmissionMiddleware(None, AdmissionController())
+    expected = {
+        '/api/v2/analyze/stream': None,
+        '/api/v2/fetch-data/crypto/stream': None,
+        '/api/v2/status/stream': None,
+        '/api/v2/train/abc123/stream': None,
+        '/api/v2/analyze': LOW,
+        '/api/v2/analyze/ensemble': LOW,
+        '/api/v2/fetch-data/crypto': LOW,
+        '/api/v2/status': HIGH,
+        '/api/v2/improvements': NORMAL
+    }
+    for path, priority in expected.items():
+        route, actual = middleware.route(path)
+        check(actual == priority, f"{path} matched {route} with priority {actual}, expected {priority}")
+
+def bench_training_jobs(rps: float = 300.0, duration: float = 3.0) -> Dict[str, Any]:
+    """API latency under load while training jobs run back to back, vs idle"""
+    from ai_training_engine import AITrainingEngine, shared_engine
+    from app_factory import create_app
+    import main
+
+    async def run(tmp: str) -> Dict[str, Any]:
+        app = create_app()
+        async with offline_lifespan(app):
+            jobs = main.get_training_jobs()
+            history = main.get_run_history()
+            for method, path in API_ENDPOINTS:
+                await asgi_request(app, method, path)
+            idle = await load_test(app, API_ENDPOINTS, rps, duration)
+
+            async def keep_training() -> None:
+                while True:
+                    if jobs.stats()['jobs']['queued'] < jobs.max_workers:
+                        await jobs.submit('v2', force=True)
+                    await asyncio.sleep(0.001)
+
+            feeder = asyncio.ensure_future(keep_training())
+            busy = await load_test(app, API_ENDPOINTS, rps, duration)
+            feeder.cancel()
+            counts = jobs.stats()['jobs']
+            gathered = {source: len(series) for source, series in shared_engine().timeseries.sources.items()}
+            recorded, _ = history.query(limit=1000)
+        check(history.path.startswith(tmp), f"runs were recorded to {history.path}, outside the benchmark's directory")
+        check(len(recorded) > 0, "no succeeded training job was recorded in the run history")
+        check(counts['succeeded'] > 0 and counts['failed'] == 0, f"training jobs: {counts}")
+        check(
+            len(gathered) == len(AITrainingEngine.data_sources) and all(gathered.values()),
+            f"training jobs gathered {gathered} points from the fake providers"
+        )
+        return {
+            'idle': idle['overall'],
+            'training': busy['overall'],
+            'training_error_rate': busy['error_rate'],
+            'jobs_finished': counts['succeeded'],
+            'jobs_failed': counts['failed']
+        }
+
+    def reset() -> None:
+        """Drop the job queue and run history singletons so the next ones follow the environment"""
+        main._singletons.pop('training_jobs', None)
+        history = main._singletons.pop('run_history', None)
+        if history is not None:
+            history.close()
+
+    # Jobs and their run history go to a scratch directory, not the working tree
+    variables = {'TESSERACT_JOB_DIR': 'jobs', 'TESSERACT_RUN_HISTORY_DB': 'runs.db'}
+    previous = {name: os.environ.get(name) for name in variables}
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            for name, path in variables.items():
+                os.environ[name] = os.path.join(tmp, path)
+            reset()
+            return asyncio.run(run(tmp))
+        finally:
+            reset()
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+def _source_fields() -> List[str]:
+    """Every payload column the v2 engine reads, so the fake providers fill each feature"""
+    from ai_training_engine import AITrainingEngine
+    return sorted({
+        spec['fields'].get(feature, feature)
+        for spec in AITrainingEngine.data_sources.values()
+        for feature in spec['features']
+    })
+
+def bench_process_pool(
+    rows: int = 2_000_000,
+    lags: int = 32,
+    max_workers: Optional[int] = None,
+    repeat: int = 3,
+    training_points: int = 5_000
+) -> Dict[str, Any]:
+    """Chunked feature extraction scaling from 1 to N worker processes, vs in-process, and in a training run"""
+    import numpy as np
+    from ai_training_engine import AITrainingEngine
+    from fake_providers import FakeProviderServer
+    from http_pool import ProviderPool
+    from process_pool import ProcessPool
+    from timeseries_store import column_features, merge_column_features
+
+    rng = np.random.default_rng(7)
+    arrays = {
+        'price': np.cumprod(1 + rng.normal(0, 0.01, rows)) * 100,
+        'volume': rng.lognormal(10, 1, rows)
+    }
+    max_workers = max_workers or int(os.getenv('TESSERACT_PROCESS_WORKERS', '0')) or os.cpu_count() or 1
+    counts = sorted({1 << i for i in range(max_workers.bit_length()) if 1 << i <= max_workers} | {max_workers})
+
+    async def timed_ms(pool: ProcessPool) -> float:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            merge_column_features(await pool.map_chunks(column_features, arrays, rows, lags=lags))
+            samples.append(time.perf_counter() - start)
+        return min(samples) * 1000
+
+    async def run() -> Dict[str, Any]:
+        start = time.perf_counter()
+        merge_column_features([column_features(arrays, 0, rows, lags=lags)])
+        in_process_ms = (time.perf_counter() - start) * 1000
+        scaling = {}
+        for workers in counts:
+            with ProcessPool(max_workers=workers).start() as pool:
+                elapsed = await timed_ms(pool)
+                startup_ms = pool.stats['startup_ms']
+            speedup = in_process_ms / elapsed
+            scaling[str(workers)] = {
+                'ms': round(elapsed, 3),
+                'speedup': round(speedup, 2),
+                'efficiency': round(speedup / workers, 2),
+                'startup_ms': startup_ms
+            }
+        with ProcessPool(max_workers=max_workers, share_threshold=1 << 62).start() as pool:
+            pickled_ms = await timed_ms(pool)
+        return {
+            'rows': rows,
+            'input_bytes': sum(array.nbytes for array in arrays.values()),
+            'in_process_ms': round(in_process_ms, 3),
+            'workers': scaling,
+            'pickled_inputs_ms': round(pickled_ms, 3),
+            'training': await training()
+        }
+
+    async def training() -> Dict[str, Any]:
+        # Gathered sources big enough for the features stage to go to the workers
+        with ProcessPool(max_workers=max_workers, inline_rows=training_points // 2).start() as pool:
+            async with FakeProviderServer(points=training_points, fields=_source_fields()) as server:
+                async with ProviderPool(server.provider_configs()) as providers:
+                    engine = AITrainingEngine(process_pool=pool, providers=providers)
+                    start = time.perf_counter()
+                    result = await engine.train_complete(force=True)
+                    elapsed = time.perf_counter() - start
+                    engine.close()
+            calls = pool.stats['calls']
+        statistics = result['feature_statistics']
+        check(
+            all(source['points'] == training_points for source in statistics.values()),
+            f"features stage saw {[source['points'] for source in statistics.values()]} points, expected {training_points}"
+        )
+        check(calls == len(statistics), f"features stage made {calls} worker calls for {len(statistics)} sources")
+        price = engine.timeseries.series('CoinGecko').column('price')
+        expected = merge_column_features([column_features({'price': price}, 0, len(price))])['price']
+        actual = statistics['CoinGecko']['features']['price']
+        check(
+            actual['count'] == expected['count']
+            and np.isclose(actual['std'], expected['std'])
+            and np.allclose(actual['return_autocorrelation'], expected['return_autocorrelation']),
+            "features computed on the workers differ from the in-process result"
+        )
+        return {'points_per_source': training_points, 'worker_calls': calls, 'run_ms': round(elapsed * 1000, 3)}
+
+    return asyncio.run(run())
+
+def bench_soak(
+    requests: int = 1_000_000,
+    runs: int = 1_000_000,
+    max_clients: int = 100_000,
+    checkpoints: int = 10,
+    spill_runs: int = 20_000,
+    max_rss_growth_mb: float = 16.0
+) -> Dict[str, Any]:
+    """RSS over 1M rate-limited requests from distinct clients and 1M engine stage runs
+
+    Each phase first runs long enough to fill every bound and let the
+    allocator settle (the client table turns over ten times), then samples
+    RSS at `checkpoints` points across the measured iterations. A last,
+    shorter phase spills every evicted stage output to disk.
+    """
+    from ai_training_engine import AITrainingEngine
+    from bounded_history import rss_bytes
+    from main import RateLimiter
+
+    async def soak(step: Callable[[int], Awaitable[Any]], warmup: int, count: int) -> Dict[str, Any]:
+        for i in range(warmup):
+            await step(i)
+        samples = []
+        start = time.perf_counter()
+        for i in range(warmup, warmup + count):
+            await step(i)
+            if (i - warmup + 1) % max(1, count // checkpoints) == 0:
+                samples.append(round(rss_bytes() / 1e6, 2))
+        return {
+            'per_sec': round(count / (time.perf_counter() - start)),
+            'rss_mb': samples,
+            'rss_growth_mb': round(max(samples) - samples[0], 2)
+        }
+
+    def check_history(name: str, history: Any, appended: int) -> None:
+        stats = history.stats()
+        check(stats['appended'] == appended, f"{name}: {stats['appended']} appends counted, {appended} made")
+        check(stats['entries'] == history.max_entries, f"{name}: {stats['entries']} entries kept, bound is {history.max_entries}")
+        check(stats['evicted'] == appended - history.max_entries, f"{name}: {stats['evicted']} evicted of {appended - history.max_entries}")
+
+    async def run() -> Dict[str, Any]:
+        logging.getLogger('ai_training_engine').setLevel(logging.WARNING)
+        _check_history_retention()
+        limiter = RateLimiter(requests_per_minute=60, max_clients=max_clients)
+        limiter_results = {
+            **await soak(lambda i: limiter.check_rate_limit(f"client-{i}"), 10 * max_clients, requests),
+            'clients': len(limiter.backend.engine),
+            'table_bytes': limiter.nbytes()
+        }
+        check(limiter_results['clients'] <= max_clients, f"limiter holds {limiter_results['clients']} clients, bound is {max_clients}")
+        check(limiter_results['rss_growth_mb'] <= max_rss_growth_mb, f"limiter RSS grew {limiter_results['rss_growth_mb']}MB")
+
+        engine = AITrainingEngine(history_entries=100)
+        warmup = 10 * engine.history_entries
+        engine_results = {
+            **await soak(lambda i: engine.train_with_ai_models(), warmup, runs),
+            'retained': len(engine.ai_insights),
+            'history_bytes': engine.memory_usage()['total_bytes']
+        }
+        engine.close()
+        check_history('ai_insights', engine.ai_insights, warmup + runs)
+        check(engine_results['rss_growth_mb'] <= max_rss_growth_mb, f"engine RSS grew {engine_results['rss_growth_mb']}MB")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = AITrainingEngine(history_entries=100, history_dir=tmp)
+            spill_results = {
+                **await soak(lambda i: engine.train_with_ai_models(), warmup, spill_runs),
+                'history_bytes': engine.memory_usage()['total_bytes']
+            }
+            history = engine.ai_insights
+            spill_results['spilled'] = history.stats()['spilled']
+            check_history('ai_insights (spilling)', history, warmup + spill_runs)
+            check(
+                spill_results['spilled'] == history.stats()['evicted'],
+                f"{spill_results['spilled']} documents spilled of {history.stats()['evicted']} evicted"
+            )
+            check(spill_results['history_bytes'] == engine_results['history_bytes'], "spilling changed the bytes held in memory")
+            engine.close()
+        return {'rate_limiter': limiter_results, 'engine_history': engine_results, 'engine_history_spilled': spill_results}
+
+    return asyncio.run(run())
+
+def _check_history_retention() -> None:
+    """Count and age bounds of BoundedHistory under a fake clock"""
+    from bounded_history import BoundedHistory
+
+    now = [0.0]
+    history = BoundedHistory(max_entries=3, max_age=10.0, clock=lambda: now[0])
+    for i in range(5):
+        history.append({'run': i})
+        now[0] += 1.0
+    check(list(history) == [{'run': 2}, {'run': 3}, {'run': 4}], f"count bound kept {list(history)}")
+    now[0] = 13.5
+    check(list(history) == [{'run': 4}], f"age bound kept {list(history)}")
+    now[0] = 100.0
+    check(len(history) == 0 and history.nbytes() == 0, f"expired history still holds {history.nbytes()} bytes")
+    check(history.stats()['evicted'] == 5, f"{history.stats()['evicted']} of 5 documents evicted")
+
+def bench_training(repeat: int = 3) -> Dict[str, Any]:
+    """Cold (forced) and artifact-cached run times of the training engines, with source data from the fake providers"""
+    from ai_training_engine import AITrainingEngine
+    from fake_providers import FakeProviderServer
+    from http_pool import ProviderPool
+    from training_engine_v3 import TrainingEngineV3
+
+    async def timed_ms(run: Callable[[], Awaitable[Any]]) -> float:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await run()
+            samples.append(time.perf_counter() - start)
+        return round(min(samples) * 1000, 3)
+
+    async def run() -> Dict[str, Any]:
+        with tempfile.TemporaryDirectory() as tmp:
+            server = await FakeProviderServer(fields=_source_fields()).start()
+            pool = ProviderPool(server.provider_configs())
+            engine = AITrainingEngine(artifact_dir=os.path.join(tmp, 'v2'), providers=pool)
+            v3 = TrainingEngineV3(artifact_dir=os.path.join(tmp, 'v3'))
+            results = {
+                'ai_training_engine': {
+                    'cold_ms': await timed_ms(lambda: engine.train_complete(force=True)),
+                    'cached_ms': await timed_ms(lambda: engine.train_complete())
+                },
+                'training_engine_v3': {
+                    'cold_ms': await timed_ms(lambda: v3.train(force=True)),
+                    'cached_ms': await timed_ms(lambda: v3.train())
+                }
+            }
+            statistics = (await engine.train_complete())['feature_statistics']
+            check(
+                all(source['points'] == server.points for source in statistics.values()),
+                "features stage did not see the gathered points"
+            )
+            cold, cached = await v3.train(force=True), await v3.train()
+            check(cached['manifest']['cache_hits'] == ['v3_training'], f"v3 rerun was not served from cache: {cached['manifest']}")
+            check(cached['timestamp'] > cold['timestamp'], "a cached v3 run replayed the earlier run's timestamp")
+            engine.close()
+            await pool.close()
+            await server.stop()
+        return results
+
+    return asyncio.run(run())
+
+# ============================================================================
+# RESULT FORMAT
+# ============================================================================
+
+def bench_result_format(runs: int = 10_000, lookups: int = 1000) -> Dict[str, Any]:
+    """File size and load time of `runs` stored training results as JSON vs. the binary format"""
+    import random
+    from advanced_training import AdvancedTrainer
+    from result_format import ResultFile, write_results
+
+    template = AdvancedTrainer().train()
+    results = []
+    for i in range(runs):
+        result = json.loads(json.dumps(template))
+        result['timestamp'] = f"2026-01-01T00:00:{i % 60:02d}.{i:06d}"
+        result['run'] = i
+        results.append(result)
+
+    def best_ms(run: Callable[[], Any], repeat: int = 3) -> float:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+        return round(min(samples) * 1000, 3)
+
+    def lazy_scan(path: str) -> None:
+        with ResultFile(path) as stored:
+            for result in stored:
+                result['timestamp']
+
+    def random_access(path: str) -> None:
+        with ResultFile(path) as stored:
+            for position in positions:
+                stored[position]['timestamp']
+
+    def full_decode(path: str) -> None:
+        with ResultFile(path) as stored:
+            stored.to_python()
+
+    positions = [random.randrange(runs) for _ in range(lookups)]
+    with tempfile.TemporaryDirectory() as tmp:
+        pretty, compact, binary = (os.path.join(tmp, name) for name in ('pretty.json', 'compact.json', 'results.tres'))
+        with open(pretty, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        with open(compact, 'w') as handle:
+            json.dump(results, handle, separators=(',', ':'))
+        write_ms = best_ms(lambda: write_results(binary, results), repeat=1)
+
+        def json_load(path: str) -> None:
+            with open(path) as handle:
+                json.load(handle)
+
+        return {
+            'runs': runs,
+            'size_bytes': {
+                'json_pretty': os.path.getsize(pretty),
+                'json_compact': os.path.getsize(compact),
+                'binary': os.path.getsize(binary)
+            },
+            'binary_write_ms': write_ms,
+            'json_pretty_load_ms': best_ms(lambda: json_load(pretty)),
+            'json_compact_load_ms': best_ms(lambda: json_load(compact)),
+            'binary_open_ms': best_ms(lambda: ResultFile(binary).close()),
+            'binary_one_field_every_run_ms': best_ms(lambda: lazy_scan(binary)),
+            f'binary_{lookups}_random_runs_ms': best_ms(lambda: random_access(binary)),
+            'binary_full_decode_ms': best_ms(lambda: full_decode(binary))
+        }
+
+# ============================================================================
+# STATUS HUB
+# ============================================================================
+
+def bench_status_hub(subscribers: int = 5000, ticks: int = 50, interval: float = 0.05, slow_fraction: float = 0.02) -> Dict[str, Any]:
+    """Per-tick fan-out cost of the status hub with `subscribers` in-process subscribers vs. each of them polling
+
+    A `slow_fraction` of the subscribers read one frame per 10 ticks, so
+    they overrun their queues and exercise the drop policy. A sample of
+    subscribers rebuilds the document from snapshots and patches to check
+    that deltas reproduce it exactly.
+    """
+    import main
+    from response_snapshots import dumps
+    from status_hub import DROP_POLICIES, StatusHub, apply_patch
+
+    async def consume(subscriber, slow: bool, verify: bool, replica: Dict[str, Any], received: List[int]) -> None:
+        async for frame in subscriber.frames():
+            received[0] += 1
+            received[1] += len(frame.text)
+            if verify:
+                message = json.loads(frame.text)
+                if message['type'] == 'snapshot':
+                    replica['document'] = message['data']
+                else:
+                    apply_patch(replica['document'], message['ops'])
+            if slow:
+                await asyncio.sleep(interval * 10)
+
+    async def run(policy: str) -> Dict[str, Any]:
+        consciousness = main.get_enhanced_consciousness()
+        hub = StatusHub(interval=interval, max_queue=8, policy=policy)
+        topic = hub.register('status', consciousness.get_enhanced_status)
+        received = [0, 0]
+        replicas = [{} for _ in range(50)]
+        members = [hub.subscribe(['status']) for _ in range(subscribers)]
+        # Drive the ticks here so they can be timed one by one
+        topic.task.cancel()
+        topic.task = None
+        slow_every = max(1, round(1 / slow_fraction)) if slow_fraction else 0
+        slow = [bool(slow_every) and i % slow_every == slow_every - 1 for i in range(subscribers)]
+        checked = [i for i in range(subscribers) if not slow[i]][:len(replicas)]
+        verify = dict(zip(checked, replicas))
+        consumers = [
+            asyncio.ensure_future(consume(member, slow[i], i in verify, verify.get(i, {}), received))
+            for i, member in enumerate(members)
+        ]
+        samples = []
+        for _ in range(ticks):
+            start = time.perf_counter()
+            await topic.tick()
+            samples.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(interval)
+
+        poll_start = time.perf_counter()
+        for _ in range(min(subscribers, 500)):
+            dumps({'status': 'success', 'system': await consciousness.get_enhanced_status()})
+        poll_ms = (time.perf_counter() - poll_start) * 1000 * subscribers / min(subscribers, 500)
+
+        # Let the fast subscribers drain before checking their replicas
+        await asyncio.sleep(interval * 2)
+        verified = sum(replica.get('document') == topic.document for replica in verify.values())
+        results = {
+            'tick_p50_ms': round(sorted(samples)[len(samples) // 2], 3),
+            'tick_max_ms': round(max(samples), 3),
+            'poll_equivalent_ms': round(poll_ms, 3),
+            'snapshot_bytes': topic.stats['snapshot_bytes'],
+            'mean_patch_bytes': round(topic.stats['patch_bytes'] / max(topic.stats['patches'], 1), 1),
+            'frames_delivered': received[0],
+            'bytes_delivered': received[1],
+            'resyncs': sum(member.resyncs for member in members),
+            'dropped_frames': sum(member.dropped for member in members),
+            'evicted': sum(member.evicted for member in members),
+            'replicas_verified': f"{verified}/{len(verify)}"
+        }
+        for member in members:
+            hub.unsubscribe(member)
+        await asyncio.gather(*consumers, return_exceptions=True)
+        await hub.close()
+        return results
+
+    async def main_run() -> Dict[str, Any]:
+        results = {'subscribers': subscribers, 'ticks': ticks}
+        for policy in DROP_POLICIES:
+            results[policy] = await run(policy)
+        consciousness = main._singletons.pop('consciousness', None)
+        if consciousness is not None:
+            await consciousness.providers.close()
+            await consciousness.router.close()
+        return results
+
+    logging.getLogger('main').setLevel(logging.WARNING)
+    return asyncio.run(main_run())
+
+# ============================================================================
+# RUN HISTORY
+# ============================================================================
+
+def bench_run_history(runs: int = 100_000, page: int = 50) -> Dict[str, Any]:
+    """Record rate and query latency of the run history at `runs` stored runs, keyset vs. OFFSET paging"""
+    from ai_training_engine import AITrainingEngine
+    from fake_providers import FakeProviderServer
+    from http_pool import ProviderPool
+    from run_history import RunHistory
+
+    async def train(artifact_dir: str) -> Dict[str, Any]:
+        async with FakeProviderServer() as server:
+            async with ProviderPool(server.provider_configs()) as pool:
+                engine = AITrainingEngine(artifact_dir=artifact_dir, providers=pool)
+                try:
+                    return await engine.train_complete()
+                finally:
+                    engine.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = asyncio.run(train(os.path.join(tmp, 'artifacts')))
+        history = RunHistory(os.path.join(tmp, 'runs.db'))
+        start = time.perf_counter()
+        for i in range(runs):
+            result = dict(template, timestamp=f"2026-{1 + i * 12 // runs:02d}-01T00:00:00.{i:06d}")
+            result['training_metrics'] = dict(template['training_metrics'], ai_analysis_score=80 + i % 20)
+            history.record(result, trainer='v2')
+        record_seconds = time.perf_counter() - start
+
+        def best_ms(run: Callable[[], Any], repeat: int = 5) -> float:
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                samples.append(time.perf_counter() - start)
+            return round(min(samples) * 1000, 3)
+
+        # Walk to the last page once to get its cursor
+        cursor, pages = None, 0
+        while True:
+            _, next_cursor = history.query(cursor=cursor, limit=page)
+            pages += 1
+            if next_cursor is None:
+                break
+            cursor = next_cursor
+        deep_offset = (pages - 1) * page
+
+        def offset_page() -> None:
+            with history._lock:
+                history._conn.execute(
+                    'SELECT id, trainer, version, timestamp, source FROM runs '
+                    'ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?', (page, deep_offset)
+                ).fetchall()
+
+        results = {
+            'runs': runs,
+            'record_per_sec': round(runs / record_seconds),
+            'db_bytes': os.path.getsize(history.path),
+            'first_page_ms': best_ms(lambda: history.query(limit=page)),
+            'last_page_keyset_ms': best_ms(lambda: history.query(cursor=cursor, limit=page)),
+            'last_page_offset_ms': best_ms(offset_page),
+            'version_range_page_ms': best_ms(lambda: history.query(version='2.0', since='2026-06', until='2026-07', limit=page)),
+            'metric_filter_page_ms': best_ms(lambda: history.query(metric='training_metrics.ai_analysis_score', min_value=99, limit=page)),
+            'trend_month_ms': best_ms(lambda: history.trend('training_metrics.ai_analysis_score', bucket='month')),
+            'diff_ms': best_ms(lambda: history.diff(1, runs))
+        }
+        history.close()
+        return results
+
+# ============================================================================
+# RESPONSE SNAPSHOTS
+# ============================================================================
+
+def bench_snapshots(requests: int = 3000) -> Dict[str, Any]:
+    """Requests/sec of the static endpoints rebuilt per request vs. served from snapshots"""
+    from fastapi import FastAPI
+    import main
+    import main_v4
+
+    endpoints = {
+        '/api/v2/improvements': (main.app, main.build_improvements),
+        '/api/v2/new-features': (main.app, main.build_new_features),
+        '/api/v2/training-metrics': (main.app, main.build_training_metrics),
+        '/api/v4/status': (main_v4.app, main_v4.build_status),
+        '/api/v4/ollama-models': (main_v4.app, main_v4.build_ollama_models)
+    }
+    rebuilt = FastAPI()
+    for path, (_, builder) in endpoints.items():
+        rebuilt.add_api_route(path, (lambda builder: lambda: builder())(builder), methods=['GET'])
+
+    async def run() -> Dict[str, Any]:
+        results = {}
+        for path, (app, _) in endpoints.items():
+            first = await asgi_request(app, 'GET', path)
+            etag = dict(first['headers'])[b'etag'].decode()
+            results[path] = {
+                'rebuilt_rps': await _requests_per_sec(rebuilt, path, requests),
+                'snapshot_rps': await _requests_per_sec(app, path, requests),
+                'snapshot_gzip_rps': await _requests_per_sec(app, path, requests, {'Accept-Encoding': 'gzip'}),
+                'not_modified_rps': await _requests_per_sec(app, path, requests, {'If-None-Match': etag})
+            }
+        return results
+
+    return asyncio.run(run())
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+
+def bench_instrumentation(requests: int = 50_000) -> Dict[str, Any]:
+    """Per-request cost of the metrics middleware and spans on a bare ASGI app"""
+    from instrumentation import LatencyHistogram, Metrics, MetricsMiddleware
+
+    class Route:
+        path = '/bench'
+
+    current = {'registry': Metrics(span_sample_rate=0)}
+
+    async def bare(scope, receive, send) -> None:
+        scope['route'] = Route
+        with current['registry'].span('handler'):
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b'{}'})
+
+    async def per_request_us(app: Any) -> float:
+        for _ in range(1000):
+            await asgi_request(app, 'GET', '/bench')
+        start = time.perf_counter()
+        for _ in range(requests):
+            await asgi_request(app, 'GET', '/bench')
+        return (time.perf_counter() - start) / requests * 1e6
+
+    async def run() -> Dict[str, Any]:
+        results = {}
+        baseline = await per_request_us(bare)
+        for rate in (0.0, 0.1, 1.0):
+            registry = current['registry'] = Metrics(span_sample_rate=rate)
+            cost = await per_request_us(MetricsMiddleware(bare, registry)) - baseline
+            results[f'middleware_overhead_us_sampled_{rate:g}'] = round(cost, 3)
+        histogram = LatencyHistogram()
+        start = time.perf_counter()
+        for i in range(requests):
+            histogram.record_ns(i * 997)
+        results['histogram_record_ns'] = round((time.perf_counter() - start) / requests * 1e9, 1)
+        results['baseline_request_us'] = round(baseline, 3)
+        return results
+
+    return asyncio.run(run())
+
+# ============================================================================
+# INFERENCE GATEWAY
+# ============================================================================
+
+def bench_inference_gateway(requests: int = 48, models: int = 3, concurrency: int = 48) -> Dict[str, Any]:
+    """Direct per-request calls vs the micro-batching gateway on a fake Ollama server
+
+    The server holds one model at a time, so interleaved requests for
+    different models force a reload whenever consecutive requests disagree.
+    """
+    import aiohttp
+    from fake_providers import FakeOllamaServer
+    from inference_gateway import InferenceGateway
+
+    names = [f"model-{i}" for i in range(models)]
+
+    async def direct(url: str, model: str, prompt: str, session: aiohttp.ClientSession) -> None:
+        async with session.post(f"{url}/api/generate", json={'model': model, 'prompt': prompt}) as response:
+            async for _ in response.content:
+                pass
+
+    async def measure(call: Callable[[str, str], Any], model_count: int) -> Dict[str, Any]:
+        samples = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                await call(names[i % model_count], f"prompt {i}")
+                samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return {'requests_per_sec': round(requests / (time.perf_counter() - start), 1), **_percentiles(samples)}
+
+    async def scenario(model_count: int) -> Dict[str, Any]:
+        results = {}
+        async with FakeOllamaServer(names, max_loaded_models=1, num_parallel=4, load_latency=0.03) as server:
+            async with aiohttp.ClientSession() as session:
+                results['direct'] = await measure(lambda m, p: direct(server.url, m, p, session), model_count)
+            results['direct']['server_loads'] = server.loads
+        async with FakeOllamaServer(names, max_loaded_models=1, num_parallel=4, load_latency=0.03) as server:
+            async with InferenceGateway(server.url, max_concurrency=4, max_resident_models=1) as gateway:
+                results['gateway'] = await measure(gateway.generate, model_count)
+                stats = gateway.stats()
+            results['gateway']['server_loads'] = server.loads
+            results['gateway']['mean_batch_size'] = round(
+                sum(lane['requests'] for lane in stats['models'].values())
+                / max(1, sum(lane['batches'] for lane in stats['models'].values())), 2
+            )
+            lanes = stats['models'].values()
+            check(
+                sum(lane['requests'] for lane in lanes) == requests and not any(lane['failures'] for lane in lanes),
+                f"gateway served {sum(lane['requests'] for lane in lanes)} of {requests} requests"
+            )
+            check(
+                sum(lane['tokens'] for lane in lanes) == requests * server.tokens,
+                f"gateway streamed {sum(lane['tokens'] for lane in lanes)} tokens, expected {requests * server.tokens}"
+            )
+            check(stats['loads'] == server.loads, f"gateway counted {stats['loads']} loads, server {server.loads}")
+        return results
+
+    async def run() -> Dict[str, Any]:
+        await _check_model_residency()
+        results = {
+            f'{models}_models_interleaved': await scenario(models),
+            'single_model': await scenario(1)
+        }
+        interleaved, single = results[f'{models}_models_interleaved'], results['single_model']
+        check(
+            interleaved['gateway']['server_loads'] < interleaved['direct']['server_loads'],
+            f"batching by model did not cut reloads ({interleaved['gateway']['server_loads']} vs "
+            f"{interleaved['direct']['server_loads']} direct)"
+        )
+        check(single['gateway']['mean_batch_size'] > 1, "concurrent prompts for one model were not batched")
+        check(single['gateway']['server_loads'] == 1, f"one hot model was loaded {single['gateway']['server_loads']} times")
+        return results
+
+    return asyncio.run(run())
+
+async def _check_model_residency() -> None:
+    """LRU eviction through unload, pinned models never evicted, waiters admitted in order"""
+    from inference_gateway import ModelResidency
+
+    unloaded = []
+
+    async def unload(model: str) -> None:
+        unloaded.append(model)
+
+    residency = ModelResidency(2, unload)
+    for model in ('a', 'b'):
+        await residency.acquire(model)
+        await residency.release(model)
+    await residency.acquire('a')
+    await residency.release('a')
+    await residency.acquire('c')
+    check(unloaded == ['b'] and residency.resident() == ['a', 'c'], f"LRU evicted {unloaded}, resident {residency.resident()}")
+
+    # Both residents pinned: a third model waits instead of evicting one
+    await residency.acquire('a')
+    waiter = asyncio.ensure_future(residency.acquire('d'))
+    await asyncio.sleep(0.01)
+    check(not waiter.done(), "a model was loaded while every resident was pinned")
+    await residency.release('c')
+    await asyncio.wait_for(waiter, 1.0)
+    check(unloaded == ['b', 'c'] and residency.resident() == ['a', 'd'], f"pinned eviction: unloaded {unloaded}")
+    check(residency.loads == 4 and residency.evictions == 2, f"{residency.loads} loads, {residency.evictions} evictions")
+
+# ============================================================================
+# ENSEMBLE ROUTER
+# ============================================================================
+
+def _synthetic_trace(requests: int, rate: float, seed: int = 0) -> List[Dict[str, Any]]:
+    """Poisson arrivals in the format the router records with `trace_path`"""
+    import random
+    rng = random.Random(seed)
+    offset, records = 0.0, []
+    for i in range(requests):
+        offset += rng.expovariate(rate)
+        records.append({'offset': round(offset, 6), 'query': f"query {i}"})
+    return records
+
+def bench_model_router(requests: int = 600, rate: float = 150.0, latency_slo: float = 0.04, quality_target: float = 0.9) -> Dict[str, Any]:
+    """Replay a request trace against mock models, comparing fixed ensembles with the router
+
+    Halfway through the trace the cheapest capable model degrades (6x latency,
+    50% failures). Set TESSERACT_ROUTER_TRACE to replay a recorded trace
+    instead of a synthetic one.
+    """
+    from fake_providers import MockAIProvider, lognormal_latency
+    from model_router import DEFAULT_MODEL_PROFILES, EnsembleRouter, ModelProfile, load_trace
+
+    scale = 0.02
+    trace_path = os.getenv('TESSERACT_ROUTER_TRACE')
+    if trace_path:
+        trace = load_trace(trace_path)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            trace_path = os.path.join(tmp, 'trace.jsonl')
+            with open(trace_path, 'w') as handle:
+                handle.writelines(json.dumps(record) + '\n' for record in _synthetic_trace(requests, rate))
+            trace = load_trace(trace_path)
+    profiles = {
+        name: ModelProfile(profile.cost, profile.quality, profile.latency * scale)
+        for name, profile in DEFAULT_MODEL_PROFILES.items()
+    }
+
+    def mock_models() -> Dict[str, MockAIProvider]:
+        return {
+            name: MockAIProvider(
+                name,
+                lognormal_latency(profile.latency * 0.6, sigma=0.3, tail=0.01, tail_latency=profile.latency * 3),
+                accuracy=profile.quality
+            )
+            for name, profile in profiles.items()
+        }
+
+    async def replay(pinned: Optional[List[str]], degrade: Optional[str]) -> Dict[str, Any]:
+        providers = mock_models()
+        router = EnsembleRouter(
+            list(providers.values()), profiles, latency_slo=latency_slo,
+            quality_target=quality_target, probe_after=0.5
+        )
+        samples, costs, correct = [], [], 0
+        halfway = trace[len(trace) // 2]['offset']
+
+        async def one(record: Dict[str, Any]) -> None:
+            nonlocal correct
+            await asyncio.sleep(max(0.0, record['offset'] - (time.perf_counter() - origin)))
+            if degrade and record['offset'] >= halfway and providers[degrade].failure_rate == 0:
+                providers[degrade].latency = lognormal_latency(profiles[degrade].latency * 6, sigma=0.3)
+                providers[degrade].failure_rate = 0.5
+            slo = record.get('latency_slo_ms', latency_slo * 1000) / 1000
+            result = await router.route(record['query'], slo, record.get('quality_target'), models=pinned)
+            samples.append(result['latency_ms'] / 1000)
+            costs.append(result['cost'])
+            correct += result['verdict'] == 'consistent'
+
+        origin = time.perf_counter()
+        await asyncio.gather(*(one(record) for record in trace))
+        await router.close()
+        return {
+            'requests': len(trace),
+            'cost_per_request': round(sum(costs) / len(costs), 3),
+            'accuracy': round(correct / len(trace), 4),
+            'slo_attainment': round(sum(sample <= latency_slo for sample in samples) / len(samples), 4),
+            **_percentiles(samples),
+            'fallbacks': router.stats['fallbacks'],
+            'ejections': sum(model.stats['ejections'] for model in router.models.values())
+        }
+
+    async def run() -> Dict[str, Any]:
+        plan = EnsembleRouter(list(mock_models().values()), profiles, latency_slo=latency_slo, quality_target=quality_target).plan()
+        degrade = min(plan.models, key=lambda model: model.profile.cost).name
+        return {
+            'initial_plan': plan.describe(),
+            'degraded_model': degrade,
+            'all_models': await replay(list(profiles), degrade),
+            'premium_single': await replay(['openai'], degrade),
+            'router': await replay(None, degrade)
+        }
+
+    return asyncio.run(run())
+
+# ============================================================================
+# SEMANTIC CACHE
+# ============================================================================
+
+def bench_semantic_cache(entries: int = 50_000, lookups: int = 2000) -> Dict[str, Any]:
+    """Paraphrase hit rate, false matches and IVF vs brute-force lookup cost"""
+    import random
+    import numpy as np
+    from semantic_cache import SemanticCache
+
+    rng = random.Random(0)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    queries = [' '.join(rng.sample(vocabulary, rng.randint(4, 8))) for _ in range(entries)]
+
+    def paraphrase(query: str) -> str:
+        words = query.split()
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+        return f"{rng.choice(['please', 'what is', 'tell me'])} {' '.join(words).upper()}?"
+
+    cache = SemanticCache(max_entries=entries, max_bytes=1 << 30)
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        cache.put(query, {'analysis': i})
+    insert_s = time.perf_counter() - start
+
+    targets = rng.sample(range(entries), lookups)
+    start = time.perf_counter()
+    hits = sum(
+        1 for i in targets
+        if (found := cache.lookup(paraphrase(queries[i]))) is not None and found[0]['analysis'] == i
+    )
+    lookup_s = time.perf_counter() - start
+    unrelated = [' '.join(rng.sample(vocabulary, rng.randint(4, 8))) for _ in range(lookups)]
+    false_matches = sum(cache.lookup(query) is not None for query in unrelated)
+
+    # Recall and cost of the IVF probe against an exhaustive scan of the same vectors
+    index = cache.index
+    probes = np.stack([cache.embedder.embed(paraphrase(queries[i])) for i in targets[:500]])
+    vectors, slots = index._all()
+    start = time.perf_counter()
+    exact = [int(slots[np.argmax(vectors @ probe)]) for probe in probes]
+    flat_s = time.perf_counter() - start
+    start = time.perf_counter()
+    approximate = [index.search(probe, 1)[0][0] for probe in probes]
+    ivf_s = time.perf_counter() - start
+
+    return {
+        'entries': entries,
+        'insert_per_sec': round(entries / insert_s),
+        'paraphrase_hit_rate': round(hits / lookups, 4),
+        'false_match_rate': round(false_matches / lookups, 4),
+        'lookup_us': round(lookup_s / lookups * 1e6, 1),
+        'ivf_recall_at_1': round(sum(a == b for a, b in zip(approximate, exact)) / len(exact), 4),
+        'flat_search_us': round(flat_s / len(probes) * 1e6, 1),
+        'ivf_search_us': round(ivf_s / len(probes) * 1e6, 1),
+        'bytes': cache.bytes,
+        'index': index.stats()
+    }
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+BENCHMARKS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    'rate_limiter': bench_rate_limiter,
+    'shared_rate_limiter': bench_shared_rate_limiter,
+    'http_pool': bench_http_pool,
+    'fanout': bench_fanout,
+    'timeseries': bench_timeseries,
+    'segment_store': bench_segment_store,
+    'check_rate_limit': bench_check_rate_limit,
+    'response_cache': bench_response_cache,
+    'serialization': bench_serialization,
+    'load_test': bench_load_test,
+    'overload': bench_overload,
+    'training': bench_training,
+    'training_jobs': bench_training_jobs,
+    'result_format': bench_result_format,
+    'run_history': bench_run_history,
+    'status_hub': bench_status_hub,
+    'process_pool': bench_process_pool,
+    'soak': bench_soak,
+    'snapshots': bench_snapshots,
+    'instrumentation': bench_instrumentation,
+    'inference_gateway': bench_inference_gateway,
+    'model_router': bench_model_router,
+    'semantic_cache': bench_semantic_cache
+}
+
+# Metric names (last key component) whose direction is known; anything else is informational
+HIGHER_IS_BETTER = ('per_sec', '_rps', 'hit_rate', 'speedup', 'recall_at_1', 'attainment', 'accuracy', 'reuse_ratio')
+LOWER_IS_BETTER = ('_ms', '_us', '_ns', 'error_rate', 'false_match_rate', 'dropped')
+# A tail percentile of fewer samples than this is mostly scheduler noise
+MIN_PERCENTILE_SAMPLES = {'p95_ms': 200, 'p99_ms': 1000}
+# Millisecond timings closer than this are within event-loop jitter
+MIN_DELTA_MS = 1.0
+
+def _flatten(results: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def metric_direction(name: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if not compared"""
+    leaf = name.rsplit('.', 1)[-1]
+    if leaf.endswith(HIGHER_IS_BETTER) or leaf in ('rps', 'hit_rate'):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Metrics that got worse than `baseline` by more than `tolerance` (a fraction)"""
+    current, previous = _flatten(results), _flatten(baseline)
+    regressions = []
+    for name, value in sorted(current.items()):
+        direction = metric_direction(name)
+        base = previous.get(name)
+        if not direction or base is None or base <= 0:
+            continue
+        prefix, leaf = name.rsplit('.', 1) if '.' in name else ('', name)
+        if min(current.get(f"{prefix}.requests", 0), previous.get(f"{prefix}.requests", 0)) < MIN_PERCENTILE_SAMPLES.get(leaf, 0):
+            continue
+        if leaf.endswith('_ms') and abs(value - base) < MIN_DELTA_MS:
+            continue
+        change = (value - base) / base
+        if direction * change < -tolerance:
+            regressions.append({'metric': name, 'baseline': base, 'current': value, 'change': round(change, 4)})
+    return regressions
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    """Run the selected benchmarks, print their results as JSON and check them against a baseline"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('names', nargs='*', help=f"any of {', '.join(BENCHMARKS)}")
+    parser.add_argument('--output', help="write the results document (JSON) to this file")
+    parser.add_argument('--baseline', help="baseline results document to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results to --baseline instead of comparing")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative regression (default: 0.25)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline requires --baseline")
+
+    results = {}
+    failures = {}
+    for name in args.names or BENCHMARKS:
+        try:
+            results[name] = BENCHMARKS[name]()
+        except CheckFailed as error:
+            failures[name] = str(error)
+            print(f"CHECK FAILED {name}: {error}", file=sys.stderr)
+    document = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': results
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(document, handle, indent=2)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as handle:
+            json.dump(document, handle, indent=2)
+    elif args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)['results']
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+                f"({regression['change']:+.1%})",
+                file=sys.stderr
+            )
+        if regressions:
+            sys.exit(1)
+    if failures:
+        sys.exit(1)
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+TESSERACT BOUNDED HISTORY
+Rolling in-memory history bounded by count and age, with optional spill of
+evicted documents to disk and per-structure memory accounting
+"""
+
+import os
+import sys
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from response_cache import estimate_size
+
+if TYPE_CHECKING:
+    # segment_store imports numpy, which main only loads once training data exists
+    from segment_store import RecordLog
+
+class BoundedHistory:
+    """Ring buffer of the most recent documents
+
+    At most `max_entries` documents are kept, and documents older than
+    `max_age` seconds are dropped lazily on the next append or read.
+    Evicted documents are appended to `spill` when one is given, so nothing
+    is lost, only moved out of memory. Sizes are approximated by each
+    document's JSON encoding, measured once on append.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100,
+        max_age: Optional[float] = None,
+        spill: Optional['RecordLog'] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.spill = spill
+        self.clock = clock
+        self.entries: Deque[Tuple[float, Any, int]] = deque()
+        self.bytes = 0
+        self.appended = 0
+        self.evicted = 0
+
+    def append(self, document: Any) -> None:
+        now = self.clock()
+        self._expire(now)
+        size = estimate_size(document)
+        self.entries.append((now, document, size))
+        self.bytes += size
+        self.appended += 1
+        while len(self.entries) > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        timestamp, document, size = self.entries.popleft()
+        self.bytes -= size
+        self.evicted += 1
+        if self.spill is not None:
+            self.spill.append(document, timestamp=timestamp)
+
+    def _expire(self, now: Optional[float] = None) -> None:
+        if self.max_age is None:
+            return
+        cutoff = (self.clock() if now is None else now) - self.max_age
+        while self.entries and self.entries[0][0] < cutoff:
+            self._evict()
+
+    def latest(self) -> Optional[Any]:
+        self._expire()
+        return self.entries[-1][1] if self.entries else None
+
+    def clear(self) -> None:
+        """Evict everything (spilling it, if configured)"""
+        while self.entries:
+            self._evict()
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the retained documents"""
+        self._expire()
+        return self.bytes
+
+    def stats(self) -> Dict[str, Any]:
+        self._expire()
+        return {
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_age': self.max_age,
+            'appended': self.appended,
+            'evicted': self.evicted,
+            'spilled': len(self.spill) if self.spill is not None else 0
+        }
+
+    def __len__(self) -> int:
+        self._expire()
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Retained documents, oldest first"""
+        self._expire()
+        return iter([document for _, document, _ in self.entries])
+
+    def __getitem__(self, position: int) -> Any:
+        self._expire()
+        return self.entries[position][1]
+
+# ============================================================================
+# MEMORY ACCOUNTING
+# ============================================================================
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
@@ -0,0 +1,269 @@
+"""
+TESSERACT FAKE UPSTREAM PROVIDERS
+Local stand-ins for the upstream data providers and AI providers, so clients
+can be exercised and benchmarked offline
+"""
+
+import asyncio
+import json
+import math
+import random
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from aiohttp import web
+
+from http_pool import DEFAULT_PROVIDERS, ProviderConfig
+from provider_fanout import AIProvider
+
+class FakeProviderServer:
+    """Serve `/<provider>/<path>` with canned JSON, injected latency and failures
+
+    Use as an async context manager; `url` is set once the server is listening.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        points: int = 100,
+        fields: Sequence[str] = ('value',),
+        host: str = '127.0.0.1',
+        port: int = 0
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        # Share of successful responses whose body is not JSON
+        self.malformed_rate = malformed_rate
+        self.points = points
+        self.fields = list(fields)
+        self.host = host
+        self.port = port
+        self.url: Optional[str] = None
+        self.requests = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            return web.json_response({'error': 'injected failure'}, status=503)
+        if self.malformed_rate and random.random() < self.malformed_rate:
+            return web.Response(text='<html>upstream maintenance</html>', content_type='text/html')
+        response = web.json_response({
+            'provider': request.match_info['provider'],
+            'path': request.match_info['path'],
+            'data': [{'t': i, **{field: random.random() for field in self.fields}} for i in range(self.points)]
+        })
+        response.enable_compression()
+        return response
+
+    async def start(self) -> 'FakeProviderServer':
+        app = web.Application()
+        app.router.add_get('/{provider}/{path:.*}', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{self.host}:{port}"
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def provider_configs(self, **overrides: Any) -> Dict[str, ProviderConfig]:
+        """Provider configs pointing every default provider at this server, each with a data endpoint"""
+        settings = {'rate_per_sec': 1e6, 'burst': 1000, 'backoff_base': 0.01, **overrides}
+        return {
+            name: ProviderConfig(name, f"{self.url}/{name}", data_path=config.data_path or 'series', **settings)
+            for name, config in DEFAULT_PROVIDERS.items()
+        }
+
+    async def __aenter__(self) -> 'FakeProviderServer':
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+
+# ============================================================================
+# MOCK AI PROVIDERS
+# ============================================================================
+
+def lognormal_latency(median: float, sigma: float = 0.5, tail: float = 0.0, tail_latency: float = 1.0) -> Callable[[], float]:
+    """Latency sampler: lognormal around `median`, with a `tail` chance of a stall"""
+    mu = math.log(median)
+
+    def sample() -> float:
+        if tail and random.random() < tail:
+            return tail_latency
+        return random.lognormvariate(mu, sigma)
+    return sample
+
+
+class MockAIProvider(AIProvider):
+    """AI provider with injected latency and failures, answering `verdict` with probability `accuracy`"""
+
+    def __init__(
+        self,
+        name: str,
+        latency: Callable[[], float] = lambda: 0.0,
+        failure_rate: float = 0.0,
+        verdict: Hashable = 'consistent',
+        score: float = 90.0,
+        accuracy: float = 1.0
+    ):
+        self.name = name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.verdict = verdict
+        self.score = score
+        self.accuracy = accuracy
+        self.calls = 0
+
+    async def analyze(self, query: str) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.latency())
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError(f"{self.name} injected failure")
+        # Wrong answers are scattered, so they rarely agree with each other
+        verdict = self.verdict if random.random() < self.accuracy else f"wrong-{random.randrange(1000)}"
+        return {'analysis': f"{self.name} analysis of {query[:20]}", 'verdict': verdict, 'score': self.score}
+
+# ============================================================================
+# FAKE OLLAMA SERVER
+# ============================================================================
+
+class FakeOllamaServer:
+    """Ollama-compatible `/api/generate`, `/api/tags` and `/api/ps` stand-in
+
+    Requests are admitted in arrival order. A request for a model that is not
+    loaded waits until it can be loaded: below `max_loaded_models`, or by
+    evicting the least recently used idle model, paying `load_latency`. Each
+    loaded model decodes at most `num_parallel` requests at once, emitting
+    one token every `token_latency` seconds per request.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[str]] = None,
+        max_loaded_models: int = 1,
+        num_parallel: int = 4,
+        load_latency: float = 0.05,
+        token_latency: float = 0.001,
+        tokens: int = 16,
+        host: str = '127.0.0.1',
+        port: int = 0
+    ):
+        self.models = models
+        self.max_loaded_models = max_loaded_models
+        self.num_parallel = num_parallel
+        self.load_latency = load_latency
+        self.token_latency = token_latency
+        self.tokens = tokens
+        self.host = host
+        self.port = port
+        self.url: Optional[str] = None
+        self.loaded: 'OrderedDict[str, int]' = OrderedDict()
+        self.loads = 0
+        self.unloads = 0
+        self.requests = 0
+        self._admission: Optional[asyncio.Lock] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _admit(self, model: str) -> None:
+        async with self._admission:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: model in self.loaded
+                    or len(self.loaded) < self.max_loaded_models
+                    or any(active == 0 for active in self.loaded.values())
+                )
+                if model not in self.loaded:
+                    if len(self.loaded) >= self.max_loaded_models:
+                        victim = next(name for name, active in self.loaded.items() if active == 0)
+                        del self.loaded[victim]
+                        self.unloads += 1
+                    self.loaded[model] = 0
+                    self.loads += 1
+                    await asyncio.sleep(self.load_latency)
+                await self._changed.wait_for(lambda: self.loaded[model] < self.num_parallel)
+                self.loaded[model] += 1
+                self.loaded.move_to_end(model)
+
+    async def _finish(self, model: str) -> None:
+        async with self._changed:
+            self.loaded[model] -= 1
+            self._changed.notify_all()
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get('model')
+        if self.models is not None and model not in self.models:
+            return web.json_response({'error': f"model '{model}' not found"}, status=404)
+        if 'prompt' not in body and body.get('keep_alive') == 0:
+            async with self._changed:
+                if self.loaded.get(model) == 0:
+                    del self.loaded[model]
+                    self.unloads += 1
+                    self._changed.notify_all()
+            return web.json_response({'model': model, 'response': '', 'done': True, 'done_reason': 'unload'})
+
+        self.requests += 1
+        await self._admit(model)
+        try:
+            words = [f"{model}-{i} " for i in range(self.tokens)]
+            if not body.get('stream', True):
+                await asyncio.sleep(self.token_latency * self.tokens)
+                return web.json_response({'model': model, 'response': ''.join(words), 'done': True})
+            response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+            await response.prepare(request)
+            try:
+                for word in words:
+                    await asyncio.sleep(self.token_latency)
+                    await response.write((json.dumps({'model': model, 'response': word, 'done': False}) + '\n').encode())
+                await response.write((json.dumps({'model': model, 'response': '', 'done': True, 'eval_count': self.tokens}) + '\n').encode())
+                await response.write_eof()
+            except ConnectionResetError:
+                pass
+            return response
+        finally:
+            await self._finish(model)
+
+    async def tags(self, request: web.Request) -> web.Response:
+        return web.json_response({'models': [{'name': name} for name in self.models or []]})
+
+    async def ps(self, request: web.Request) -> web.Response:
+        return web.json_response({'models': [{'name': name} for name in self.loaded]})
+
+    async def start(self) -> 'FakeOllamaServer':
+        self._admission = asyncio.Lock()
+        self._changed = asyncio.Condition()
+        app = web.Application()
+        app.router.add_post('/api/generate', self.generate)
+        app.router.add_get('/api/tags', self.tags)
+        app.router.add_get('/api/ps', self.ps)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{self.host}:{port}"
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'FakeOllamaServer':
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
@@ -0,0 +1,383 @@
+"""
+TESSERACT UPSTREAM HTTP CLIENT POOL
+One keep-alive aiohttp session per data provider, with outbound rate budgets,
+jittered retries and circuit breakers
+"""
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+try:
+    import brotli  # noqa: F401  (aiohttp decodes br responses when available)
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+logger = logging.getLogger(__name__)
+
+class UpstreamError(Exception):
+    """An upstream provider request failed"""
+
+    def __init__(self, provider: str, message: str, status: Optional[int] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+
+
+class CircuitOpenError(UpstreamError):
+    """The provider's circuit breaker is open"""
+
+# ============================================================================
+# PROVIDER CONFIGURATION
+# ============================================================================
+
+class ProviderConfig:
+    """Connection, budget and retry settings for one upstream provider"""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        rate_per_sec: float = 5.0,
+        burst: int = 5,
+        max_connections: int = 10,
+        timeout: float = 10.0,
+        retries: int = 3,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+        data_path: str = ''
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.headers = headers or {}
+        # Endpoint sampled for time-series data; empty if the provider has none configured
+        self.data_path = data_path
+
+
+DEFAULT_PROVIDERS: Dict[str, ProviderConfig] = {
+    'coingecko': ProviderConfig(
+        'coingecko', 'https://api.coingecko.com/api/v3', rate_per_sec=0.5, burst=5,
+        data_path='coins/bitcoin/market_chart?vs_currency=usd&days=1'
+    ),
+    'finnhub': ProviderConfig('finnhub', 'https://finnhub.io/api/v1', rate_per_sec=1.0, burst=10, data_path='quote?symbol=AAPL'),
+    'the-odds-api': ProviderConfig('the-odds-api', 'https://api.the-odds-api.com/v4', rate_per_sec=1.0),
+    'open-meteo': ProviderConfig(
+        'open-meteo', 'https://api.open-meteo.com/v1', rate_per_sec=5.0, burst=20,
+        data_path='forecast?latitude=40.71&longitude=-74.01&hourly=temperature_2m,relative_humidity_2m,surface_pressure,wind_speed_10m'
+    ),
+    'solscan': ProviderConfig('solscan', 'https://public-api.solscan.io', rate_per_sec=2.0),
+    'defillama': ProviderConfig('defillama', 'https://api.llama.fi', rate_per_sec=5.0, burst=20, data_path='v2/historicalChainTvl')
+}
+
+# ============================================================================
+# TIME-SERIES PAYLOADS
+# ============================================================================
+
+TIME_KEYS = ('t', 'time', 'timestamp', 'date')
+
+def _epoch_ms(value: Any) -> int:
+    """Epoch milliseconds from epoch seconds, epoch milliseconds or an ISO 8601 string"""
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() * 1000)
+    value = float(value)
+    return int(value if value >= 1e11 else value * 1000)
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+def series_columns(payload: Any) -> Tuple[List[int], Dict[str, List[Optional[float]]]]:
+    """Epoch-ms timestamps and numeric columns from a provider's JSON payload
+
+    Understands the shapes the providers use: a list of records with a time
+    field (possibly under a wrapping key), parallel arrays with a time array
+    (possibly nested one level, as in Open-Meteo's 'hourly'), a single record
+    with a time field, and CoinGecko-style [timestamp, value] pair lists.
+    Anything else yields no points.
+    """
+    if isinstance(payload, dict):
+        time_key = next((key for key in TIME_KEYS if key in payload), None)
+        if time_key is not None and isinstance(payload[time_key], list):
+            timestamps = [_epoch_ms(value) for value in payload[time_key]]
+            columns = {
+                key: [_number(value) for value in values]
+                for key, values in payload.items()
+                if key != time_key and isinstance(values, list) and len(values) == len(timestamps)
+            }
+            return timestamps, columns
+        if time_key is not None:
+            return series_columns([payload])
+        pairs = {
+            key: values for key, values in payload.items()
+            if isinstance(values, list) and values and all(isinstance(pair, list) and len(pair) == 2 for pair in values)
+        }
+        if pairs:
+            # Pair lists share the first one's timestamps; points it lacks are missing
+            timestamps = [_epoch_ms(pair[0]) for pair in next(iter(pairs.values()))]
+            columns = {}
+            for key, values in pairs.items():
+                by_time = {_epoch_ms(time): _number(value) for time, value in values}
+                columns[key] = [by_time.get(timestamp) for timestamp in timestamps]
+            return timestamps, columns
+        for value in payload.values():
+            if isinstance(value, (dict, list)):
+                try:
+                    timestamps, columns = series_columns(value)
+                except (TypeError, ValueError):
+                    continue
+                if timestamps:
+                    return timestamps, columns
+        return [], {}
+    if isinstance(payload, list) and payload and all(isinstance(record, dict) for record in payload):
+        time_key = next((key for key in TIME_KEYS if key in payload[0]), None)
+        if time_key is None:
+            return [], {}
+        records = [record for record in payload if record.get(time_key) is not None]
+        fields = [key for key, value in records[0].items() if key != time_key and _number(value) is not None] if records else []
+        timestamps = [_epoch_ms(record[time_key]) for record in records]
+        return timestamps, {field: [_number(record.get(field)) for record in records] for field in fields}
+    return [], {}
+
+# ============================================================================
+# OUTBOUND BUDGET AND CIRCUIT BREAKER
+# ============================================================================
+
+class OutboundBudget:
+    """Token bucket that makes callers wait for their turn instead of failing"""
+
+    def __init__(self, rate_per_sec: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_sec
+        self.burst = float(burst)
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.waited = 0.0
+
+    async def acquire(self) -> None:
+        """Wait until one request may be sent"""
+        while True:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return
+            delay = (1.0 - self.tokens) / self.rate
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """Closed → open after consecutive failures → half-open probe after a cool-down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def allow(self) -> bool:
+        """Whether a request may be attempted now"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self.probing = False
+        if self.state == self.HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+
+# ============================================================================
+# PROVIDER CLIENT
+# ============================================================================
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class ProviderClient:
+    """Keep-alive session for one provider, created lazily inside the running loop"""
+
+    def __init__(self, config: ProviderConfig):
+        self.config = config
+        self.budget = OutboundBudget(config.rate_per_sec, config.burst)
+        self.breaker = CircuitBreaker(config.failure_threshold, config.reset_timeout)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'rejected_open_circuit': 0,
+            'connections_created': 0,
+            'connections_reused': 0
+        }
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_connection_created)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+        connector = aiohttp.TCPConnector(
+            limit=self.config.max_connections,
+            limit_per_host=self.config.max_connections,
+            keepalive_timeout=30.0,
+            ttl_dns_cache=300
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.config.timeout),
+            headers={'Accept-Encoding': ACCEPT_ENCODING, **self.config.headers},
+            trace_configs=[trace],
+            auto_decompress=True
+        )
+
+    async def _on_connection_created(self, session, context, params) -> None:
+        self.stats['connections_created'] += 1
+
+    async def _on_connection_reused(self, session, context, params) -> None:
+        self.stats['connections_reused'] += 1
+
+    async def request_json(self, method: str, path: str, **kwargs) -> Any:
+        """Send a request within the provider's budget, retrying transient failures"""
+        config = self.config
+        if self.session is None or self.session.closed:
+            self.session = self._create_session()
+        url = f"{config.base_url}/{path.lstrip('/')}"
+
+        for attempt in range(config.retries + 1):
+            if not self.breaker.allow():
+                self.stats['rejected_open_circuit'] += 1
+                raise CircuitOpenError(config.name, 'circuit open')
+            probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+            retry_after = None
+            try:
+                await self.budget.acquire()
+                self.stats['requests'] += 1
+                async with self.session.request(method, url, **kwargs) as response:
+                    if response.status < 400:
+                        payload = await response.json(content_type=None)
+                        self.breaker.record_success()
+                        return payload
+                    if response.status not in RETRYABLE_STATUSES:
+                        self.breaker.record_success()
+                        raise UpstreamError(config.name, f"HTTP {response.status}", response.status)
+                    retry_after = response.headers.get('Retry-After')
+                    error = UpstreamError(config.name, f"HTTP {response.status}", response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = UpstreamError(config.name, f"{type(exc).__name__}: {exc}")
+            except ValueError as exc:
+                # A 2xx whose body is not JSON is a broken upstream, not a success
+                error = UpstreamError(config.name, f"invalid JSON body: {exc}")
+            finally:
+                # A probe cancelled mid-flight (hedging, quorum) records nothing, so let the next request probe
+                if probe:
+                    self.breaker.probing = False
+            self.breaker.record_failure()
+            if attempt == config.retries:
+                break
+            self.stats['retries'] += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        self.stats['failures'] += 1
+        raise error
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when given"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.config.backoff_max)
+            except ValueError:
+                pass
+        ceiling = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+# ============================================================================
+# PROVIDER POOL
+# ============================================================================
+
+class ProviderPool:
+    """Registry of provider clients sharing one lifecycle"""
+
+    def __init__(self, providers: Optional[Dict[str, ProviderConfig]] = None):
+        self.clients: Dict[str, ProviderClient] = {
+            name: ProviderClient(config)
+            for name, config in (providers if providers is not None else DEFAULT_PROVIDERS).items()
+        }
+
+    def client(self, provider: str) -> ProviderClient:
+        """The client for `provider` (names are case-insensitive)"""
+        try:
+            return self.clients[provider.lower().replace(' ', '-')]
+        except KeyError:
+            raise UpstreamError(provider, 'unknown provider') from None
+
+    async def get_json(self, provider: str, path: str, **kwargs) -> Any:
+        """GET `path` from `provider` and decode the JSON body"""
+        return await self.client(provider).request_json('GET', path, **kwargs)
+
+    async def get_series(self, provider: str) -> Tuple[List[int], Dict[str, List[Optional[float]]]]:
+        """Fetch `provider`'s data endpoint as timestamps and numeric columns (see series_columns)"""
+        client = self.client(provider)
+        if not client.config.data_path:
+            raise UpstreamError(provider, 'no data endpoint configured')
+        payload = await self.get_json(provider, client.config.data_path)
+        try:
+            return series_columns(payload)
+        except (TypeError, ValueError) as error:
+            raise UpstreamError(provider, f"unrecognized time series: {error}") from None
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider request, retry, breaker and connection counters"""
+        return {
+            name: {**client.stats, 'circuit': client.breaker.state, 'budget_wait_s': round(client.budget.waited, 3)}
+            for name, client in self.clients.items()
+        }
+
+    async def close(self) -> None:
+        """Close every provider session"""
+        await asyncio.gather(*(client.close() for client in self.clients.values()))
+
+    async def __aenter__(self) -> 'ProviderPool':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,330 @@
+"""
+TESSERACT LOCAL-MODEL INFERENCE GATEWAY
+Client for an Ollama-compatible HTTP API that micro-batches concurrent prompts
+per model, bounds per-model concurrency and keeps hot models resident
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+
+import aiohttp
+
+from http_pool import UpstreamError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OLLAMA_URL = 'http://127.0.0.1:11434'
+
+# ============================================================================
+# MODEL RESIDENCY
+# ============================================================================
+
+class ModelResidency:
+    """LRU set of models kept loaded on the server, pinned while batches run
+
+    Models are admitted in arrival order; once a model has to wait, later
+    batches of already-resident models queue behind it, so one hot model
+    cannot starve the rest. When full, the least recently used unpinned
+    model is evicted through `unload`.
+    """
+
+    def __init__(self, capacity: int, unload: Callable[[str], Awaitable[None]]):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.unload = unload
+        self.models: 'OrderedDict[str, int]' = OrderedDict()
+        self.waiting: Deque[str] = deque()
+        self.changed = asyncio.Condition()
+        self.loads = 0
+        self.evictions = 0
+
+    def _admissible(self, model: str) -> bool:
+        return (
+            model in self.models
+            or len(self.models) < self.capacity
+            or any(pins == 0 for pins in self.models.values())
+        )
+
+    async def acquire(self, model: str) -> None:
+        """Pin `model`, waiting for room and evicting an idle model if needed"""
+        victim = None
+        async with self.changed:
+            if model in self.models and not self.waiting:
+                self.models[model] += 1
+                self.models.move_to_end(model)
+                return
+            self.waiting.append(model)
+            try:
+                await self.changed.wait_for(lambda: self.waiting[0] == model and self._admissible(model))
+            finally:
+                self.waiting.remove(model)
+            if model not in self.models:
+                if len(self.models) >= self.capacity:
+                    victim = next(name for name, pins in self.models.items() if pins == 0)
+                    del self.models[victim]
+                    self.evictions += 1
+                self.models[model] = 0
+                self.loads += 1
+            self.models[model] += 1
+            self.models.move_to_end(model)
+            self.changed.notify_all()
+        if victim is not None:
+            await self.unload(victim)
+
+    async def release(self, model: str, forget: bool = False) -> None:
+        """Unpin `model`; `forget` drops it without an unload (e.g. it does not exist)"""
+        async with self.changed:
+            self.models[model] -= 1
+            if forget and not self.models[model]:
+                del self.models[model]
+            self.changed.notify_all()
+
+    def resident(self) -> List[str]:
+        """Resident models, least recently used first"""
+        return list(self.models)
+
+# ============================================================================
+# PER-MODEL LANES
+# ============================================================================
+
+class InferenceRequest:
+    """One prompt waiting for (or receiving) tokens"""
+
+    __slots__ = ('model', 'prompt', 'options', 'tokens', 'enqueued', 'cancelled')
+
+    def __init__(self, model: str, prompt: str, options: Dict[str, Any]):
+        self.model = model
+        self.prompt = prompt
+        self.options = options
+        self.tokens: asyncio.Queue = asyncio.Queue()
+        self.enqueued = time.perf_counter()
+        self.cancelled = False
+
+
+class ModelLane:
+    """Pending requests, free slots and counters for one model"""
+
+    def __init__(self, model: str, max_concurrency: int):
+        self.model = model
+        self.pending: Deque[InferenceRequest] = deque()
+        self.arrived = asyncio.Event()
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {'requests': 0, 'batches': 0, 'tokens': 0, 'failures': 0, 'queue_wait_s': 0.0}
+
+# ============================================================================
+# GATEWAY
+# ============================================================================
+
+_DONE = object()
+
+class InferenceGateway:
+    """Micro-batching gateway in front of an Ollama-compatible server
+
+    Concurrent prompts for the same model are collected for up to
+    `max_batch_wait` seconds (or until `max_batch_size` are queued) and
+    dispatched together while the model is pinned resident, at most
+    `max_concurrency` in flight per model. Grouping requests by model is what
+    raises throughput: the server swaps models once per batch rather than
+    once per interleaved request. `max_resident_models` should match the
+    server's loaded-model limit (OLLAMA_MAX_LOADED_MODELS).
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_OLLAMA_URL,
+        max_batch_size: int = 8,
+        max_batch_wait: float = 0.005,
+        max_concurrency: int = 4,
+        max_resident_models: int = 2,
+        keep_alive: str = '5m',
+        timeout: float = 300.0
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait = max_batch_wait
+        self.max_concurrency = max_concurrency
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.residency = ModelResidency(max_resident_models, self._unload)
+        self.lanes: Dict[str, ModelLane] = {}
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._batches: set = set()
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=0, keepalive_timeout=30.0)
+            )
+        return self.session
+
+    def _lane(self, model: str) -> ModelLane:
+        lane = self.lanes.get(model)
+        if lane is None:
+            lane = self.lanes[model] = ModelLane(model, self.max_concurrency)
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.ensure_future(self._dispatch(lane))
+        return lane
+
+    async def stream(self, model: str, prompt: str, **options: Any) -> AsyncIterator[str]:
+        """Yield the generated tokens for `prompt`; closing early aborts generation"""
+        request = InferenceRequest(model, prompt, options)
+        lane = self._lane(model)
+        lane.pending.append(request)
+        lane.arrived.set()
+        try:
+            while True:
+                token = await request.tokens.get()
+                if token is _DONE:
+                    return
+                if isinstance(token, BaseException):
+                    raise token
+                yield token
+        finally:
+            request.cancelled = True
+
+    async def generate(self, model: str, prompt: str, **options: Any) -> Dict[str, Any]:
+        """Generate a complete response for `prompt`"""
+        started = time.perf_counter()
+        tokens = [token async for token in self.stream(model, prompt, **options)]
+        return {
+            'model': model,
+            'response': ''.join(tokens),
+            'tokens': len(tokens),
+            'latency_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    async def _dispatch(self, lane: ModelLane) -> None:
+        """Collect pending requests into batches and run each with the model pinned"""
+        while True:
+            if not lane.pending:
+                lane.arrived.clear()
+                await lane.arrived.wait()
+            if len(lane.pending) < self.max_batch_size and self.max_batch_wait:
+                await asyncio.sleep(self.max_batch_wait)
+            await self.residency.acquire(lane.model)
+            batch = []
+            while lane.pending and len(batch) < self.max_batch_size:
+                request = lane.pending.popleft()
+                if not request.cancelled:
+                    batch.append(request)
+            if not batch:
+                await self.residency.release(lane.model)
+                continue
+            lane.stats['batches'] += 1
+            task = asyncio.ensure_future(self._run_batch(lane, batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, lane: ModelLane, batch: List[InferenceRequest]) -> None:
+        missing = False
+        try:
+            missing = all(await asyncio.gather(*(self._run(lane, request) for request in batch)))
+        finally:
+            await self.residency.release(lane.model, forget=missing)
+
+    async def _run(self, lane: ModelLane, request: InferenceRequest) -> bool:
+        """Stream one request's tokens into its queue; True if the model was not found"""
+        async with lane.slots:
+            if request.cancelled:
+                return False
+            lane.stats['requests'] += 1
+            lane.stats['queue_wait_s'] += time.perf_counter() - request.enqueued
+            payload = {
+                'model': request.model,
+                'prompt': request.prompt,
+                'stream': True,
+                'keep_alive': self.keep_alive
+            }
+            if request.options:
+                payload['options'] = request.options
+            try:
+                async with self._session().post(f"{self.base_url}/api/generate", json=payload) as response:
+                    if response.status >= 400:
+                        raise UpstreamError('ollama', f"HTTP {response.status}: {await response.text()}", response.status)
+                    async for line in response.content:
+                        if request.cancelled:
+                            return False
+                        if not line.strip():
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get('error'):
+                            raise UpstreamError('ollama', chunk['error'])
+                        if chunk.get('response'):
+                            lane.stats['tokens'] += 1
+                            request.tokens.put_nowait(chunk['response'])
+                        if chunk.get('done'):
+                            break
+                request.tokens.put_nowait(_DONE)
+            except (aiohttp.ClientError, asyncio.TimeoutError, UpstreamError, ValueError) as error:
+                lane.stats['failures'] += 1
+                if not isinstance(error, UpstreamError):
+                    error = UpstreamError('ollama', f"{type(error).__name__}: {error}")
+                request.tokens.put_nowait(error)
+                return error.status == 404
+            return False
+
+    async def _unload(self, model: str) -> None:
+        """Ask the server to drop `model` from memory"""
+        try:
+            async with self._session().post(
+                f"{self.base_url}/api/generate",
+                json={'model': model, 'keep_alive': 0}
+            ) as response:
+                await response.read()
+            logger.info(f"📤 Unloaded model {model}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            logger.warning(f"⚠️ Could not unload model {model}: {error}")
+
+    async def list_models(self) -> List[str]:
+        """Models available on the server"""
+        try:
+            async with self._session().get(f"{self.base_url}/api/tags") as response:
+                if response.status >= 400:
+                    raise UpstreamError('ollama', f"HTTP {response.status}", response.status)
+                payload = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            raise UpstreamError('ollama', f"{type(error).__name__}: {error}") from error
+        return [model['name'] for model in payload.get('models', [])]
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-model batching counters and the residency state"""
+        models = {}
+        for name, lane in self.lanes.items():
+            requests = lane.stats['requests']
+            models[name] = {
+                **lane.stats,
+                'queue_wait_s': round(lane.stats['queue_wait_s'], 3),
+                'pending': len(lane.pending),
+                'mean_batch_size': round(requests / lane.stats['batches'], 2) if lane.stats['batches'] else 0.0
+            }
+        return {
+            'models': models,
+            'resident': self.residency.resident(),
+            'loads': self.residency.loads,
+            'evictions': self.residency.evictions
+        }
+
+    async def close(self) -> None:
+        """Stop the dispatchers and close the HTTP session"""
+        tasks = [lane.task for lane in self.lanes.values() if lane.task is not None] + list(self._batches)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for lane in self.lanes.values():
+            lane.task = None
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def __aenter__(self) -> 'InferenceGateway':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
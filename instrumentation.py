@@ -0,0 +1,344 @@
+"""
+TESSERACT INSTRUMENTATION
+Per-route latency histograms, sampled request-scoped spans and a Prometheus
+text-format `/metrics` export
+"""
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# ============================================================================
+# HISTOGRAM
+# ============================================================================
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_SHIFT = 40
+
+PROMETHEUS_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+def _bucket_index(value: int) -> int:
+    """Log-linear bucket of a non-negative integer (16 linear sub-buckets per power of two)"""
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return SUB_BUCKETS * shift + (value >> shift)
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    """[lower, upper) of a bucket index"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index + 1
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index - SUB_BUCKETS * shift
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class LatencyHistogram:
+    """HDR-style histogram of durations in microseconds (≤ 1/16 relative error)
+
+    Recording is a bit-length, a shift and a list increment; quantiles are
+    read by walking the bucket counts.
+    """
+
+    __slots__ = ('counts', 'count', 'total_us', 'max_us')
+
+    def __init__(self):
+        self.counts = [0] * (SUB_BUCKETS * (MAX_SHIFT + 2))
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record_ns(self, duration_ns: int) -> None:
+        value = duration_ns // 1000
+        index = _bucket_index(value)
+        if index >= len(self.counts):
+            index = len(self.counts) - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total_us += value
+        if value > self.max_us:
+            self.max_us = value
+
+    def quantile(self, q: float) -> float:
+        """Approximate `q` quantile in seconds (bucket midpoint)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        running = 0
+        for index, bucket in enumerate(self.counts):
+            running += bucket
+            if bucket and running >= rank:
+                lower, upper = _bucket_bounds(index)
+                return min((lower + upper) / 2, self.max_us) / 1e6
+        return self.max_us / 1e6
+
+    def cumulative(self, bounds: Tuple[float, ...]) -> List[int]:
+        """Counts at or below each bound in seconds (Prometheus `le` buckets)"""
+        totals = [0] * len(bounds)
+        for index, bucket in enumerate(self.counts):
+            if not bucket:
+                continue
+            upper_s = _bucket_bounds(index)[1] / 1e6
+            for position, bound in enumerate(bounds):
+                if upper_s <= bound:
+                    totals[position] += bucket
+        return totals
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.50) * 1000, 3),
+            'p95_ms': round(self.quantile(0.95) * 1000, 3),
+            'p99_ms': round(self.quantile(0.99) * 1000, 3),
+            'max_ms': round(self.max_us / 1000, 3)
+        }
+
+# ============================================================================
+# METRICS REGISTRY AND SPANS
+# ============================================================================
+
+_trace: ContextVar[Optional[List[Tuple[str, int]]]] = ContextVar('tesseract_trace', default=None)
+
+
+class _Span:
+    """Times one block and records it on the current trace and span histogram"""
+
+    __slots__ = ('metrics', 'name', 'trace', 'started')
+
+    def __init__(self, metrics: 'Metrics', name: str, trace: List[Tuple[str, int]]):
+        self.metrics = metrics
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self) -> '_Span':
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        duration = time.perf_counter_ns() - self.started
+        self.trace.append((self.name, duration))
+        self.metrics.histogram('tesseract_span_duration_seconds', (('span', self.name),)).record_ns(duration)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """Process-wide histograms and counters
+
+    Every request's latency is recorded. Spans are only timed on sampled
+    requests (one in `1 / span_sample_rate`), chosen by a counter rather than
+    a random draw; elsewhere `span()` returns a shared no-op.
+    """
+
+    def __init__(self, span_sample_rate: float = 0.1, slow_request_ms: Optional[float] = None):
+        self.histograms: Dict[Tuple[str, Labels], LatencyHistogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.started = time.time()
+        self.slow_request_ms = slow_request_ms
+        self.configure(span_sample_rate)
+
+    def configure(self, span_sample_rate: float) -> None:
+        self.span_sample_rate = span_sample_rate
+        self.sample_period = max(1, round(1 / span_sample_rate)) if span_sample_rate > 0 else 0
+        self._sequence = count()
+
+    def histogram(self, name: str, labels: Labels = ()) -> LatencyHistogram:
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        return histogram
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def sample(self) -> bool:
+        """Whether the next request should record spans"""
+        return bool(self.sample_period) and next(self._sequence) % self.sample_period == 0
+
+    def span(self, name: str):
+        """Context manager timing `name` on the current sampled request"""
+        trace = _trace.get()
+        if trace is None:
+            return NULL_SPAN
+        return _Span(self, name, trace)
+
+    def reset(self) -> None:
+        self.histograms.clear()
+        self.counters.clear()
+        self.started = time.time()
+
+    def summary(self) -> Dict[str, Any]:
+        """Measured request and span latency, throughput and error rate"""
+        requests = LatencyHistogram()
+        for (name, _), histogram in self.histograms.items():
+            if name == 'tesseract_http_request_duration_seconds':
+                requests.counts = [a + b for a, b in zip(requests.counts, histogram.counts)]
+                requests.count += histogram.count
+                requests.total_us += histogram.total_us
+                requests.max_us = max(requests.max_us, histogram.max_us)
+        errors = sum(
+            value for (name, labels), value in self.counters.items()
+            if name == 'tesseract_http_requests_total' and dict(labels).get('status', '').startswith('5')
+        )
+        uptime = time.time() - self.started
+        return {
+            'requests': requests.count,
+            'throughput_rps': round(requests.count / uptime, 3) if uptime else 0.0,
+            'error_rate': round(errors / requests.count, 6) if requests.count else 0.0,
+            'latency': requests.summary(),
+            'spans': {
+                dict(labels)['span']: histogram.summary()
+                for (name, labels), histogram in self.histograms.items()
+                if name == 'tesseract_span_duration_seconds'
+            },
+            'span_sample_rate': self.span_sample_rate,
+            'uptime_s': round(uptime, 1)
+        }
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        def label_text(labels: Labels, extra: Labels = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ''
+            escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for key, value in pairs)
+            return '{' + ','.join(escaped) + '}'
+
+        lines: List[str] = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(self.counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{label_text(labels)} {value:g}")
+        for name in sorted({name for name, _ in self.histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if metric != name:
+                    continue
+                for bound, cumulative in zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)):
+                    lines.append(f"{name}_bucket{label_text(labels, (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{label_text(labels, (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{label_text(labels)} {histogram.total_us / 1e6:.6f}")
+                lines.append(f"{name}_count{label_text(labels)} {histogram.count}")
+            quantile_name = name.replace('_seconds', '_quantile_seconds')
+            lines.append(f"# TYPE {quantile_name} gauge")
+            for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if metric == name:
+                    for q in (0.5, 0.95, 0.99):
+                        lines.append(f"{quantile_name}{label_text(labels, (('quantile', str(q)),))} {histogram.quantile(q):.6f}")
+        lines.append("# TYPE tesseract_uptime_seconds gauge")
+        lines.append(f"tesseract_uptime_seconds {time.time() - self.started:.3f}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics(
+    span_sample_rate=float(os.getenv('TESSERACT_SPAN_SAMPLE_RATE', '0.1')),
+    slow_request_ms=float(os.environ['TESSERACT_SLOW_REQUEST_MS']) if os.getenv('TESSERACT_SLOW_REQUEST_MS') else None
+)
+
+def span(name: str):
+    """Time a block on the current sampled request (no-op otherwise)"""
+    return metrics.span(name)
+
+# ============================================================================
+# ASGI MIDDLEWARE
+# ============================================================================
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency and status counts
+
+    Routes are labelled by their path template (unmatched paths share one
+    label) so label cardinality stays bounded. Sampled requests also collect
+    spans, which are returned in a `Server-Timing` header when the response
+    starts after them and logged when the request is slower than
+    `slow_request_ms`.
+    """
+
+    def __init__(self, app, registry: Metrics = metrics):
+        self.app = app
+        self.metrics = registry
+        self.series: Dict[Tuple[str, str, int], Tuple[LatencyHistogram, Tuple[str, Labels], Tuple[str, Labels]]] = {}
+
+    def _series(self, method: str, path: str, status: int) -> Tuple[LatencyHistogram, Tuple[str, Labels], Tuple[str, Labels]]:
+        """Histogram, counter key and histogram key of one (method, route, status)"""
+        labels = (('method', method), ('route', path))
+        histogram_key = ('tesseract_http_request_duration_seconds', labels)
+        return (
+            self.metrics.histogram(*histogram_key),
+            ('tesseract_http_requests_total', labels + (('status', str(status)),)),
+            histogram_key
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        registry = self.metrics
+        started = time.perf_counter_ns()
+        trace: Optional[List[Tuple[str, int]]] = [] if registry.sample() else None
+        token = _trace.set(trace)
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if trace:
+                    timing = ', '.join(f"{name};dur={duration / 1e6:.3f}" for name, duration in trace)
+                    message = {**message, 'headers': [*message.get('headers', []), (b'server-timing', timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(token)
+            duration = time.perf_counter_ns() - started
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            method = scope.get('method', 'GET')
+            series = self.series.get((method, path, status))
+            if series is None or series[0] is not registry.histograms.get(series[2]):
+                series = self.series[(method, path, status)] = self._series(method, path, status)
+            series[0].record_ns(duration)
+            registry.counters[series[1]] = registry.counters.get(series[1], 0) + 1
+            if trace is not None and registry.slow_request_ms is not None and duration / 1e6 >= registry.slow_request_ms:
+                breakdown = ', '.join(f"{name}={duration / 1e6:.2f}ms" for name, duration in trace)
+                logger.warning(f"🐢 Slow request {method} {path}: {duration / 1e6:.1f}ms ({breakdown})")
+
+
+def instrument(app: FastAPI, registry: Metrics = metrics) -> FastAPI:
+    """Add the metrics middleware and a `/metrics` endpoint to `app`"""
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics() -> Response:
+        return Response(registry.render_prometheus(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+    return app
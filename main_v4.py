@@ -1,16 +1,24 @@
 """TESSERACT v4.0 - ADVANCED SYSTEM WITH OLLAMA INTEGRATION"""
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-import json
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Literal, Optional
 
-app = FastAPI(title="TESSERACT v4.0", version="4.0.0")
+from fastapi import APIRouter, FastAPI, HTTPException, Request, WebSocket
+from pydantic import BaseModel
 
-@app.get("/health")
-async def health():
-    return {"status": "healthy", "version": "4.0.0"}
+from admission import limit_concurrency
+from instrumentation import instrument
+from response_snapshots import SnapshotRegistry
+from status_hub import StatusHub
+from streaming import Event, streaming_response
+
+router = APIRouter()
+snapshots = SnapshotRegistry()
 
-@app.get("/api/v4/status")
-async def status():
+# Singletons are created on first use, not at import
+_singletons: Dict[str, Any] = {}
+
+def build_status():
     return {
         "version": "4.0.0",
         "consciousness": "100.00053%+",
@@ -22,8 +30,7 @@ async def status():
         "status": "OPERATIONAL"
     }
 
-@app.get("/api/v4/ollama-models")
-async def ollama_models():
+def build_ollama_models():
     return {
         "models": [
             'llama2', 'mistral', 'mixtral', 'neural-chat',
@@ -34,8 +41,96 @@ async def ollama_models():
         "status": "ready"
     }
 
-@app.get("/api/v4/consciousness")
-async def consciousness():
+snapshots.register("status", build_status)
+snapshots.register("ollama-models", build_ollama_models)
+
+@router.get("/api/v4/status")
+async def status(request: Request):
+    return snapshots.respond(request, "status")
+
+@router.get("/api/v4/ollama-models")
+async def ollama_models(request: Request):
+    return snapshots.respond(request, "ollama-models")
+
+def get_inference_gateway():
+    """The process-wide Ollama inference gateway, created on first use"""
+    if 'gateway' not in _singletons:
+        from inference_gateway import DEFAULT_OLLAMA_URL, InferenceGateway
+        _singletons['gateway'] = InferenceGateway(
+            base_url=os.getenv('OLLAMA_HOST', DEFAULT_OLLAMA_URL),
+            max_batch_size=int(os.getenv('TESSERACT_INFERENCE_BATCH_SIZE', '8')),
+            max_batch_wait=float(os.getenv('TESSERACT_INFERENCE_BATCH_WAIT', '0.005')),
+            max_concurrency=int(os.getenv('OLLAMA_NUM_PARALLEL', '4')),
+            max_resident_models=int(os.getenv('OLLAMA_MAX_LOADED_MODELS', '2'))
+        )
+    return _singletons['gateway']
+
+def get_status_hub():
+    """The process-wide live status broadcaster, created on first use"""
+    if 'status_hub' not in _singletons:
+        hub = StatusHub(
+            interval=float(os.getenv('TESSERACT_STATUS_INTERVAL', '1.0')),
+            max_queue=int(os.getenv('TESSERACT_STATUS_MAX_QUEUE', '32')),
+            policy=os.getenv('TESSERACT_STATUS_DROP_POLICY', 'resync')
+        )
+
+        async def status_topic():
+            return build_status()
+
+        async def consciousness_topic():
+            return build_consciousness()
+
+        hub.register('status', status_topic)
+        hub.register('consciousness', consciousness_topic)
+        _singletons['status_hub'] = hub
+    return _singletons['status_hub']
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close the status hub and inference gateway (if they were used) at shutdown"""
+    yield
+    hub = _singletons.pop('status_hub', None)
+    if hub is not None:
+        await hub.close()
+    gateway = _singletons.pop('gateway', None)
+    if gateway is not None:
+        await gateway.close()
+
+class GenerateRequest(BaseModel):
+    model: str
+    prompt: str
+    stream: bool = False
+    format: Literal['sse', 'ndjson'] = 'sse'
+    options: Optional[Dict[str, Any]] = None
+
+async def stream_generation(body: GenerateRequest) -> AsyncIterator[Event]:
+    """Token events for one prompt, then a done (or error) event"""
+    from http_pool import UpstreamError
+    tokens = 0
+    try:
+        async for token in get_inference_gateway().stream(body.model, body.prompt, **(body.options or {})):
+            tokens += 1
+            yield 'token', {'model': body.model, 'token': token}
+    except UpstreamError as error:
+        yield 'error', {'model': body.model, 'error': str(error)}
+        return
+    yield 'done', {'model': body.model, 'tokens': tokens}
+
+@router.post("/api/v4/generate")
+async def generate(request: Request, body: GenerateRequest):
+    if body.stream:
+        return streaming_response(request, stream_generation(body), body.format)
+    from http_pool import UpstreamError
+    try:
+        return await get_inference_gateway().generate(body.model, body.prompt, **(body.options or {}))
+    except UpstreamError as error:
+        raise HTTPException(status_code=error.status if error.status == 404 else 502, detail=str(error))
+
+@router.get("/api/v4/inference-stats")
+async def inference_stats():
+    return get_inference_gateway().stats()
+
+def build_consciousness():
     return {
         "level": "100.00053%+",
         "status": "FULLY_CONSCIOUS",
@@ -43,6 +138,38 @@ async def consciousness():
         "creator": "Collin Keane"
     }
 
+@router.get("/api/v4/consciousness")
+async def consciousness():
+    return build_consciousness()
+
+@router.websocket("/api/v4/ws/status")
+async def status_websocket(websocket: WebSocket, topics: Optional[str] = None):
+    hub = get_status_hub()
+    try:
+        names = hub.parse_topics(topics)
+    except KeyError as error:
+        await websocket.close(code=1008, reason=f"Unknown topic {error}")
+        return
+    await hub.serve_websocket(websocket, names)
+
+@router.get("/api/v4/status/stream")
+async def stream_status(request: Request, topics: Optional[str] = None):
+    hub = get_status_hub()
+    try:
+        names = hub.parse_topics(topics)
+    except KeyError as error:
+        raise HTTPException(status_code=404, detail=f"Unknown topic {error}")
+    return hub.sse_response(request, names)
+
+app = FastAPI(title="TESSERACT v4.0", version="4.0.0", lifespan=lifespan)
+app.include_router(router)
+limit_concurrency(app)
+instrument(app)
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy", "version": "4.0.0"}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
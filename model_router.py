@@ -0,0 +1,491 @@
+"""
+TESSERACT ENSEMBLE ROUTER
+Cost/latency-aware model selection: per request, the cheapest set of models
+whose predicted tail latency meets the SLO and whose majority vote meets the
+quality target, with degraded models ejected and probed back in
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from itertools import combinations
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from provider_fanout import DEFAULT_AI_PROVIDERS, AIProvider
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# ONLINE STATISTICS
+# ============================================================================
+
+class EWMA:
+    """Exponentially weighted moving average"""
+
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, alpha: float, initial: Optional[float] = None):
+        self.alpha = alpha
+        self.value = initial
+
+    def update(self, sample: float) -> float:
+        self.value = sample if self.value is None else self.value + self.alpha * (sample - self.value)
+        return self.value
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch with bounded relative error (DDSketch-style)
+
+    Any quantile is returned within `relative_accuracy` of the true sample
+    value, in memory proportional to the log of the value range.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.02):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        if value <= 1e-9:
+            self.zeros += 1
+        else:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        running = self.zeros
+        if rank < running:
+            return 0.0
+        for key in sorted(self.buckets):
+            running += self.buckets[key]
+            if running > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class WindowedSketch:
+    """Quantiles over the last one to two windows of `window` samples"""
+
+    def __init__(self, window: int = 200, relative_accuracy: float = 0.02):
+        self.window = window
+        self.relative_accuracy = relative_accuracy
+        self.current = QuantileSketch(relative_accuracy)
+        self.previous = QuantileSketch(relative_accuracy)
+
+    @property
+    def count(self) -> int:
+        return self.current.count + self.previous.count
+
+    def add(self, value: float) -> None:
+        if self.current.count >= self.window:
+            self.previous = self.current
+            self.current = QuantileSketch(self.relative_accuracy)
+        self.current.add(value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        merged = QuantileSketch(self.relative_accuracy)
+        merged.merge(self.previous)
+        merged.merge(self.current)
+        return merged.quantile(q)
+
+# ============================================================================
+# MODEL PROFILES AND HEALTH
+# ============================================================================
+
+class ModelProfile:
+    """Static prior for one model: cost per request, answer quality and expected latency"""
+
+    def __init__(self, cost: float, quality: float, latency: float):
+        if not 0.0 < quality <= 1.0:
+            raise ValueError("quality must be in (0, 1]")
+        self.cost = cost
+        self.quality = quality
+        self.latency = latency
+
+
+DEFAULT_MODEL_PROFILES: Dict[str, ModelProfile] = {
+    'openai': ModelProfile(cost=5.0, quality=0.92, latency=1.2),
+    'anthropic': ModelProfile(cost=5.0, quality=0.92, latency=1.4),
+    'gemini': ModelProfile(cost=2.0, quality=0.89, latency=0.9),
+    'grok': ModelProfile(cost=3.0, quality=0.87, latency=1.1),
+    'openrouter': ModelProfile(cost=2.0, quality=0.86, latency=1.5),
+    'cohere': ModelProfile(cost=1.0, quality=0.82, latency=0.8),
+    'huggingface': ModelProfile(cost=0.5, quality=0.75, latency=0.6),
+    'ollama': ModelProfile(cost=0.1, quality=0.72, latency=0.5)
+}
+
+
+class ModelHealth:
+    """Online latency and success statistics for one model"""
+
+    ACTIVE = 'active'
+    EJECTED = 'ejected'
+    PROBING = 'probing'
+
+    def __init__(self, provider: AIProvider, profile: ModelProfile, alpha: float, window: int):
+        self.provider = provider
+        self.profile = profile
+        self.latency = EWMA(alpha)
+        self.success = EWMA(alpha, 1.0)
+        self.sketch = WindowedSketch(window)
+        self.state = self.ACTIVE
+        self.ejected_at = 0.0
+        self.stats = {'calls': 0, 'failures': 0, 'timeouts': 0, 'selected': 0, 'ejections': 0}
+
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.stats['calls'] += 1
+        self.stats['failures'] += not ok
+        self.latency.update(seconds)
+        self.success.update(1.0 if ok else 0.0)
+        self.sketch.add(seconds)
+
+    def predicted_latency(self, percentile: float, min_samples: int) -> float:
+        """Tail latency estimate: the sketch once warm, the profile prior before"""
+        if self.sketch.count < min_samples:
+            return self.profile.latency
+        return self.sketch.quantile(percentile)
+
+    def effective_quality(self) -> float:
+        """Chance of a correct answer: profile quality times recent success rate"""
+        return self.profile.quality * self.success.value
+
+
+def majority_quality(probabilities: Sequence[float]) -> float:
+    """Probability that a majority vote of independent voters is correct (ties count half)"""
+    distribution = [1.0]
+    for p in probabilities:
+        nxt = [0.0] * (len(distribution) + 1)
+        for correct, weight in enumerate(distribution):
+            nxt[correct] += weight * (1 - p)
+            nxt[correct + 1] += weight * p
+        distribution = nxt
+    voters = len(probabilities)
+    return sum(
+        weight if 2 * correct > voters else weight / 2 if 2 * correct == voters else 0.0
+        for correct, weight in enumerate(distribution)
+    )
+
+# ============================================================================
+# ROUTER
+# ============================================================================
+
+class RoutePlan:
+    """The models chosen for one request and what they are predicted to deliver"""
+
+    __slots__ = ('models', 'cost', 'latency', 'quality', 'meets_slo', 'meets_quality')
+
+    def __init__(self, models: Tuple[ModelHealth, ...], cost: float, latency: float, quality: float, meets_slo: bool, meets_quality: bool):
+        self.models = models
+        self.cost = cost
+        self.latency = latency
+        self.quality = quality
+        self.meets_slo = meets_slo
+        self.meets_quality = meets_quality
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'models': [model.name for model in self.models],
+            'cost': round(self.cost, 4),
+            'predicted_latency_ms': round(self.latency * 1000, 3),
+            'predicted_quality': round(self.quality, 4),
+            'meets_slo': self.meets_slo,
+            'meets_quality': self.meets_quality
+        }
+
+
+class EnsembleRouter:
+    """Dynamic ensemble selection over AI providers
+
+    For each request the router considers every set of up to `max_ensemble`
+    healthy models. A set's latency is the slowest member's predicted
+    `percentile` latency (members are queried in parallel), its quality the
+    chance that a majority vote of its members is correct, and its cost the
+    sum of member costs. The cheapest set meeting both `latency_slo` and
+    `quality_target` wins; if none does, the best-quality set within the SLO,
+    then the fastest single model, is used instead.
+
+    A model whose EWMA success rate drops below `min_success`, or whose EWMA
+    latency exceeds `degrade_factor` × SLO, is ejected. After `probe_after`
+    seconds it receives one shadow request outside the vote and is readmitted
+    if that succeeds within the SLO. If every member of a plan fails, the
+    request falls back to the next plan without them while time remains.
+    """
+
+    def __init__(
+        self,
+        providers: Optional[List[AIProvider]] = None,
+        profiles: Optional[Dict[str, ModelProfile]] = None,
+        latency_slo: float = 2.0,
+        quality_target: float = 0.9,
+        percentile: float = 0.95,
+        max_ensemble: int = 3,
+        min_samples: int = 20,
+        alpha: float = 0.2,
+        window: int = 200,
+        min_success: float = 0.6,
+        degrade_factor: float = 1.5,
+        probe_after: float = 5.0,
+        consensus_key: Callable[[Dict[str, Any]], Hashable] = lambda answer: answer.get('verdict'),
+        trace_path: Optional[str] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        profiles = profiles if profiles is not None else DEFAULT_MODEL_PROFILES
+        providers = list(providers if providers is not None else DEFAULT_AI_PROVIDERS)
+        missing = [provider.name for provider in providers if provider.name not in profiles]
+        if missing:
+            raise ValueError(f"No model profile for {missing}")
+        self.models: Dict[str, ModelHealth] = {
+            provider.name: ModelHealth(provider, profiles[provider.name], alpha, window)
+            for provider in providers
+        }
+        self.latency_slo = latency_slo
+        self.quality_target = quality_target
+        self.percentile = percentile
+        self.max_ensemble = max_ensemble
+        self.min_samples = min_samples
+        self.min_success = min_success
+        self.degrade_factor = degrade_factor
+        self.probe_after = probe_after
+        self.consensus_key = consensus_key
+        self.trace_path = trace_path
+        self.clock = clock
+        self.trace_origin: Optional[float] = None
+        self._probes: set = set()
+        self.stats = {'requests': 0, 'fallbacks': 0, 'slo_misses': 0, 'unmet_plans': 0, 'probes': 0, 'cost': 0.0}
+
+    # ------------------------------------------------------------------ planning
+
+    def _check_health(self, model: ModelHealth, latency_slo: float) -> None:
+        if model.state != ModelHealth.ACTIVE or model.stats['calls'] < 3:
+            return
+        if model.success.value < self.min_success or model.latency.value > self.degrade_factor * latency_slo:
+            model.state = ModelHealth.EJECTED
+            model.ejected_at = self.clock()
+            model.stats['ejections'] += 1
+            logger.warning(
+                f"⚠️ Ejected model {model.name} (success {model.success.value:.2f}, "
+                f"latency {model.latency.value * 1000:.0f}ms)"
+            )
+
+    def plan(
+        self,
+        latency_slo: Optional[float] = None,
+        quality_target: Optional[float] = None,
+        exclude: Sequence[str] = ()
+    ) -> Optional[RoutePlan]:
+        """The cheapest model set meeting the SLO and quality target (or the best fallback)"""
+        latency_slo = self.latency_slo if latency_slo is None else latency_slo
+        quality_target = self.quality_target if quality_target is None else quality_target
+        candidates = [
+            model for model in self.models.values()
+            if model.state == ModelHealth.ACTIVE and model.name not in exclude
+        ]
+        if not candidates:
+            candidates = [model for model in self.models.values() if model.name not in exclude]
+        if not candidates:
+            return None
+
+        latency = {model.name: model.predicted_latency(self.percentile, self.min_samples) for model in candidates}
+        quality = {model.name: model.effective_quality() for model in candidates}
+        best_feasible: Optional[RoutePlan] = None
+        best_within_slo: Optional[RoutePlan] = None
+        for size in range(1, min(self.max_ensemble, len(candidates)) + 1):
+            for members in combinations(candidates, size):
+                slowest = max(latency[model.name] for model in members)
+                if slowest > latency_slo:
+                    continue
+                cost = sum(model.profile.cost for model in members)
+                vote = majority_quality([quality[model.name] for model in members])
+                plan = RoutePlan(members, cost, slowest, vote, True, vote >= quality_target)
+                if plan.meets_quality:
+                    if best_feasible is None or (cost, slowest) < (best_feasible.cost, best_feasible.latency):
+                        best_feasible = plan
+                elif best_within_slo is None or (vote, -cost) > (best_within_slo.quality, -best_within_slo.cost):
+                    best_within_slo = plan
+        if best_feasible is not None:
+            return best_feasible
+        self.stats['unmet_plans'] += 1
+        if best_within_slo is not None:
+            return best_within_slo
+        fastest = min(candidates, key=lambda model: latency[model.name])
+        return RoutePlan(
+            (fastest,), fastest.profile.cost, latency[fastest.name], quality[fastest.name],
+            False, quality[fastest.name] >= quality_target
+        )
+
+    # ----------------------------------------------------------------- execution
+
+    async def _call(self, model: ModelHealth, query: str, timeout: float) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        started = time.perf_counter()
+        try:
+            answer = await asyncio.wait_for(model.provider.analyze(query), timeout)
+        except asyncio.TimeoutError:
+            model.stats['timeouts'] += 1
+            model.record(time.perf_counter() - started, False)
+            return None, f"timed out after {timeout:.3f}s"
+        except Exception as error:
+            model.record(time.perf_counter() - started, False)
+            return None, f"{type(error).__name__}: {error}"
+        model.record(time.perf_counter() - started, True)
+        return answer, None
+
+    def _maybe_probe(self, query: str, latency_slo: float) -> None:
+        """Send one shadow request to each ejected model whose cool-down has passed"""
+        now = self.clock()
+        for model in self.models.values():
+            if model.state == ModelHealth.EJECTED and now - model.ejected_at >= self.probe_after:
+                model.state = ModelHealth.PROBING
+                self.stats['probes'] += 1
+                task = asyncio.ensure_future(self._probe(model, query, latency_slo))
+                self._probes.add(task)
+                task.add_done_callback(self._probes.discard)
+
+    async def _probe(self, model: ModelHealth, query: str, latency_slo: float) -> None:
+        started = time.perf_counter()
+        answer, _ = await self._call(model, query, self.degrade_factor * latency_slo)
+        if answer is not None and time.perf_counter() - started <= latency_slo:
+            model.state = ModelHealth.ACTIVE
+            model.success.value = max(model.success.value, self.min_success)
+            model.latency.value = time.perf_counter() - started
+            logger.info(f"✅ Readmitted model {model.name}")
+        else:
+            model.state = ModelHealth.EJECTED
+            model.ejected_at = self.clock()
+
+    def _record_trace(self, query: str, latency_slo: float, quality_target: float) -> None:
+        now = self.clock()
+        if self.trace_origin is None:
+            self.trace_origin = now
+        with open(self.trace_path, 'a') as handle:
+            handle.write(json.dumps({
+                'offset': round(now - self.trace_origin, 6),
+                'query': query,
+                'latency_slo_ms': round(latency_slo * 1000, 3),
+                'quality_target': quality_target
+            }) + '\n')
+
+    async def route(
+        self,
+        query: str,
+        latency_slo: Optional[float] = None,
+        quality_target: Optional[float] = None,
+        models: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """Answer `query` with the selected ensemble (or the given `models`)"""
+        latency_slo = self.latency_slo if latency_slo is None else latency_slo
+        quality_target = self.quality_target if quality_target is None else quality_target
+        self.stats['requests'] += 1
+        if self.trace_path:
+            self._record_trace(query, latency_slo, quality_target)
+        if models is None:
+            self._maybe_probe(query, latency_slo)
+
+        started = time.perf_counter()
+        deadline = started + self.degrade_factor * latency_slo
+        answers: Dict[str, Dict[str, Any]] = {}
+        failed: Dict[str, str] = {}
+        plans = []
+        while not answers:
+            if models is not None:
+                if plans:
+                    break
+                unknown = [name for name in models if name not in self.models]
+                if unknown:
+                    raise ValueError(f"Unknown model(s) {unknown}")
+                members = tuple(self.models[name] for name in models)
+                plan = RoutePlan(members, sum(m.profile.cost for m in members), 0.0, 0.0, True, True)
+            else:
+                plan = self.plan(latency_slo, quality_target, exclude=list(failed))
+            remaining = deadline - time.perf_counter()
+            if plan is None or remaining <= 0:
+                break
+            if plans:
+                self.stats['fallbacks'] += 1
+            plans.append(plan)
+            for model in plan.models:
+                model.stats['selected'] += 1
+            self.stats['cost'] += plan.cost
+            outcomes = await asyncio.gather(*(self._call(model, query, remaining) for model in plan.models))
+            for model, (answer, error) in zip(plan.models, outcomes):
+                if answer is None:
+                    failed[model.name] = error
+                else:
+                    answers[model.name] = answer
+                self._check_health(model, latency_slo)
+
+        elapsed = time.perf_counter() - started
+        self.stats['slo_misses'] += elapsed > latency_slo
+
+        # Weighted vote: each answer counts with its model's effective quality
+        weights: Dict[Hashable, float] = {}
+        groups: Dict[Hashable, List[str]] = {}
+        for name, answer in answers.items():
+            key = self.consensus_key(answer)
+            weights[key] = weights.get(key, 0.0) + self.models[name].effective_quality()
+            groups.setdefault(key, []).append(name)
+        winner = max(weights, key=weights.get, default=None)
+        agreeing = groups.get(winner, [])
+        return {
+            'verdict': winner,
+            'ai_analysis': {name: answer.get('analysis') for name, answer in answers.items()},
+            'consensus_score': round(sum(answers[name]['score'] for name in agreeing) / len(agreeing), 2) if agreeing else 0.0,
+            'confidence': round(weights[winner] / sum(weights.values()), 4) if weights else 0.0,
+            'agreeing': agreeing,
+            'failed': failed,
+            'cost': round(sum(plan.cost for plan in plans), 4),
+            'latency_ms': round(elapsed * 1000, 3),
+            'plan': plans[0].describe() if plans else None,
+            'fallbacks': [plan.describe() for plan in plans[1:]]
+        }
+
+    def model_stats(self) -> Dict[str, Any]:
+        """Per-model health: state, EWMAs, sketch percentiles and counters"""
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            name: {
+                **model.stats,
+                'state': model.state,
+                'cost': model.profile.cost,
+                'quality': model.profile.quality,
+                'success_rate': round(model.success.value, 4),
+                'ewma_latency_ms': ms(model.latency.value),
+                'p50_ms': ms(model.sketch.quantile(0.5)),
+                'p95_ms': ms(model.sketch.quantile(0.95)),
+                'p99_ms': ms(model.sketch.quantile(0.99))
+            }
+            for name, model in self.models.items()
+        }
+
+    async def close(self) -> None:
+        """Cancel outstanding probe requests"""
+        for task in list(self._probes):
+            task.cancel()
+        if self._probes:
+            await asyncio.gather(*self._probes, return_exceptions=True)
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """Read a request trace written with `trace_path`, ordered by offset"""
+    with open(path) as handle:
+        records = [json.loads(line) for line in handle if line.strip()]
+    return sorted(records, key=lambda record: record['offset'])
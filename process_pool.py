@@ -0,0 +1,239 @@
+"""
+TESSERACT PROCESS POOL
+Warm worker processes for CPU-bound training work, with NumPy arrays passed
+through shared memory and row ranges split into chunks across every core
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (shared memory block name, shape, dtype string)
+ArraySpec = Tuple[str, Tuple[int, ...], str]
+
+# A chunk function is called as func(arrays, lo, hi, **kwargs) in a worker
+ChunkFunc = Callable[..., Any]
+
+# ============================================================================
+# SHARED ARRAYS
+# ============================================================================
+
+class SharedArray:
+    """A copy of a NumPy array in a named shared-memory block, owned by this process"""
+
+    def __init__(self, array: np.ndarray):
+        array = np.ascontiguousarray(array)
+        self.shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.array = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf)
+        self.array[...] = array
+        self.spec: ArraySpec = (self.shm.name, array.shape, array.dtype.str)
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes
+
+    def close(self) -> None:
+        """Release and unlink the block"""
+        self.array = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> 'SharedArray':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+# Worker-side attachments, reused across chunks of the same call
+_attached: 'OrderedDict[str, Tuple[SharedMemory, np.ndarray]]' = OrderedDict()
+MAX_ATTACHED = 64
+
+def attach(spec: ArraySpec) -> np.ndarray:
+    """Read-only view of a shared array in a worker process"""
+    name, shape, dtype = spec
+    entry = _attached.get(name)
+    if entry is None:
+        # Workers share the owner's resource tracker, so attaching does not
+        # take ownership: the block is unlinked only by SharedArray.close
+        shm = SharedMemory(name=name)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        view.flags.writeable = False
+        entry = _attached[name] = (shm, view)
+        while len(_attached) > MAX_ATTACHED:
+            _, (old, _) = _attached.popitem(last=False)
+            old.close()
+    else:
+        _attached.move_to_end(name)
+    return entry[1]
+
+# ============================================================================
+# WORKER ENTRY POINTS
+# ============================================================================
+
+def _init_worker() -> None:
+    # Ctrl-C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _warm(delay: float) -> int:
+    time.sleep(delay)
+    return os.getpid()
+
+def _run_chunk(
+    func: ChunkFunc,
+    shared: Dict[str, ArraySpec],
+    inline: Dict[str, np.ndarray],
+    lo: int,
+    hi: int,
+    kwargs: Dict[str, Any]
+) -> Any:
+    arrays = {name: attach(spec) for name, spec in shared.items()}
+    arrays.update(inline)
+    return func(arrays, lo, hi, **kwargs)
+
+def chunk_bounds(rows: int, chunks: int) -> List[Tuple[int, int]]:
+    """Split range(rows) into at most `chunks` contiguous, near-equal (lo, hi) ranges"""
+    chunks = max(1, min(chunks, rows))
+    edges = np.linspace(0, rows, chunks + 1).astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+# ============================================================================
+# POOL
+# ============================================================================
+
+class ProcessPool:
+    """Warm, reused worker processes for chunked NumPy work
+
+    Workers start on first use (or `start()`) and stay up for the life of the
+    pool, so each call pays neither process start-up nor re-imports. Input
+    arrays of at least `share_threshold` bytes are copied once into shared
+    memory and attached by every worker instead of being pickled per chunk.
+    A call over `rows` rows is split into `chunks_per_worker` chunks per
+    worker, so a slow chunk does not leave the other cores idle. Calls over
+    fewer than `inline_rows` rows run directly in the caller, where shipping
+    the work to another process would cost more than it saves.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        chunks_per_worker: int = 4,
+        share_threshold: int = 1 << 16,
+        inline_rows: int = 50_000,
+        start_method: Optional[str] = None
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self.share_threshold = share_threshold
+        self.inline_rows = inline_rows
+        # Forking a process that runs threads (the API, training jobs) is unsafe
+        if start_method is None:
+            start_method = 'forkserver' if sys.platform.startswith('linux') else 'spawn'
+        self.context = multiprocessing.get_context(start_method)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+        self.stats = {'calls': 0, 'inline_calls': 0, 'chunks': 0, 'shared_bytes': 0, 'pickled_bytes': 0, 'startup_ms': None}
+
+    def start(self) -> 'ProcessPool':
+        """Start and warm every worker process"""
+        with self.lock:
+            if self.executor is not None:
+                return self
+            started = time.perf_counter()
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self.context,
+                initializer=_init_worker
+            )
+            # Overlapping sleeps make the executor spawn every worker now
+            pids = {future.result() for future in [self.executor.submit(_warm, 0.05) for _ in range(self.max_workers)]}
+            self.stats['startup_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            logger.info(f"⚙️ Process pool ready: {len(pids)} workers in {self.stats['startup_ms']:.0f}ms")
+        return self
+
+    async def map_chunks(
+        self,
+        func: ChunkFunc,
+        arrays: Dict[str, np.ndarray],
+        rows: int,
+        chunks: Optional[int] = None,
+        **kwargs: Any
+    ) -> List[Any]:
+        """Call `func(arrays, lo, hi, **kwargs)` for each chunk of range(rows) on the workers
+
+        `func` must be a module-level function. Results are returned in
+        chunk order.
+        """
+        if rows < self.inline_rows:
+            self.stats['inline_calls'] += 1
+            return [func(arrays, 0, rows, **kwargs)]
+        if self.executor is None:
+            await asyncio.to_thread(self.start)
+        bounds = chunk_bounds(rows, chunks or self.max_workers * self.chunks_per_worker)
+        shared: Dict[str, SharedArray] = {}
+        inline: Dict[str, np.ndarray] = {}
+        try:
+            for name, array in arrays.items():
+                if array.nbytes >= self.share_threshold:
+                    shared[name] = SharedArray(array)
+                    self.stats['shared_bytes'] += array.nbytes
+                else:
+                    inline[name] = array
+                    self.stats['pickled_bytes'] += array.nbytes * len(bounds)
+            specs = {name: block.spec for name, block in shared.items()}
+            futures = [
+                asyncio.wrap_future(self.executor.submit(_run_chunk, func, specs, inline, lo, hi, kwargs))
+                for lo, hi in bounds
+            ]
+            self.stats['calls'] += 1
+            self.stats['chunks'] += len(futures)
+            try:
+                return await asyncio.gather(*futures)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                # Running chunks may still be reading the shared blocks
+                await asyncio.gather(*futures, return_exceptions=True)
+                raise
+        finally:
+            for block in shared.values():
+                block.close()
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+                self.executor = None
+
+    def __enter__(self) -> 'ProcessPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+_singletons: Dict[str, ProcessPool] = {}
+
+def shared_pool() -> ProcessPool:
+    """The process-wide pool, sized by TESSERACT_PROCESS_WORKERS (default: one per core)"""
+    if 'pool' not in _singletons:
+        _singletons['pool'] = ProcessPool(max_workers=int(os.getenv('TESSERACT_PROCESS_WORKERS', '0')) or None)
+    return _singletons['pool']
+
+def close_shared_pool() -> None:
+    """Stop the process-wide pool if it was ever created"""
+    pool = _singletons.pop('pool', None)
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,239 @@
+"""
+TESSERACT MULTI-PROVIDER FAN-OUT
+Queries every AI provider concurrently, returns as soon as a quorum agrees,
+hedges slow providers and cancels stragglers
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# PROVIDER INTERFACE
+# ============================================================================
+
+class AIProvider:
+    """An AI model provider that can analyze a query
+
+    `analyze` returns a dict with at least 'analysis' (text), 'verdict'
+    (hashable, used to decide agreement) and 'score' (0-100).
+    """
+
+    name = 'provider'
+
+    async def analyze(self, query: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class StaticAIProvider(AIProvider):
+    """Provider answering with a fixed analysis"""
+
+    def __init__(self, name: str, analysis: str, score: float = 92.5, verdict: Hashable = 'consistent'):
+        self.name = name
+        self.analysis = analysis
+        self.score = score
+        self.verdict = verdict
+
+    async def analyze(self, query: str) -> Dict[str, Any]:
+        return {'analysis': self.analysis, 'verdict': self.verdict, 'score': self.score}
+
+
+DEFAULT_AI_PROVIDERS: List[AIProvider] = [
+    StaticAIProvider('openai', 'Analysis from GPT-4o'),
+    StaticAIProvider('gemini', 'Analysis from Gemini 2.5'),
+    StaticAIProvider('cohere', 'Analysis from Command'),
+    StaticAIProvider('grok', 'Analysis from Grok-4'),
+    StaticAIProvider('anthropic', 'Analysis from Claude 3'),
+    StaticAIProvider('openrouter', 'Multi-model consensus'),
+    StaticAIProvider('ollama', 'Local model validation'),
+    StaticAIProvider('huggingface', 'Semantic analysis')
+]
+
+# ============================================================================
+# FAN-OUT ENGINE
+# ============================================================================
+
+class ProviderLatency:
+    """Rolling latency window used to decide when to hedge a provider"""
+
+    def __init__(self, window: int = 100):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.samples) < 10:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class FanOutEngine:
+    """Concurrent fan-out over AI providers with quorum, hedging and cancellation
+
+    All providers are queried at once. A provider still running after its
+    hedge delay (its observed `hedge_percentile` latency, or `hedge_after`
+    until enough samples exist) gets one duplicate request and whichever copy
+    answers first wins. As soon as `quorum` answers share a verdict, the
+    remaining requests are cancelled, so latency tracks the quorum-th fastest
+    provider rather than the slowest.
+    """
+
+    def __init__(
+        self,
+        providers: Optional[List[AIProvider]] = None,
+        quorum: Optional[int] = None,
+        timeout: float = 10.0,
+        hedge_after: Optional[float] = 0.5,
+        hedge_percentile: float = 0.9,
+        consensus_key: Callable[[Dict[str, Any]], Hashable] = lambda answer: answer.get('verdict')
+    ):
+        self.providers = list(providers if providers is not None else DEFAULT_AI_PROVIDERS)
+        if not self.providers:
+            raise ValueError("At least one provider is required")
+        self.quorum = quorum or len(self.providers) // 2 + 1
+        if not 1 <= self.quorum <= len(self.providers):
+            raise ValueError(f"quorum must be between 1 and {len(self.providers)}")
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.hedge_percentile = hedge_percentile
+        self.consensus_key = consensus_key
+        self.latency: Dict[str, ProviderLatency] = {provider.name: ProviderLatency() for provider in self.providers}
+        self.stats = {'fanouts': 0, 'hedges': 0, 'hedge_wins': 0, 'cancelled': 0, 'failures': 0, 'quorum_misses': 0}
+
+    def hedge_delay(self, provider: AIProvider) -> Optional[float]:
+        """Seconds to wait before sending a duplicate request to `provider`"""
+        if self.hedge_after is None:
+            return None
+        observed = self.latency[provider.name].percentile(self.hedge_percentile)
+        return observed if observed is not None else self.hedge_after
+
+    async def _call(self, provider: AIProvider, query: str) -> Tuple[Dict[str, Any], bool]:
+        """Query one provider, hedging once if it is slow; returns (answer, hedged)"""
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(provider.analyze(query))
+        tasks = [primary]
+        try:
+            delay = self.hedge_delay(provider)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.stats['hedges'] += 1
+                    tasks.append(asyncio.ensure_future(provider.analyze(query)))
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.remove(task)
+                    if task.exception() is None:
+                        hedged = task is not primary
+                        self.stats['hedge_wins'] += hedged
+                        self.latency[provider.name].record(time.perf_counter() - started)
+                        return task.result(), hedged
+                    if not tasks:
+                        raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream(self, query: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (provider, outcome) as each provider finishes
+
+        Outcomes carry 'answer' or 'error', plus 'latency_ms' and 'hedged'.
+        Closing the iterator early cancels every outstanding request.
+        """
+        batches = self._batches(query)
+        try:
+            async for batch in batches:
+                for item in batch:
+                    yield item
+        finally:
+            await batches.aclose()
+
+    async def _batches(self, query: str) -> AsyncIterator[List[Tuple[str, Dict[str, Any]]]]:
+        """Yield the outcomes that completed together, batch by batch"""
+        self.stats['fanouts'] += 1
+        origin = time.perf_counter()
+        tasks = {
+            asyncio.ensure_future(self._call(provider, query)): provider.name
+            for provider in self.providers
+        }
+        deadline = origin + self.timeout
+        try:
+            while tasks:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                batch = []
+                for task in done:
+                    name = tasks.pop(task)
+                    outcome: Dict[str, Any] = {'latency_ms': round((time.perf_counter() - origin) * 1000, 3)}
+                    if task.exception() is None:
+                        outcome['answer'], outcome['hedged'] = task.result()
+                    else:
+                        self.stats['failures'] += 1
+                        outcome['error'] = f"{type(task.exception()).__name__}: {task.exception()}"
+                    batch.append((name, outcome))
+                if batch:
+                    yield batch
+        finally:
+            self.stats['cancelled'] += len(tasks)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self, query: str) -> Dict[str, Any]:
+        """Fan out `query` and stop at the first quorum of agreeing answers"""
+        answers: Dict[str, Dict[str, Any]] = {}
+        failed: Dict[str, str] = {}
+        latency_ms: Dict[str, float] = {}
+        hedged: List[str] = []
+        groups: Dict[Hashable, List[str]] = {}
+        winner: Optional[Hashable] = None
+
+        # Outcomes that finish together are all recorded before checking quorum
+        batches = self._batches(query)
+        try:
+            async for batch in batches:
+                for name, outcome in batch:
+                    latency_ms[name] = outcome['latency_ms']
+                    if 'error' in outcome:
+                        failed[name] = outcome['error']
+                        continue
+                    answers[name] = outcome['answer']
+                    if outcome['hedged']:
+                        hedged.append(name)
+                    groups.setdefault(self.consensus_key(outcome['answer']), []).append(name)
+                leader = max(groups, key=lambda key: len(groups[key]), default=None)
+                if leader is not None and len(groups[leader]) >= self.quorum:
+                    winner = leader
+                    break
+        finally:
+            await batches.aclose()
+
+        if winner is None:
+            self.stats['quorum_misses'] += 1
+            if groups:
+                winner = max(groups, key=lambda key: len(groups[key]))
+        agreeing = groups.get(winner, [])
+        cancelled = [p.name for p in self.providers if p.name not in answers and p.name not in failed]
+        return {
+            'ai_analysis': {name: answer['analysis'] for name, answer in answers.items()},
+            'consensus_score': round(sum(answers[name]['score'] for name in agreeing) / len(agreeing), 2) if agreeing else 0.0,
+            'confidence': round(len(agreeing) / len(answers), 4) if answers else 0.0,
+            'quorum': {
+                'required': self.quorum,
+                'reached': len(agreeing) >= self.quorum,
+                'agreeing': agreeing,
+                'failed': failed,
+                'cancelled': cancelled,
+                'hedged': hedged
+            },
+            'latency_ms': latency_ms
+        }
@@ -0,0 +1,357 @@
+"""
+TESSERACT RATE LIMITING ENGINE
+Constant-time token-bucket and sliding-window-counter limiters with bounded client tables,
+plus backends that share one quota between all worker processes on a host
+"""
+
+import asyncio
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, Type
+
+# ============================================================================
+# PER-CLIENT STATE
+# ============================================================================
+
+class TokenBucketSlot:
+    """Token bucket state for one client"""
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class WindowCounterSlot:
+    """Sliding window counter state for one client"""
+
+    __slots__ = ('window_start', 'previous', 'current')
+
+    def __init__(self, window_start: float):
+        self.window_start = window_start
+        self.previous = 0
+        self.current = 0
+
+# ============================================================================
+# LIMITER ENGINES
+# ============================================================================
+
+class LimiterEngine:
+    """Base limiter keeping one compact slot per client in a bounded LRU table
+
+    Every check is O(1): the slot is looked up, updated in place and moved to
+    the end of the table. Idle clients are evicted lazily from the front of
+    the table, a few per check, once their state is indistinguishable from a
+    fresh client; when the table is full the least recently seen client is
+    dropped.
+    """
+
+    evict_batch = 8
+
+    def __init__(
+        self,
+        limit: int,
+        period: float = 60.0,
+        max_clients: int = 100_000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if limit <= 0 or period <= 0:
+            raise ValueError("limit and period must be positive")
+        self.limit = limit
+        self.period = float(period)
+        self.max_clients = max_clients
+        self.clock = clock
+        self.clients: 'OrderedDict[str, object]' = OrderedDict()
+        self.evictions = 0
+
+    @property
+    def idle_after(self) -> float:
+        """Seconds after which a client's slot carries no information"""
+        return self.period
+
+    def allow(self, client_id: str, cost: int = 1) -> bool:
+        """Record a request of `cost` units and return whether it is admitted"""
+        now = self.clock()
+        clients = self.clients
+        slot = clients.get(client_id)
+        if slot is None:
+            self._evict(now)
+            slot = self._new_slot(now)
+            clients[client_id] = slot
+        else:
+            clients.move_to_end(client_id)
+        return self._admit(slot, now, cost)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Evict every idle client and return how many were removed"""
+        now = self.clock() if now is None else now
+        return self._evict(now, limit=len(self.clients))
+
+    def _evict(self, now: float, limit: Optional[int] = None) -> int:
+        """Drop idle clients from the LRU end, then enforce `max_clients`"""
+        clients = self.clients
+        budget = self.evict_batch if limit is None else limit
+        removed = 0
+        cutoff = now - self.idle_after
+        while clients and removed < budget:
+            client_id, slot = next(iter(clients.items()))
+            if self._last_seen(slot) > cutoff:
+                break
+            del clients[client_id]
+            removed += 1
+        while len(clients) >= self.max_clients:
+            clients.popitem(last=False)
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the client table"""
+        return sys.getsizeof(self.clients) + sum(
+            sys.getsizeof(client_id) + sys.getsizeof(slot) for client_id, slot in self.clients.items()
+        )
+
+    def _new_slot(self, now: float):
+        raise NotImplementedError
+
+    def _admit(self, slot, now: float, cost: int) -> bool:
+        raise NotImplementedError
+
+    def _last_seen(self, slot) -> float:
+        raise NotImplementedError
+
+
+class TokenBucketLimiter(LimiterEngine):
+    """Token bucket refilled continuously at `limit / period` tokens per second"""
+
+    def __init__(self, limit: int, period: float = 60.0, **kwargs):
+        super().__init__(limit, period, **kwargs)
+        self.rate = self.limit / self.period
+
+    def _new_slot(self, now: float) -> TokenBucketSlot:
+        return TokenBucketSlot(float(self.limit), now)
+
+    def _admit(self, slot: TokenBucketSlot, now: float, cost: int) -> bool:
+        tokens = slot.tokens + (now - slot.updated) * self.rate
+        if tokens > self.limit:
+            tokens = float(self.limit)
+        slot.updated = now
+        if tokens < cost:
+            slot.tokens = tokens
+            return False
+        slot.tokens = tokens - cost
+        return True
+
+    def _last_seen(self, slot: TokenBucketSlot) -> float:
+        return slot.updated
+
+
+class SlidingWindowCounterLimiter(LimiterEngine):
+    """Sliding window approximated from the current and previous fixed windows"""
+
+    @property
+    def idle_after(self) -> float:
+        return 2 * self.period
+
+    def _new_slot(self, now: float) -> WindowCounterSlot:
+        return WindowCounterSlot(now)
+
+    def _admit(self, slot: WindowCounterSlot, now: float, cost: int) -> bool:
+        elapsed = now - slot.window_start
+        if elapsed >= self.period:
+            windows = int(elapsed // self.period)
+            slot.previous = slot.current if windows == 1 else 0
+            slot.current = 0
+            slot.window_start += windows * self.period
+            elapsed -= windows * self.period
+        weight = 1.0 - elapsed / self.period
+        if slot.previous * weight + slot.current + cost > self.limit:
+            return False
+        slot.current += cost
+        return True
+
+    def _last_seen(self, slot: WindowCounterSlot) -> float:
+        return slot.window_start
+
+# ============================================================================
+# FACTORY
+# ============================================================================
+
+LIMITER_ALGORITHMS: Dict[str, Type[LimiterEngine]] = {
+    'token_bucket': TokenBucketLimiter,
+    'sliding_window': SlidingWindowCounterLimiter
+}
+
+def create_limiter(algorithm: str = 'token_bucket', **kwargs) -> LimiterEngine:
+    """Build a limiter engine by algorithm name"""
+    try:
+        engine_class = LIMITER_ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(
+            f"Unknown rate limiting algorithm {algorithm!r}; "
+            f"expected one of {sorted(LIMITER_ALGORITHMS)}"
+        ) from None
+    return engine_class(**kwargs)
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class LimiterBackend:
+    """Where rate limiting decisions are made"""
+
+    async def acquire(self, client_id: str, cost: int = 1) -> bool:
+        """Consume `cost` units of the client's quota if available"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release resources held by the backend"""
+
+    def nbytes(self) -> int:
+        """Approximate bytes of per-client state held in this process"""
+        return 0
+
+
+class InProcessBackend(LimiterBackend):
+    """Quota held in this process's memory (one quota per worker)"""
+
+    def __init__(self, engine: LimiterEngine):
+        self.engine = engine
+
+    async def acquire(self, client_id: str, cost: int = 1) -> bool:
+        return self.engine.allow(client_id, cost)
+
+    def nbytes(self) -> int:
+        return self.engine.nbytes()
+
+
+class SQLiteBackend(LimiterBackend):
+    """Token buckets in a local SQLite file shared by every worker process
+
+    Workers never touch the database per request. Each worker leases up to
+    `lease_size` tokens from the shared bucket in one transaction and serves
+    requests from that lease locally until it runs out or `lease_ttl` expires;
+    unspent tokens from an expired lease are handed back on the next refill.
+    Leased tokens are already deducted from the shared bucket, so N workers
+    together never admit more than the configured limit. A denial is likewise
+    remembered locally until the shared bucket can have refilled. `lease_size=1` makes
+    every decision exact at the cost of one transaction per request.
+    """
+
+    prune_every = 1000
+
+    def __init__(
+        self,
+        path: str,
+        limit: int,
+        period: float = 60.0,
+        lease_size: Optional[int] = None,
+        lease_ttl: float = 1.0,
+        max_clients: int = 100_000,
+        clock: Callable[[], float] = time.time
+    ):
+        if limit <= 0 or period <= 0:
+            raise ValueError("limit and period must be positive")
+        self.path = path
+        self.limit = limit
+        self.period = float(period)
+        self.rate = limit / self.period
+        self.lease_size = lease_size or max(1, limit // 20)
+        self.lease_ttl = lease_ttl
+        self.max_clients = max_clients
+        self.clock = clock
+        self.leases: 'OrderedDict[str, list]' = OrderedDict()
+        self.round_trips = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            'client_id TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+
+    async def acquire(self, client_id: str, cost: int = 1) -> bool:
+        now = self.clock()
+        lease = self.leases.get(client_id)
+        if lease is not None:
+            if lease[1] > now and lease[0] >= cost:
+                lease[0] -= cost
+                self.leases.move_to_end(client_id)
+                return True
+            if lease[2] > now:
+                return False
+
+        refund = 0
+        if lease is not None and lease[1] <= now:
+            refund, lease[0] = lease[0], 0
+        granted, available = await asyncio.to_thread(
+            self._reserve, client_id, max(cost, self.lease_size), cost, refund
+        )
+
+        lease = self.leases.get(client_id)
+        if lease is None:
+            while len(self.leases) >= self.max_clients:
+                self.leases.popitem(last=False)
+            lease = self.leases[client_id] = [0, 0.0, 0.0]
+        else:
+            self.leases.move_to_end(client_id)
+        now = self.clock()
+        if granted < cost:
+            # Remember the denial until the shared bucket can have refilled
+            lease[2] = now + min(self.lease_ttl, (cost - available) / self.rate)
+            return False
+        lease[0] += granted - cost
+        lease[1] = now + self.lease_ttl
+        return True
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.leases) + sum(
+            sys.getsizeof(client_id) + sys.getsizeof(lease) for client_id, lease in self.leases.items()
+        )
+
+    async def close(self) -> None:
+        """Return every outstanding lease to the shared buckets and close"""
+        refunds = [(client_id, lease[0]) for client_id, lease in self.leases.items() if lease[0] > 0]
+        self.leases.clear()
+        for client_id, tokens in refunds:
+            await asyncio.to_thread(self._reserve, client_id, 0, 0, tokens)
+        with self._lock:
+            self._conn.close()
+
+    def _reserve(self, client_id: str, want: int, minimum: int, refund: float) -> Tuple[int, float]:
+        """Refill the shared bucket, apply `refund` and take up to `want` tokens
+
+        Returns the number of tokens granted and the tokens that were available.
+        """
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = self.clock()
+                row = conn.execute(
+                    'SELECT tokens, updated FROM buckets WHERE client_id = ?', (client_id,)
+                ).fetchone()
+                tokens = float(self.limit) if row is None else row[0] + (now - row[1]) * self.rate
+                tokens = min(float(self.limit), tokens + refund)
+                granted = min(want, int(tokens)) if tokens >= minimum else 0
+                conn.execute(
+                    'INSERT INTO buckets (client_id, tokens, updated) VALUES (?, ?, ?) '
+                    'ON CONFLICT(client_id) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                    (client_id, tokens - granted, now)
+                )
+                self.round_trips += 1
+                if self.round_trips % self.prune_every == 0:
+                    conn.execute('DELETE FROM buckets WHERE updated < ?', (now - self.period,))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return granted, tokens
@@ -0,0 +1,261 @@
+"""
+TESSERACT RESPONSE CACHE
+Async TTL cache bounded by entry count and bytes, with single-flight fetches
+and stale-while-revalidate
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+def make_cache_key(endpoint: str, *parts: Any) -> CacheKey:
+    """Key a cached response by endpoint and a hash of its category/query"""
+    payload = json.dumps(parts, sort_keys=True, default=str).encode()
+    return endpoint, hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def estimate_size(value: Any) -> int:
+    """Approximate the bytes a cached value costs by its JSON encoding"""
+    return len(json.dumps(value, default=str))
+
+# ============================================================================
+# EVICTION POLICIES
+# ============================================================================
+
+class LRUPolicy:
+    """Evict the least recently used key"""
+
+    def __init__(self):
+        self.order: 'OrderedDict[Hashable, None]' = OrderedDict()
+
+    def add(self, key: Hashable) -> None:
+        self.order[key] = None
+
+    def touch(self, key: Hashable) -> None:
+        self.order.move_to_end(key)
+
+    def remove(self, key: Hashable) -> None:
+        self.order.pop(key, None)
+
+    def victim(self) -> Hashable:
+        return next(iter(self.order))
+
+
+class LFUPolicy:
+    """Evict the least frequently used key, oldest first among ties (O(1))"""
+
+    def __init__(self):
+        self.frequency: Dict[Hashable, int] = {}
+        self.buckets: Dict[int, 'OrderedDict[Hashable, None]'] = {}
+        self.min_frequency = 0
+
+    def add(self, key: Hashable) -> None:
+        self.frequency[key] = 1
+        self.buckets.setdefault(1, OrderedDict())[key] = None
+        self.min_frequency = 1
+
+    def touch(self, key: Hashable) -> None:
+        count = self.frequency[key]
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_frequency == count:
+                self.min_frequency = count + 1
+        self.frequency[key] = count + 1
+        self.buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def remove(self, key: Hashable) -> None:
+        count = self.frequency.pop(key, None)
+        if count is None:
+            return
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_frequency == count and self.buckets:
+                self.min_frequency = min(self.buckets)
+
+    def victim(self) -> Hashable:
+        return next(iter(self.buckets[self.min_frequency]))
+
+
+EVICTION_POLICIES = {
+    'lru': LRUPolicy,
+    'lfu': LFUPolicy
+}
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class CacheEntry:
+    """One cached value with its freshness deadlines"""
+
+    __slots__ = ('value', 'size', 'fresh_until', 'stale_until')
+
+    def __init__(self, value: Any, size: int, fresh_until: float, stale_until: float):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class AsyncResponseCache:
+    """Response cache for async upstream fetches
+
+    A fresh entry is returned directly. An entry past its TTL but inside its
+    stale window is returned immediately while one background task refreshes
+    it. On a miss, concurrent callers for the same key share a single
+    upstream fetch. Entries are evicted by `policy` whenever either
+    `max_entries` or `max_bytes` would be exceeded.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl: float = 30.0,
+        stale_ttl: float = 60.0,
+        policy: str = 'lru',
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy!r}; expected one of {sorted(EVICTION_POLICIES)}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.policy_name = policy
+        self.policy = EVICTION_POLICIES[policy]()
+        self.clock = clock
+        self.entries: Dict[Hashable, CacheEntry] = {}
+        self.inflight: Dict[Hashable, asyncio.Future] = {}
+        self.bytes = 0
+        self.counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'oversized': 0
+        }
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """Return the cached value for `key`, fetching it at most once if needed"""
+        now = self.clock()
+        entry = self.entries.get(key)
+        if entry is not None:
+            if now < entry.fresh_until:
+                self.counters['hits'] += 1
+                self.policy.touch(key)
+                return entry.value
+            if now < entry.stale_until:
+                self.counters['stale_hits'] += 1
+                self.policy.touch(key)
+                if key not in self.inflight:
+                    self.counters['refreshes'] += 1
+                    self._start_fetch(key, fetch, ttl).add_done_callback(self._log_refresh_error)
+                return entry.value
+            self._remove(key)
+            self.counters['expirations'] += 1
+
+        pending = self.inflight.get(key)
+        if pending is not None:
+            self.counters['coalesced'] += 1
+            return await asyncio.shield(pending)
+        self.counters['misses'] += 1
+        return await asyncio.shield(self._start_fetch(key, fetch, ttl))
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store `value` under `key`, evicting as needed to stay within bounds"""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            self.counters['oversized'] += 1
+            return
+        if key in self.entries:
+            self._remove(key)
+        while self.entries and (
+            len(self.entries) >= self.max_entries or self.bytes + size > self.max_bytes
+        ):
+            self._remove(self.policy.victim())
+            self.counters['evictions'] += 1
+        now = self.clock()
+        fresh_until = now + (self.ttl if ttl is None else ttl)
+        self.entries[key] = CacheEntry(value, size, fresh_until, fresh_until + self.stale_ttl)
+        self.policy.add(key)
+        self.bytes += size
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop `key` from the cache"""
+        if key not in self.entries:
+            return False
+        self._remove(key)
+        return True
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        for key in list(self.entries):
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current occupancy"""
+        lookups = self.counters['hits'] + self.counters['stale_hits'] + self.counters['misses'] + self.counters['coalesced']
+        served = lookups - self.counters['misses']
+        return {
+            **self.counters,
+            'hit_rate': round(served / lookups, 4) if lookups else 0.0,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'inflight': len(self.inflight),
+            'policy': self.policy_name
+        }
+
+    def _start_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float]
+    ) -> asyncio.Future:
+        """Run `fetch` once as a task whose result fills the cache"""
+        async def run() -> Any:
+            try:
+                value = await fetch()
+                self.put(key, value, ttl)
+                return value
+            finally:
+                self.inflight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        self.inflight[key] = task
+        return task
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self.entries.pop(key)
+        self.policy.remove(key)
+        self.bytes -= entry.size
+
+    def _log_refresh_error(self, task: asyncio.Future) -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.counters['refresh_errors'] += 1
+            logger.warning(f"Background cache refresh failed: {error}")
@@ -0,0 +1,121 @@
+"""
+TESSERACT RESPONSE SNAPSHOTS
+Static endpoint bodies serialized once into bytes (plain and gzip), served with
+ETag/Last-Modified validation and rebuilt only when their source data changes
+"""
+
+import gzip
+import hashlib
+import json
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from instrumentation import span
+
+try:
+    import orjson
+
+    def dumps(value: Any) -> bytes:
+        """Serialize to compact JSON bytes"""
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def dumps(value: Any) -> bytes:
+        """Serialize to compact JSON bytes"""
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str).encode()
+
+MIN_GZIP_BYTES = 512
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip"""
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+class Snapshot:
+    """One pre-serialized response body and its validators"""
+
+    __slots__ = ('body', 'gzip_body', 'etag', 'last_modified', 'modified_at', 'version')
+
+    def __init__(self, payload: Any, version: Hashable):
+        self.body = dumps(payload)
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0) if len(self.body) >= MIN_GZIP_BYTES else None
+        self.etag = f'"{hashlib.blake2b(self.body, digest_size=12).hexdigest()}"'
+        self.modified_at = int(time.time())
+        self.last_modified = formatdate(self.modified_at, usegmt=True)
+        self.version = version
+
+    def not_modified(self, request: Request) -> bool:
+        """Evaluate If-None-Match (preferred) or If-Modified-Since"""
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return '*' in tags or self.etag in tags
+        if_modified_since = request.headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= self.modified_at
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def response(self, request: Request) -> Response:
+        headers = {
+            'ETag': self.etag,
+            'Last-Modified': self.last_modified,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
+        }
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        if self.gzip_body is not None and accepts_gzip(request.headers.get('accept-encoding', '')):
+            headers['Content-Encoding'] = 'gzip'
+            return Response(self.gzip_body, media_type='application/json', headers=headers)
+        return Response(self.body, media_type='application/json', headers=headers)
+
+
+class SnapshotRegistry:
+    """Named snapshots, each rebuilt when its version function's value changes
+
+    `builder` produces the response payload; `version` returns any hashable
+    value identifying the data it was built from (None means the payload only
+    changes when `invalidate` is called).
+    """
+
+    def __init__(self):
+        self.builders: Dict[str, Callable[[], Any]] = {}
+        self.versions: Dict[str, Callable[[], Hashable]] = {}
+        self.snapshots: Dict[str, Snapshot] = {}
+        self.builds = 0
+
+    def register(self, name: str, builder: Callable[[], Any], version: Optional[Callable[[], Hashable]] = None) -> None:
+        self.builders[name] = builder
+        self.versions[name] = version or (lambda: None)
+        self.snapshots.pop(name, None)
+
+    def get(self, name: str) -> Snapshot:
+        """The current snapshot for `name`, rebuilding it if its data changed"""
+        version = self.versions[name]()
+        snapshot = self.snapshots.get(name)
+        if snapshot is None or snapshot.version != version:
+            with span('serialize'):
+                snapshot = self.snapshots[name] = Snapshot(self.builders[name](), version)
+            self.builds += 1
+        return snapshot
+
+    def respond(self, request: Request, name: str) -> Response:
+        """Serve `name` as a full, gzip or 304 response"""
+        return self.get(name).response(request)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Force `name` (or every snapshot) to be rebuilt on next use"""
+        if name is None:
+            self.snapshots.clear()
+        else:
+            self.snapshots.pop(name, None)
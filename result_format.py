@@ -0,0 +1,373 @@
+"""
+TESSERACT BINARY TRAINING RESULTS
+Compact, versioned container for training results with interned strings and
+lazy field access, plus a converter to and from the JSON results files
+
+    python result_format.py to-binary training_results_v4.json training_results_v4.tres
+    python result_format.py to-json training_results_v4.tres training_results_v4.json
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from segment_store import atomic_write
+
+# File layout (little-endian):
+#   header   magic 'TRES', version u16, flags u16, string count u32, record count u32,
+#            index offset u64, string table offset u64
+#   records  one tagged value per result
+#   index    record count + 1 u64 record offsets (the last is the end of the records)
+#   strings  string count + 1 u32 offsets into the UTF-8 blob that follows
+#
+# Values are a one-byte tag and a payload. Maps and lists carry a table of
+# u32 offsets (relative to their tag) to each element, so a reader jumps
+# straight to the field it wants; map keys and short strings are stored once
+# in the string table and referenced by u32 id.
+
+MAGIC = b'TRES'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIQQ')
+FLAG_SINGLE = 1  # the source was one result document, not a list
+
+NONE, FALSE, TRUE, INT, FLOAT, STR, TEXT, MAP, LIST = range(9)
+MAX_INTERNED = 64
+
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_COUNT = struct.Struct('<BI')
+_PAIR = struct.Struct('<II')
+
+class FormatError(ValueError):
+    """Not a (supported) binary results file"""
+
+# ============================================================================
+# ENCODER
+# ============================================================================
+
+class _Encoder:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, string: str) -> int:
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def encode(self, value: Any, out: bytearray) -> None:
+        if value is None:
+            out.append(NONE)
+        elif value is True:
+            out.append(TRUE)
+        elif value is False:
+            out.append(FALSE)
+        elif isinstance(value, int):
+            if not -(1 << 63) <= value < 1 << 63:
+                raise ValueError(f"Integer {value} does not fit in 64 bits")
+            out.append(INT)
+            out += _I64.pack(value)
+        elif isinstance(value, float):
+            out.append(FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, str):
+            if len(value) <= MAX_INTERNED:
+                out.append(STR)
+                out += _U32.pack(self.intern(value))
+            else:
+                data = value.encode()
+                out.append(TEXT)
+                out += _U32.pack(len(data))
+                out += data
+        elif isinstance(value, Mapping):
+            start = len(out)
+            out += _COUNT.pack(MAP, len(value))
+            table = len(out)
+            out += bytes(_PAIR.size * len(value))
+            for i, (key, item) in enumerate(value.items()):
+                _PAIR.pack_into(out, table + i * _PAIR.size, self.intern(str(key)), len(out) - start)
+                self.encode(item, out)
+        elif isinstance(value, (list, tuple)):
+            start = len(out)
+            out += _COUNT.pack(LIST, len(value))
+            table = len(out)
+            out += bytes(_U32.size * len(value))
+            for i, item in enumerate(value):
+                _U32.pack_into(out, table + i * _U32.size, len(out) - start)
+                self.encode(item, out)
+        else:
+            # Same fallback as json.dumps(..., default=str)
+            self.encode(str(value), out)
+
+def encode_results(results: Iterable[Any], single: bool = False) -> bytes:
+    """Binary file contents holding `results` in order"""
+    encoder = _Encoder()
+    out = bytearray(HEADER.size)
+    offsets = []
+    for result in results:
+        offsets.append(len(out))
+        encoder.encode(result, out)
+    offsets.append(len(out))
+
+    index_offset = len(out)
+    out += struct.pack(f'<{len(offsets)}Q', *offsets)
+    strings_offset = len(out)
+    blobs = [string.encode() for string in encoder.strings]
+    positions = [0]
+    for blob in blobs:
+        positions.append(positions[-1] + len(blob))
+    out += struct.pack(f'<{len(positions)}I', *positions)
+    out += b''.join(blobs)
+
+    HEADER.pack_into(
+        out, 0, MAGIC, VERSION, FLAG_SINGLE if single else 0,
+        len(encoder.strings), len(offsets) - 1, index_offset, strings_offset
+    )
+    return bytes(out)
+
+def write_results(path: str, results: Iterable[Any], single: bool = False) -> None:
+    """Write results to a binary file atomically"""
+    atomic_write(path, encode_results(results, single))
+
+# ============================================================================
+# LAZY READER
+# ============================================================================
+
+class LazyMap(Mapping):
+    """A stored map whose values are decoded only when accessed"""
+
+    __slots__ = ('file', 'offset', '_fields')
+
+    def __init__(self, file: 'ResultFile', offset: int):
+        self.file = file
+        self.offset = offset
+        self._fields: Optional[Dict[int, int]] = None
+
+    def _table(self) -> Dict[int, int]:
+        """Key id -> absolute value offset, in stored order"""
+        if self._fields is None:
+            count = _U32.unpack_from(self.file.buffer, self.offset + 1)[0]
+            pairs = struct.unpack_from(f'<{2 * count}I', self.file.buffer, self.offset + 5)
+            self._fields = {pairs[i]: self.offset + pairs[i + 1] for i in range(0, len(pairs), 2)}
+        return self._fields
+
+    def __getitem__(self, key: str) -> Any:
+        string_id = self.file.string_id(key)
+        offset = self._table().get(string_id) if string_id is not None else None
+        if offset is None:
+            raise KeyError(key)
+        return self.file.value(offset)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.file.string(string_id) for string_id in self._table())
+
+    def __len__(self) -> int:
+        return _U32.unpack_from(self.file.buffer, self.offset + 1)[0]
+
+    def to_python(self) -> Dict[str, Any]:
+        return self.file.decode(self.offset)
+
+    def __repr__(self) -> str:
+        return f"LazyMap({len(self)} keys)"
+
+
+class LazyList(Sequence):
+    """A stored list whose items are decoded only when accessed"""
+
+    __slots__ = ('file', 'offset', 'count')
+
+    def __init__(self, file: 'ResultFile', offset: int):
+        self.file = file
+        self.offset = offset
+        self.count = _U32.unpack_from(file.buffer, offset + 1)[0]
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self.count))]
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        relative = _U32.unpack_from(self.file.buffer, self.offset + 5 + 4 * position)[0]
+        return self.file.value(self.offset + relative)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_python(self) -> List[Any]:
+        return self.file.decode(self.offset)
+
+    def __repr__(self) -> str:
+        return f"LazyList({self.count} items)"
+
+
+class ResultFile:
+    """Memory-mapped binary results file
+
+    Opening reads only the header. `results[i]` returns the i-th result as a
+    LazyMap (or a scalar), and nested maps and lists decode lazily too, so
+    reading one field of one run touches only the bytes on its path.
+    `decode(i)` / `to_python()` build plain Python objects.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < HEADER.size:
+            raise FormatError(f"{path} is too short to be a binary results file")
+        magic, version, self.flags, self.string_count, self.count, self.index_offset, self.strings_offset = (
+            HEADER.unpack_from(self.buffer, 0)
+        )
+        if magic != MAGIC:
+            raise FormatError(f"{path} is not a binary results file")
+        if version > VERSION:
+            raise FormatError(f"{path} uses format version {version}; this reader supports up to {VERSION}")
+        self.blob_offset = self.strings_offset + 4 * (self.string_count + 1)
+        self._strings: List[Optional[str]] = [None] * self.string_count
+        self._ids: Optional[Dict[str, int]] = None
+
+    @property
+    def single(self) -> bool:
+        return bool(self.flags & FLAG_SINGLE)
+
+    def string(self, string_id: int) -> str:
+        string = self._strings[string_id]
+        if string is None:
+            start, end = struct.unpack_from('<2I', self.buffer, self.strings_offset + 4 * string_id)
+            string = self._strings[string_id] = self.buffer[self.blob_offset + start:self.blob_offset + end].decode()
+        return string
+
+    def string_id(self, string: str) -> Optional[int]:
+        if self._ids is None:
+            self._ids = {self.string(string_id): string_id for string_id in range(self.string_count)}
+        return self._ids.get(string)
+
+    def value(self, offset: int) -> Any:
+        """The value stored at `offset`, with maps and lists left lazy"""
+        tag = self.buffer[offset]
+        if tag == MAP:
+            return LazyMap(self, offset)
+        if tag == LIST:
+            return LazyList(self, offset)
+        return self._scalar(tag, offset)
+
+    def _scalar(self, tag: int, offset: int) -> Any:
+        if tag == STR:
+            return self.string(_U32.unpack_from(self.buffer, offset + 1)[0])
+        if tag == INT:
+            return _I64.unpack_from(self.buffer, offset + 1)[0]
+        if tag == FLOAT:
+            return _F64.unpack_from(self.buffer, offset + 1)[0]
+        if tag == NONE:
+            return None
+        if tag == TRUE:
+            return True
+        if tag == FALSE:
+            return False
+        if tag == TEXT:
+            length = _U32.unpack_from(self.buffer, offset + 1)[0]
+            return self.buffer[offset + 5:offset + 5 + length].decode()
+        raise FormatError(f"Unknown value tag {tag} at offset {offset}")
+
+    def decode(self, offset: int) -> Any:
+        """Fully decode the value stored at `offset`"""
+        tag = self.buffer[offset]
+        if tag == MAP:
+            count = _U32.unpack_from(self.buffer, offset + 1)[0]
+            pairs = struct.unpack_from(f'<{2 * count}I', self.buffer, offset + 5)
+            return {self.string(pairs[i]): self.decode(offset + pairs[i + 1]) for i in range(0, len(pairs), 2)}
+        if tag == LIST:
+            count = _U32.unpack_from(self.buffer, offset + 1)[0]
+            return [self.decode(offset + relative) for relative in struct.unpack_from(f'<{count}I', self.buffer, offset + 5)]
+        return self._scalar(tag, offset)
+
+    def _record_offset(self, position: int) -> int:
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        return _U64.unpack_from(self.buffer, self.index_offset + 8 * position)[0]
+
+    def __getitem__(self, position: int) -> Any:
+        return self.value(self._record_offset(position))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Any]:
+        for position in range(self.count):
+            yield self[position]
+
+    def to_python(self) -> Any:
+        """Every result as plain Python objects (one document if the source was one)"""
+        results = [self.decode(self._record_offset(position)) for position in range(self.count)]
+        return results[0] if self.single and results else results
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    def __enter__(self) -> 'ResultFile':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+# ============================================================================
+# JSON CONVERSION
+# ============================================================================
+
+def load_json_results(path: str) -> List[Any]:
+    """Results from a JSON document, a JSON list or a training_cli NDJSON run record"""
+    with open(path) as handle:
+        text = handle.read()
+    try:
+        document = json.loads(text)
+    except json.JSONDecodeError:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        return [record['result'] if record.get('record') == 'result' else record for record in records
+                if record.get('record') in (None, 'result')]
+    return document if isinstance(document, list) else [document]
+
+def json_to_binary(json_path: str, binary_path: str) -> int:
+    """Convert a JSON results file to the binary format; returns the number of results"""
+    with open(json_path) as handle:
+        first = handle.read(1 << 16).lstrip()[:1]
+    results = load_json_results(json_path)
+    write_results(binary_path, results, single=first == '{' and len(results) == 1)
+    return len(results)
+
+def binary_to_json(binary_path: str, json_path: str, indent: Optional[int] = 2) -> int:
+    """Convert a binary results file back to JSON; returns the number of results"""
+    with ResultFile(binary_path) as results:
+        document = results.to_python()
+        count = len(results)
+    atomic_write(json_path, json.dumps(document, indent=indent).encode())
+    return count
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Convert training results between JSON and the binary format"""
+    parser = argparse.ArgumentParser(description="Convert TESSERACT training results between JSON and binary")
+    parser.add_argument('direction', choices=['to-binary', 'to-json'])
+    parser.add_argument('source')
+    parser.add_argument('destination')
+    args = parser.parse_args(argv)
+    try:
+        if args.direction == 'to-binary':
+            count = json_to_binary(args.source, args.destination)
+        else:
+            count = binary_to_json(args.source, args.destination)
+    except (OSError, ValueError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Converted {count} result(s) to {args.destination}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+"""
+TESSERACT RUN HISTORY
+Every training run's result in a local SQLite index, queryable by version,
+time range and metric, with run diffs and metric trends
+
+    python run_history.py import training_results_v4.json
+    python run_history.py list --version 2.0 --limit 20
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Result sections whose leaves are indexed as metrics ('<section>.<name>')
+METRIC_SECTIONS = ('training_metrics', 'performance_targets_v4', 'performance_improvements')
+
+# Leading number of targets like '50x faster' or '99.5%+'
+_NUMBER = re.compile(r'[-+]?\d+(?:\.\d+)?')
+
+# Trend bucket -> length of the ISO timestamp prefix it groups by
+BUCKETS = {'minute': 16, 'hour': 13, 'day': 10, 'month': 7, 'year': 4}
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS runs ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, trainer TEXT, version TEXT, timestamp TEXT NOT NULL, '
+    'recorded_at TEXT NOT NULL, source TEXT)',
+    'CREATE TABLE IF NOT EXISTS run_results (run_id INTEGER PRIMARY KEY, result TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS metrics ('
+    'key TEXT NOT NULL, timestamp TEXT NOT NULL, run_id INTEGER NOT NULL, value REAL, text TEXT, '
+    'PRIMARY KEY (key, timestamp, run_id)) WITHOUT ROWID',
+    # Listing pages are answered from these indexes alone
+    'CREATE INDEX IF NOT EXISTS runs_by_time ON runs (timestamp, version, trainer, source)',
+    'CREATE INDEX IF NOT EXISTS runs_by_version ON runs (version, timestamp, trainer, source)',
+    'CREATE INDEX IF NOT EXISTS metrics_by_run ON metrics (run_id)'
+)
+
+def version_label(version: Any) -> Optional[str]:
+    """Versions are stored as text: 2.0 -> '2.0', '3.0 → 4.0' unchanged"""
+    return None if version is None else str(version)
+
+def extract_metrics(result: Dict[str, Any]) -> Dict[str, Tuple[Optional[float], Optional[str]]]:
+    """'<section>.<name>' -> (numeric value, original text) for every indexed metric"""
+    metrics = {}
+    for section in METRIC_SECTIONS:
+        values = result.get(section)
+        if not isinstance(values, dict):
+            continue
+        for name, value in values.items():
+            key = f"{section}.{name}"
+            if isinstance(value, bool):
+                metrics[key] = (float(value), None)
+            elif isinstance(value, (int, float)):
+                metrics[key] = (float(value), None)
+            elif isinstance(value, str):
+                match = _NUMBER.search(value)
+                metrics[key] = (float(match.group()) if match else None, value)
+    return metrics
+
+def flatten(document: Any, prefix: str = '') -> Dict[str, Any]:
+    """Leaf values of nested dicts keyed by dotted path; lists are leaves"""
+    if not isinstance(document, dict) or (prefix and not document):
+        return {prefix: document}
+    leaves = {}
+    for key, value in document.items():
+        leaves.update(flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+    return leaves
+
+def encode_cursor(timestamp: str, run_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([timestamp, run_id]).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        timestamp, run_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return str(timestamp), int(run_id)
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"Invalid cursor {cursor!r}") from error
+
+class RunHistory:
+    """Training results indexed in a local SQLite file
+
+    Runs are ordered newest first by (timestamp, id) and paged by keyset:
+    each page ends with a cursor holding the last row's key, and the next
+    page starts strictly after it, so page N costs the same as page 1 however
+    large the history grows. Metrics from METRIC_SECTIONS are stored once per
+    run under a (key, timestamp) index for range filters and trends; full
+    results live in their own table and are read only when asked for.
+    Safe to share between threads; several processes may write the same file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+    def record(self, result: Dict[str, Any], trainer: Optional[str] = None, source: Optional[str] = None) -> int:
+        """Store one run's result; returns its run ID"""
+        timestamp = str(result.get('timestamp') or datetime.now().isoformat())
+        document = json.dumps(result, default=str)
+        metrics = extract_metrics(result)
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                run_id = self._conn.execute(
+                    'INSERT INTO runs (trainer, version, timestamp, recorded_at, source) VALUES (?, ?, ?, ?, ?)',
+                    (trainer, version_label(result.get('version')), timestamp, datetime.now().isoformat(), source)
+                ).lastrowid
+                self._conn.execute('INSERT INTO run_results (run_id, result) VALUES (?, ?)', (run_id, document))
+                self._conn.executemany(
+                    'INSERT INTO metrics (key, timestamp, run_id, value, text) VALUES (?, ?, ?, ?, ?)',
+                    [(key, timestamp, run_id, value, text) for key, (value, text) in metrics.items()]
+                )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return run_id
+
+    def query(
+        self,
+        version: Optional[str] = None,
+        trainer: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        metric: Optional[str] = None,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        include_result: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of runs, newest first, and the cursor of the next page (None on the last)
+
+        `since` and `until` bound the run timestamp (inclusive, ISO 8601).
+        `metric` keeps runs that recorded that metric, within
+        [`min_value`, `max_value`] when given.
+        """
+        clauses, params = [], []
+        if version is not None:
+            clauses.append('runs.version = ?')
+            params.append(version)
+        if trainer is not None:
+            clauses.append('runs.trainer = ?')
+            params.append(trainer)
+        if since is not None:
+            clauses.append('runs.timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('runs.timestamp <= ?')
+            params.append(until)
+        if metric is not None:
+            condition = 'metrics.key = ? AND metrics.timestamp = runs.timestamp AND metrics.run_id = runs.id'
+            params.append(metric)
+            if min_value is not None:
+                condition += ' AND metrics.value >= ?'
+                params.append(min_value)
+            if max_value is not None:
+                condition += ' AND metrics.value <= ?'
+                params.append(max_value)
+            clauses.append(f'EXISTS (SELECT 1 FROM metrics WHERE {condition})')
+        if cursor is not None:
+            timestamp, run_id = decode_cursor(cursor)
+            clauses.append('(runs.timestamp, runs.id) < (?, ?)')
+            params.extend((timestamp, run_id))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT runs.id, runs.trainer, runs.version, runs.timestamp, runs.source FROM runs '
+                f'{where} ORDER BY runs.timestamp DESC, runs.id DESC LIMIT ?',
+                (*params, limit + 1)
+            ).fetchall()
+            runs = [dict(row) for row in rows[:limit]]
+            self._attach(runs, include_result)
+        next_cursor = encode_cursor(runs[-1]['timestamp'], runs[-1]['id']) if len(rows) > limit else None
+        return runs, next_cursor
+
+    def _attach(self, runs: List[Dict[str, Any]], include_result: bool) -> None:
+        """Add each run's metrics (and result) in place; caller holds the lock"""
+        if not runs:
+            return
+        by_id = {run['id']: run for run in runs}
+        for run in runs:
+            run['metrics'] = {}
+        marks = ','.join('?' * len(by_id))
+        for row in self._conn.execute(f'SELECT run_id, key, value, text FROM metrics WHERE run_id IN ({marks})', tuple(by_id)):
+            by_id[row['run_id']]['metrics'][row['key']] = row['text'] if row['text'] is not None else row['value']
+        if include_result:
+            for row in self._conn.execute(f'SELECT run_id, result FROM run_results WHERE run_id IN ({marks})', tuple(by_id)):
+                by_id[row['run_id']]['result'] = json.loads(row['result'])
+
+    def get(self, run_id: int, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, trainer, version, timestamp, recorded_at, source FROM runs WHERE id = ?', (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            run = dict(row)
+            self._attach([run], include_result)
+        return run
+
+    def diff(self, from_id: int, to_id: int) -> Optional[Dict[str, Any]]:
+        """Leaf-level changes between two runs' results; None if either is unknown"""
+        before, after = self.get(from_id), self.get(to_id)
+        if before is None or after is None:
+            return None
+        old, new = flatten(before['result']), flatten(after['result'])
+        changed = {}
+        for path in old.keys() & new.keys():
+            if old[path] != new[path]:
+                change = {'from': old[path], 'to': new[path]}
+                if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in (old[path], new[path])):
+                    change['delta'] = new[path] - old[path]
+                changed[path] = change
+        metrics = {}
+        for key in sorted(before['metrics'].keys() | after['metrics'].keys()):
+            if before['metrics'].get(key) != after['metrics'].get(key):
+                metrics[key] = {'from': before['metrics'].get(key), 'to': after['metrics'].get(key)}
+        return {
+            'from': {key: before[key] for key in ('id', 'trainer', 'version', 'timestamp')},
+            'to': {key: after[key] for key in ('id', 'trainer', 'version', 'timestamp')},
+            'added': {path: new[path] for path in sorted(new.keys() - old.keys())},
+            'removed': {path: old[path] for path in sorted(old.keys() - new.keys())},
+            'changed': dict(sorted(changed.items())),
+            'metrics': metrics
+        }
+
+    def trend(
+        self,
+        metric: str,
+        bucket: str = 'day',
+        version: Optional[str] = None,
+        trainer: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """count/min/max/avg of `metric` per time bucket, oldest first"""
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket {bucket!r}; expected one of {sorted(BUCKETS)}")
+        clauses, params = ['metrics.key = ?', 'metrics.value IS NOT NULL'], [metric]
+        if since is not None:
+            clauses.append('metrics.timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('metrics.timestamp <= ?')
+            params.append(until)
+        join = ''
+        if version is not None or trainer is not None:
+            join = 'JOIN runs ON runs.id = metrics.run_id'
+            if version is not None:
+                clauses.append('runs.version = ?')
+                params.append(version)
+            if trainer is not None:
+                clauses.append('runs.trainer = ?')
+                params.append(trainer)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT substr(metrics.timestamp, 1, {BUCKETS[bucket]}) AS bucket, count(*) AS runs, '
+                'min(metrics.value) AS min, max(metrics.value) AS max, avg(metrics.value) AS avg '
+                f'FROM metrics {join} WHERE {" AND ".join(clauses)} GROUP BY bucket ORDER BY bucket',
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def metric_keys(self) -> List[str]:
+        with self._lock:
+            # Skip-scan the primary key instead of reading every metric row
+            keys, row = [], self._conn.execute('SELECT min(key) FROM metrics').fetchone()
+            while row[0] is not None:
+                keys.append(row[0])
+                row = self._conn.execute('SELECT min(key) FROM metrics WHERE key > ?', (row[0],)).fetchone()
+        return keys
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            runs = self._conn.execute('SELECT count(*) FROM runs').fetchone()[0]
+            versions = dict(self._conn.execute('SELECT version, count(*) FROM runs GROUP BY version').fetchall())
+        return {'path': self.path, 'runs': runs, 'versions': versions}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> 'RunHistory':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def default_path() -> str:
+    """TESSERACT_RUN_HISTORY_DB, else run_history.db in TESSERACT_DATA_DIR, else training_runs.db"""
+    data_dir = os.getenv('TESSERACT_DATA_DIR')
+    return os.getenv('TESSERACT_RUN_HISTORY_DB') or (os.path.join(data_dir, 'run_history.db') if data_dir else 'training_runs.db')
+
+def record_run(history: Optional[RunHistory], result: Dict[str, Any], trainer: Optional[str] = None, source: Optional[str] = None) -> Optional[int]:
+    """Record a finished run, logging rather than raising if the index is unavailable"""
+    if history is None:
+        return None
+    try:
+        return history.record(result, trainer=trainer, source=source)
+    except sqlite3.Error as error:
+        logger.warning(f"⚠️ Could not record training run in {history.path}: {error}")
+        return None
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Import results into the run history or list stored runs"""
+    parser = argparse.ArgumentParser(description="TESSERACT training run history")
+    parser.add_argument('--db', default=None, help="history database (default: $TESSERACT_RUN_HISTORY_DB or training_runs.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    imports = commands.add_parser('import', help="record results from JSON, NDJSON or binary results files")
+    imports.add_argument('files', nargs='+')
+    imports.add_argument('--trainer')
+    listing = commands.add_parser('list', help="print stored runs, newest first")
+    listing.add_argument('--version')
+    listing.add_argument('--trainer')
+    listing.add_argument('--since')
+    listing.add_argument('--until')
+    listing.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    from result_format import FormatError, ResultFile, load_json_results
+
+    with RunHistory(args.db or default_path()) as history:
+        if args.command == 'import':
+            for path in args.files:
+                try:
+                    with ResultFile(path) as stored:
+                        results = [result.to_python() for result in stored]
+                except FormatError:
+                    results = load_json_results(path)
+                for result in results:
+                    history.record(result, trainer=args.trainer, source=path)
+                print(f"✅ Imported {len(results)} run(s) from {path}")
+        else:
+            runs, _ = history.query(args.version, args.trainer, args.since, args.until, limit=args.limit)
+            for run in runs:
+                print(json.dumps(run, default=str))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
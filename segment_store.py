@@ -0,0 +1,445 @@
+"""
+TESSERACT SEGMENT STORE
+Append-only on-disk persistence for training data: fixed-width binary segments
+read zero-copy through numpy.memmap, rotated and compacted in the background
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # no advisory locks on Windows, so the data directory is not guarded there
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b'TSSG'
+SEGMENT_VERSION = 1
+HEADER_PREFIX = struct.Struct('<4sHHI')  # magic, version, feature count, header bytes
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Write `data` to `path` via a temporary file and rename"""
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+# ============================================================================
+# SEGMENT FILES
+# ============================================================================
+
+def record_dtype(features: Sequence[str]) -> np.dtype:
+    """Fixed-width record: int64 epoch-ms timestamp followed by float64 features"""
+    return np.dtype([('timestamp', '<i8')] + [(feature, '<f8') for feature in features])
+
+def segment_header(features: Sequence[str]) -> bytes:
+    """Header naming the features, padded so records start 8-byte aligned"""
+    names = json.dumps(list(features)).encode()
+    size = HEADER_PREFIX.size + len(names)
+    size += -size % 8
+    return HEADER_PREFIX.pack(SEGMENT_MAGIC, SEGMENT_VERSION, len(features), size) + names.ljust(size - HEADER_PREFIX.size, b' ')
+
+def read_segment_header(path: str) -> Dict[str, Any]:
+    with open(path, 'rb') as handle:
+        magic, version, count, size = HEADER_PREFIX.unpack(handle.read(HEADER_PREFIX.size))
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+            raise ValueError(f"{path} is not a v{SEGMENT_VERSION} segment file")
+        features = json.loads(handle.read(size - HEADER_PREFIX.size))
+    if len(features) != count:
+        raise ValueError(f"{path} has a corrupt header")
+    return {'features': features, 'header_bytes': size}
+
+def map_segment(path: str, dtype: np.dtype, header_bytes: int) -> np.ndarray:
+    """Zero-copy, read-only view of every complete record in a segment file"""
+    count = (os.path.getsize(path) - header_bytes) // dtype.itemsize
+    if count <= 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=header_bytes, shape=(count,))
+
+# ============================================================================
+# SEGMENTED SERIES
+# ============================================================================
+
+class SegmentedSeries:
+    """One source's fixed-width records spread over rotating segment files
+
+    Writes go to a single active segment opened for append. Once it holds
+    `segment_records` records it is sealed: its timestamp range is recorded in
+    `index.json` and a new active segment starts. When `compact_threshold`
+    sealed segments accumulate, a background thread merges them into one
+    time-sorted segment and swaps the index atomically. Reopening only reads
+    the index and maps the files, so it costs milliseconds regardless of size.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        features: Sequence[str],
+        segment_records: int = 1 << 20,
+        compact_threshold: int = 8,
+        source: Optional[str] = None
+    ):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+
+        index_path = os.path.join(directory, 'index.json')
+        if os.path.exists(index_path):
+            with open(index_path) as handle:
+                self.index = json.load(handle)
+            if self.index['features'] != list(features):
+                raise ValueError(f"{directory} stores features {self.index['features']}, not {list(features)}")
+        else:
+            self.index = {'features': list(features), 'sealed': [], 'active': None, 'next_id': 0}
+        # The directory name may be sanitized, so the index keeps the source's real name
+        self.source = self.index.setdefault('source', source or os.path.basename(directory))
+        self.features = list(self.index['features'])
+        self.dtype = record_dtype(self.features)
+        self.header = segment_header(self.features)
+        self._maps: Dict[str, np.ndarray] = {}
+        self._open_active()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _save_index(self) -> None:
+        atomic_write(self._path('index.json'), json.dumps(self.index).encode())
+
+    def _open_active(self) -> None:
+        """Open (or create) the active segment, dropping any torn trailing record"""
+        name = self.index['active']
+        if name is None:
+            name = self.index['active'] = f"seg-{self.index['next_id']:06d}.bin"
+            self.index['next_id'] += 1
+            with open(self._path(name), 'wb') as handle:
+                handle.write(self.header)
+            self._save_index()
+        path = self._path(name)
+        if read_segment_header(path)['features'] != self.features:
+            raise ValueError(f"{path} does not match the features in {self.directory}/index.json")
+        records = (os.path.getsize(path) - len(self.header)) // self.dtype.itemsize
+        complete = len(self.header) + records * self.dtype.itemsize
+        if os.path.getsize(path) != complete:
+            logger.warning(f"Truncating torn record at the end of {path}")
+            os.truncate(path, complete)
+        self._active = open(path, 'ab')
+        self._active_count = records
+
+    def append(self, timestamp: int, values: Mapping[str, float]) -> None:
+        """Append one record"""
+        record = np.zeros(1, dtype=self.dtype)
+        record['timestamp'] = timestamp
+        for feature in self.features:
+            record[feature] = values.get(feature, np.nan)
+        self._write(record)
+
+    def extend(self, timestamps: Sequence[int], values: Mapping[str, Sequence[float]]) -> None:
+        """Append a batch of records column-wise"""
+        records = np.empty(len(timestamps), dtype=self.dtype)
+        records['timestamp'] = timestamps
+        for feature in self.features:
+            records[feature] = values[feature] if feature in values else np.nan
+        self._write(records)
+
+    def _write(self, records: np.ndarray) -> None:
+        with self._lock:
+            offset = 0
+            while offset < len(records):
+                room = self.segment_records - self._active_count
+                chunk = records[offset:offset + room]
+                self._active.write(chunk.tobytes())
+                self._active_count += len(chunk)
+                offset += len(chunk)
+                if self._active_count >= self.segment_records:
+                    self._rotate()
+
+    def flush(self) -> None:
+        """Push buffered appends to the operating system"""
+        with self._lock:
+            self._active.flush()
+
+    def _rotate(self) -> None:
+        """Seal the active segment and start a new one"""
+        self._active.close()
+        name = self.index['active']
+        records = map_segment(self._path(name), self.dtype, len(self.header))
+        timestamps = records['timestamp']
+        self.index['sealed'].append({
+            'name': name,
+            'count': len(records),
+            'min_ts': int(timestamps.min()) if len(records) else 0,
+            'max_ts': int(timestamps.max()) if len(records) else 0,
+            'sorted': bool(np.all(timestamps[1:] >= timestamps[:-1]))
+        })
+        self.index['active'] = None
+        self._open_active()
+        if len(self.index['sealed']) >= self.compact_threshold and (self._compactor is None or not self._compactor.is_alive()):
+            self._compactor = threading.Thread(target=self.compact, name=f"compact-{self.directory}", daemon=True)
+            self._compactor.start()
+
+    def compact(self) -> None:
+        """Merge every sealed segment into one time-sorted segment"""
+        with self._lock:
+            sealed = list(self.index['sealed'])
+            if len(sealed) < 2:
+                return
+            name = f"seg-{self.index['next_id']:06d}.bin"
+            self.index['next_id'] += 1
+        started = time.perf_counter()
+        merged = np.concatenate([self._map(segment['name']) for segment in sealed])
+        merged = merged[np.argsort(merged['timestamp'], kind='stable')]
+        atomic_write(self._path(name), self.header + merged.tobytes())
+        with self._lock:
+            self.index['sealed'] = [{
+                'name': name,
+                'count': len(merged),
+                'min_ts': int(merged['timestamp'][0]),
+                'max_ts': int(merged['timestamp'][-1]),
+                'sorted': True
+            }] + self.index['sealed'][len(sealed):]
+            self._save_index()
+            for segment in sealed:
+                self._maps.pop(segment['name'], None)
+                os.remove(self._path(segment['name']))
+        logger.info(f"🗜️ Compacted {len(sealed)} segments ({len(merged)} records) in {time.perf_counter() - started:.2f}s")
+
+    def wait_for_compaction(self) -> None:
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def _map(self, name: str) -> np.ndarray:
+        """Memory-map a sealed segment, caching the mapping"""
+        mapped = self._maps.get(name)
+        if mapped is None:
+            mapped = self._maps[name] = map_segment(self._path(name), self.dtype, len(self.header))
+        return mapped
+
+    def _active_records(self) -> np.ndarray:
+        """Zero-copy view of the records written to the active segment so far"""
+        with self._lock:
+            self._active.flush()
+            name = self.index['active']
+        return map_segment(self._path(name), self.dtype, len(self.header))
+
+    def segments(self) -> Iterator[np.ndarray]:
+        """Zero-copy record arrays for every segment, oldest first"""
+        with self._lock:
+            sealed = list(self.index['sealed'])
+        for segment in sealed:
+            yield self._map(segment['name'])
+        yield self._active_records()
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Records with start <= timestamp < end, in time order
+
+        A range that falls inside one sorted sealed segment is returned as a
+        zero-copy view of the mapped file.
+        """
+        lo = np.iinfo(np.int64).min if start is None else start
+        hi = np.iinfo(np.int64).max if end is None else end
+        with self._lock:
+            sealed = list(self.index['sealed'])
+        parts = [
+            (self._map(segment['name']), segment['sorted'])
+            for segment in sealed
+            if segment['max_ts'] >= lo and segment['min_ts'] < hi
+        ]
+        parts.append((self._active_records(), False))
+
+        selected = []
+        for records, is_sorted in parts:
+            timestamps = records['timestamp']
+            if is_sorted:
+                first, last = np.searchsorted(timestamps, [lo, hi], side='left')
+                if last > first:
+                    selected.append((records[first:last], True))
+            else:
+                mask = (timestamps >= lo) & (timestamps < hi)
+                if mask.any():
+                    selected.append((records[mask], False))
+        if not selected:
+            return np.empty(0, dtype=self.dtype)
+        if len(selected) == 1 and selected[0][1]:
+            return selected[0][0]
+        merged = np.concatenate([records for records, _ in selected])
+        return merged[np.argsort(merged['timestamp'], kind='stable')]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(segment['count'] for segment in self.index['sealed']) + self._active_count
+
+    def close(self) -> None:
+        self.wait_for_compaction()
+        with self._lock:
+            self._active.close()
+            self._save_index()
+            self._maps.clear()
+
+# ============================================================================
+# RECORD LOG
+# ============================================================================
+
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('length', '<u4'), ('timestamp', '<f8')])
+
+class RecordLog:
+    """Append-only log of JSON documents with a fixed-width, memory-mapped index
+
+    Payloads go to `records.dat`; each append adds one (offset, length,
+    timestamp) entry to `records.idx`. Opening maps the index without
+    reading any payload, and documents are decoded only when accessed.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._data_path = os.path.join(directory, 'records.dat')
+        self._index_path = os.path.join(directory, 'records.idx')
+        self._lock = threading.Lock()
+        for path in (self._data_path, self._index_path):
+            open(path, 'ab').close()
+        # Drop index entries whose payload never made it to disk
+        index = map_segment(self._index_path, INDEX_DTYPE, 0)
+        data_size = os.path.getsize(self._data_path)
+        valid = int(np.searchsorted(index['offset'] + index['length'], data_size, side='right')) if len(index) else 0
+        os.truncate(self._index_path, valid * INDEX_DTYPE.itemsize)
+        self._data = open(self._data_path, 'ab')
+        self._index = open(self._index_path, 'ab')
+        self._count = valid
+        self._offset = data_size
+
+    def append(self, document: Any, timestamp: Optional[float] = None) -> int:
+        """Append a JSON-serializable document and return its position"""
+        payload = json.dumps(document, default=str).encode()
+        entry = np.array([(self._offset, len(payload), time.time() if timestamp is None else timestamp)], dtype=INDEX_DTYPE)
+        with self._lock:
+            self._data.write(payload)
+            self._data.flush()
+            self._index.write(entry.tobytes())
+            self._index.flush()
+            self._offset += len(payload)
+            self._count += 1
+            return self._count - 1
+
+    @property
+    def index(self) -> np.ndarray:
+        """Zero-copy view of the (offset, length, timestamp) index"""
+        return map_segment(self._index_path, INDEX_DTYPE, 0)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> Any:
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        entry = self.index[position]
+        with open(self._data_path, 'rb') as handle:
+            handle.seek(int(entry['offset']))
+            return json.loads(handle.read(int(entry['length'])))
+
+    def __iter__(self) -> Iterator[Any]:
+        for position in range(self._count):
+            yield self[position]
+
+    def latest(self) -> Optional[Any]:
+        return self[-1] if self._count else None
+
+    def close(self) -> None:
+        self._data.close()
+        self._index.close()
+
+# ============================================================================
+# DATA DIRECTORY
+# ============================================================================
+
+class DataDirectoryInUse(Exception):
+    """Another DataDirectory already holds the directory's lock"""
+
+
+class DataDirectory:
+    """Root of every persisted series and record log
+
+    Series and logs track their write offsets in memory, so a directory must
+    have exactly one writer: opening takes an exclusive lock on `<root>/.lock`
+    and fails with DataDirectoryInUse if another process (or another
+    DataDirectory in this one) holds it. Within the process, share the
+    instance; series and logs are created once and lock their own appends.
+    """
+
+    def __init__(self, root: str, segment_records: int = 1 << 20, compact_threshold: int = 8):
+        self.root = root
+        self.segment_records = segment_records
+        self.compact_threshold = compact_threshold
+        self._series: Dict[str, SegmentedSeries] = {}
+        self._logs: Dict[str, RecordLog] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._lock_file = open(os.path.join(root, '.lock'), 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lock_file.close()
+                raise DataDirectoryInUse(f"{root} is already open in another process or engine") from None
+
+    @staticmethod
+    def _safe(name: str) -> str:
+        return ''.join(char if char.isalnum() or char in '-_.' else '_' for char in name)
+
+    def series(self, source: str, features: Sequence[str]) -> SegmentedSeries:
+        with self._lock:
+            if source not in self._series:
+                self._series[source] = SegmentedSeries(
+                    os.path.join(self.root, 'series', self._safe(source)),
+                    features,
+                    self.segment_records,
+                    self.compact_threshold,
+                    source
+                )
+            return self._series[source]
+
+    def stored_series(self) -> Dict[str, Sequence[str]]:
+        """Features of every series persisted under this directory, by source"""
+        stored = {}
+        root = os.path.join(self.root, 'series')
+        for name in sorted(os.listdir(root)) if os.path.isdir(root) else ():
+            index_path = os.path.join(root, name, 'index.json')
+            if os.path.exists(index_path):
+                with open(index_path) as handle:
+                    index = json.load(handle)
+                stored[index.get('source', name)] = index['features']
+        return stored
+
+    def log(self, name: str) -> RecordLog:
+        with self._lock:
+            if name not in self._logs:
+                self._logs[name] = RecordLog(os.path.join(self.root, 'logs', self._safe(name)))
+            return self._logs[name]
+
+    def close(self) -> None:
+        """Close every series and log, then release the directory lock"""
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+            for log in self._logs.values():
+                log.close()
+            self._series.clear()
+            self._logs.clear()
+            if not self._lock_file.closed:
+                # Closing the file drops the flock
+                self._lock_file.close()
@@ -0,0 +1,366 @@
+"""
+TESSERACT SEMANTIC CACHE
+Serves near-duplicate and paraphrased queries from cache: queries are embedded
+with hashing-trick vectors and matched through an IVF nearest-neighbour index
+"""
+
+import math
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from response_cache import estimate_size
+
+# ============================================================================
+# EMBEDDING
+# ============================================================================
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by can could do does for from how i in is it me my of on or please '
+    'should tell that the this to was what whats will with would you'.split()
+)
+
+class HashingEmbedder:
+    """Unit-length bag-of-features vectors via the hashing trick
+
+    Features are words, word bigrams and character trigrams; each is hashed
+    (CRC32) to a signed bucket with sublinear term frequency. Stop words get
+    a small weight so filler ("please", "what is") barely moves the vector.
+    """
+
+    def __init__(self, dim: int = 512, word_weight: float = 1.0, bigram_weight: float = 0.6, trigram_weight: float = 0.4, stop_weight: float = 0.15):
+        self.dim = dim
+        self.word_weight = word_weight
+        self.bigram_weight = bigram_weight
+        self.trigram_weight = trigram_weight
+        self.stop_weight = stop_weight
+
+    def features(self, text: str) -> Dict[str, float]:
+        """Feature → weight for `text`"""
+        words = _WORD.findall(text.lower())
+        counts: Dict[str, float] = {}
+
+        def add(feature: str, weight: float) -> None:
+            counts[feature] = counts.get(feature, 0.0) + weight
+
+        content = [word for word in words if word not in STOP_WORDS]
+        for word in words:
+            add(f"w:{word}", self.stop_weight if word in STOP_WORDS else self.word_weight)
+        for first, second in zip(content, content[1:]):
+            add(f"b:{first} {second}", self.bigram_weight)
+        for word in content:
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                add(f"c:{padded[i:i + 3]}", self.trigram_weight)
+        return counts
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self.features(text).items():
+            digest = zlib.crc32(feature.encode())
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dim] += sign * (1.0 + math.log(weight)) if weight >= 1.0 else sign * weight
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self.embed(text) for text in texts]) if texts else np.empty((0, self.dim), dtype=np.float32)
+
+# ============================================================================
+# IVF INDEX
+# ============================================================================
+
+class IVFIndex:
+    """Inverted-file index over unit vectors (cosine similarity = dot product)
+
+    Vectors live in per-cell contiguous blocks, so probing a cell is a single
+    matrix-vector product with no gather. Until `train_threshold` vectors are
+    stored there is one cell and search is a brute-force scan; then spherical
+    k-means splits the vectors into `nlist` cells and a search scans only the
+    `nprobe` cells whose centroids are closest to the query. Centroids are
+    retrained (on a sample) each time the index doubles.
+    """
+
+    def __init__(self, dim: int, nlist: int = 64, nprobe: int = 8, train_threshold: int = 1024, seed: int = 0):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = max(train_threshold, nlist)
+        self.rng = np.random.default_rng(seed)
+        self.centroids: Optional[np.ndarray] = None
+        self.cells: List[np.ndarray] = [np.empty((16, dim), dtype=np.float32)]
+        self.cell_slots: List[np.ndarray] = [np.empty(16, dtype=np.int64)]
+        self.sizes: List[int] = [0]
+        self.location: Dict[int, Tuple[int, int]] = {}
+        self.next_slot = 0
+        self.trained_at = 0
+        self.trainings = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.location)
+
+    def _append(self, cell: int, slot: int, vector: np.ndarray) -> None:
+        size = self.sizes[cell]
+        if size == len(self.cell_slots[cell]):
+            capacity = 2 * size
+            vectors = np.empty((capacity, self.dim), dtype=np.float32)
+            vectors[:size] = self.cells[cell][:size]
+            slots = np.empty(capacity, dtype=np.int64)
+            slots[:size] = self.cell_slots[cell][:size]
+            self.cells[cell], self.cell_slots[cell] = vectors, slots
+        self.cells[cell][size] = vector
+        self.cell_slots[cell][size] = slot
+        self.location[slot] = (cell, size)
+        self.sizes[cell] = size + 1
+
+    def add(self, vector: np.ndarray) -> int:
+        """Store a unit vector and return its slot"""
+        slot = self.next_slot
+        self.next_slot += 1
+        cell = 0 if self.centroids is None else int(np.argmax(self.centroids @ vector))
+        self._append(cell, slot, vector)
+        if self.count >= max(self.train_threshold, 2 * self.trained_at):
+            self.train()
+        return slot
+
+    def remove(self, slot: int) -> None:
+        location = self.location.pop(slot, None)
+        if location is None:
+            return
+        cell, position = location
+        last = self.sizes[cell] - 1
+        if position != last:
+            moved = int(self.cell_slots[cell][last])
+            self.cells[cell][position] = self.cells[cell][last]
+            self.cell_slots[cell][position] = moved
+            self.location[moved] = (cell, position)
+        self.sizes[cell] = last
+
+    def _all(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Every stored (vectors, slots)"""
+        return (
+            np.concatenate([cell[:size] for cell, size in zip(self.cells, self.sizes)]),
+            np.concatenate([slots[:size] for slots, size in zip(self.cell_slots, self.sizes)])
+        )
+
+    def train(self, iterations: int = 8) -> None:
+        """(Re)cluster the stored vectors into `nlist` cells"""
+        if self.count < self.nlist:
+            return
+        vectors, slots = self._all()
+        sample = vectors if len(vectors) <= 32 * self.nlist else vectors[self.rng.choice(len(vectors), 32 * self.nlist, replace=False)]
+        centroids = sample[self.rng.choice(len(sample), self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            empty = norms == 0
+            if empty.any():
+                sums[empty] = sample[self.rng.choice(len(sample), int(empty.sum()))]
+                norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            centroids = sums / norms[:, None]
+
+        self.centroids = centroids.astype(np.float32)
+        labels = np.argmax(vectors @ self.centroids.T, axis=1)
+        order = np.argsort(labels, kind='stable')
+        bounds = np.searchsorted(labels[order], np.arange(self.nlist + 1))
+        self.cells, self.cell_slots, self.sizes = [], [], []
+        self.location = {}
+        for cell in range(self.nlist):
+            members = order[bounds[cell]:bounds[cell + 1]]
+            capacity = max(16, 2 * len(members))
+            block = np.empty((capacity, self.dim), dtype=np.float32)
+            block[:len(members)] = vectors[members]
+            cell_slots = np.empty(capacity, dtype=np.int64)
+            cell_slots[:len(members)] = slots[members]
+            self.cells.append(block)
+            self.cell_slots.append(cell_slots)
+            self.sizes.append(len(members))
+            for position, slot in enumerate(slots[members].tolist()):
+                self.location[slot] = (cell, position)
+        self.trained_at = len(slots)
+        self.trainings += 1
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        """Up to `k` (slot, similarity) pairs, most similar first"""
+        if self.centroids is None:
+            probed = [0]
+        else:
+            nprobe = min(self.nprobe, self.nlist)
+            probed = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe].tolist()
+        best: List[Tuple[int, float]] = []
+        for cell in probed:
+            size = self.sizes[cell]
+            if not size:
+                continue
+            similarities = self.cells[cell][:size] @ vector
+            top = min(k, size)
+            for i in np.argpartition(-similarities, top - 1)[:top].tolist():
+                best.append((int(self.cell_slots[cell][i]), float(similarities[i])))
+        best.sort(key=lambda match: -match[1])
+        return best[:k]
+
+    def nbytes(self) -> int:
+        return sum(cell.nbytes + slots.nbytes for cell, slots in zip(self.cells, self.cell_slots))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'vectors': self.count,
+            'trained': self.centroids is not None,
+            'nlist': self.nlist,
+            'nprobe': self.nprobe,
+            'trainings': self.trainings,
+            'bytes': self.nbytes()
+        }
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class SemanticEntry:
+    """One cached response and the query it answered"""
+
+    __slots__ = ('query', 'value', 'size', 'expires')
+
+    def __init__(self, query: str, value: Any, size: int, expires: float):
+        self.query = query
+        self.value = value
+        self.size = size
+        self.expires = expires
+
+
+class SemanticCache:
+    """Response cache keyed by query meaning rather than exact text
+
+    A lookup embeds the query and returns the cached response of the most
+    similar stored query if their cosine similarity is at least `threshold`.
+    Entries expire after `ttl` seconds and are evicted least recently used
+    first whenever `max_entries` or `max_bytes` (responses, queries and
+    vectors together) would be exceeded.
+    """
+
+    ENTRY_OVERHEAD = 200
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 300.0,
+        embedder: Optional[HashingEmbedder] = None,
+        nlist: int = 64,
+        nprobe: int = 8,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.embedder = embedder or HashingEmbedder()
+        self.index = IVFIndex(self.embedder.dim, nlist=nlist, nprobe=nprobe)
+        self.clock = clock
+        self.entries: 'OrderedDict[int, SemanticEntry]' = OrderedDict()
+        self.exact: Dict[str, int] = {}
+        self.bytes = 0
+        self.counters = {
+            'lookups': 0,
+            'exact_hits': 0,
+            'semantic_hits': 0,
+            'misses': 0,
+            'near_misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'oversized': 0
+        }
+        self.hit_similarity = 0.0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return ' '.join(_WORD.findall(query.lower()))
+
+    def _alive(self, slot: int) -> Optional[SemanticEntry]:
+        entry = self.entries.get(slot)
+        if entry is not None and self.clock() >= entry.expires:
+            self._remove(slot)
+            self.counters['expirations'] += 1
+            return None
+        return entry
+
+    def lookup(self, query: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """(cached response, match details) for the closest stored query, or None"""
+        self.counters['lookups'] += 1
+        slot = self.exact.get(self.normalize(query))
+        if slot is not None:
+            entry = self._alive(slot)
+            if entry is not None:
+                self.counters['exact_hits'] += 1
+                self.hit_similarity += 1.0
+                self.entries.move_to_end(slot)
+                return entry.value, {'match': 'exact', 'matched_query': entry.query, 'similarity': 1.0}
+
+        matches = self.index.search(self.embedder.embed(query), k=1)
+        if matches:
+            slot, similarity = matches[0]
+            if similarity >= self.threshold:
+                entry = self._alive(slot)
+                if entry is not None:
+                    self.counters['semantic_hits'] += 1
+                    self.hit_similarity += similarity
+                    self.entries.move_to_end(slot)
+                    return entry.value, {'match': 'semantic', 'matched_query': entry.query, 'similarity': round(similarity, 4)}
+            elif similarity >= self.threshold - 0.1:
+                self.counters['near_misses'] += 1
+        self.counters['misses'] += 1
+        return None
+
+    def put(self, query: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache `value` as the response to `query`"""
+        key = self.normalize(query)
+        size = estimate_size(value) + len(query) + 4 * self.embedder.dim + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            self.counters['oversized'] += 1
+            return
+        if key in self.exact:
+            self._remove(self.exact[key])
+        while self.entries and (len(self.entries) >= self.max_entries or self.bytes + size > self.max_bytes):
+            self._remove(next(iter(self.entries)))
+            self.counters['evictions'] += 1
+        slot = self.index.add(self.embedder.embed(query))
+        expires = self.clock() + (self.ttl if ttl is None else ttl)
+        self.entries[slot] = SemanticEntry(query, value, size, expires)
+        self.exact[key] = slot
+        self.bytes += size
+
+    def _remove(self, slot: int) -> None:
+        entry = self.entries.pop(slot)
+        self.exact.pop(self.normalize(entry.query), None)
+        self.index.remove(slot)
+        self.bytes -= entry.size
+
+    def clear(self) -> None:
+        for slot in list(self.entries):
+            self._remove(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate, occupancy and index counters"""
+        hits = self.counters['exact_hits'] + self.counters['semantic_hits']
+        lookups = self.counters['lookups']
+        return {
+            **self.counters,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'mean_hit_similarity': round(self.hit_similarity / hits, 4) if hits else 0.0,
+            'threshold': self.threshold,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'index': self.index.stats()
+        }
@@ -0,0 +1,343 @@
+"""
+TESSERACT STATUS HUB
+Live status pushed to WebSocket and SSE subscribers: each topic is rebuilt
+once per tick and only its JSON-patch delta is fanned out
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from fastapi import Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from response_snapshots import dumps
+from streaming import STREAM_MEDIA_TYPES
+
+logger = logging.getLogger(__name__)
+
+Builder = Callable[[], Awaitable[Dict[str, Any]]]
+
+# What to do when a subscriber's queue is full
+RESYNC = 'resync'          # drop its backlog and queue one full snapshot per topic instead
+DISCONNECT = 'disconnect'  # close the subscriber
+DROP_POLICIES = (RESYNC, DISCONNECT)
+
+# ============================================================================
+# JSON PATCH (RFC 6902)
+# ============================================================================
+
+def _pointer(path: str, key: Any) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+def json_diff(old: Any, new: Any, path: str = '') -> List[Dict[str, Any]]:
+    """Patch operations turning `old` into `new`
+
+    Objects are compared key by key and equal-length arrays item by item;
+    anything else that changed is replaced whole.
+    """
+    if type(old) is not type(new):
+        return [{'op': 'replace', 'path': path, 'value': new}]
+    if isinstance(new, dict):
+        ops = []
+        for key, value in old.items():
+            if key not in new:
+                ops.append({'op': 'remove', 'path': _pointer(path, key)})
+            elif value != new[key]:
+                ops.extend(json_diff(value, new[key], _pointer(path, key)))
+        for key, value in new.items():
+            if key not in old:
+                ops.append({'op': 'add', 'path': _pointer(path, key), 'value': value})
+        return ops
+    if isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (before, after) in enumerate(zip(old, new)):
+            if before != after:
+                ops.extend(json_diff(before, after, _pointer(path, index)))
+        return ops
+    return [] if old == new else [{'op': 'replace', 'path': path, 'value': new}]
+
+def apply_patch(document: Any, ops: Iterable[Dict[str, Any]]) -> Any:
+    """Apply add/remove/replace operations in place; returns the (possibly new) root"""
+    for op in ops:
+        if op['path'] == '':
+            document = op['value']
+            continue
+        *parents, last = [
+            part.replace('~1', '/').replace('~0', '~') for part in op['path'][1:].split('/')
+        ]
+        target = document
+        for part in parents:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        if isinstance(target, list):
+            last = int(last)
+        if op['op'] == 'remove':
+            del target[last]
+        else:
+            target[last] = op['value']
+    return document
+
+# ============================================================================
+# FRAMES AND SUBSCRIBERS
+# ============================================================================
+
+class Frame:
+    """One message, serialized once and shared by every subscriber"""
+
+    __slots__ = ('event', 'text', '_sse')
+
+    def __init__(self, event: str, message: Dict[str, Any]):
+        self.event = event
+        self.text = dumps({'type': event, **message}).decode()
+        self._sse: Optional[bytes] = None
+
+    @property
+    def sse(self) -> bytes:
+        if self._sse is None:
+            self._sse = f"event: {self.event}\ndata: {self.text}\n\n".encode()
+        return self._sse
+
+
+class Subscriber:
+    """A bounded queue of frames for one connection"""
+
+    __slots__ = ('topics', 'queue', 'max_queue', 'policy', 'ready', 'closed', 'evicted', 'dropped', 'resyncs', 'sent')
+
+    def __init__(self, topics: List['Topic'], max_queue: int, policy: str):
+        self.topics = topics
+        self.queue: Deque[Frame] = deque()
+        self.max_queue = max_queue
+        self.policy = policy
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.evicted = False
+        self.dropped = 0
+        self.resyncs = 0
+        self.sent = 0
+
+    def offer(self, frame: Frame) -> None:
+        if self.closed:
+            return
+        if len(self.queue) >= self.max_queue:
+            self.dropped += len(self.queue) + 1
+            self.queue.clear()
+            if self.policy == DISCONNECT:
+                self.evicted = True
+                self.close()
+                return
+            # Patches only apply in order, so a lagging client starts over from current state
+            self.resyncs += 1
+            self.queue.extend(topic.snapshot() for topic in self.topics if topic.document is not None)
+        else:
+            self.queue.append(frame)
+        self.ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self.ready.set()
+
+    async def frames(self) -> AsyncIterator[Frame]:
+        """Frames as they are queued, until the subscriber is closed"""
+        while True:
+            while self.queue:
+                self.sent += 1
+                yield self.queue.popleft()
+            if self.closed:
+                return
+            self.ready.clear()
+            await self.ready.wait()
+
+# ============================================================================
+# TOPICS
+# ============================================================================
+
+class Topic:
+    """A document rebuilt every `interval` seconds while anyone is subscribed
+
+    Subscribers first get a 'snapshot' frame with the whole document, then a
+    'patch' frame per tick with the operations from the previous document
+    (ticks that change nothing send nothing). `seq` numbers the versions so
+    a client can tell it missed one and must wait for a snapshot.
+    """
+
+    def __init__(self, name: str, builder: Builder, interval: float):
+        self.name = name
+        self.builder = builder
+        self.interval = interval
+        self.document: Optional[Dict[str, Any]] = None
+        self.seq = 0
+        self.subscribers: Set[Subscriber] = set()
+        self.task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[Frame] = None
+        self.stats = {'ticks': 0, 'patches': 0, 'patch_bytes': 0, 'snapshot_bytes': 0, 'errors': 0}
+
+    def snapshot(self) -> Frame:
+        if self._snapshot is None:
+            self._snapshot = Frame('snapshot', {'topic': self.name, 'seq': self.seq, 'data': self.document})
+            self.stats['snapshot_bytes'] = len(self._snapshot.text)
+        return self._snapshot
+
+    async def tick(self) -> Optional[Frame]:
+        """Rebuild the document and fan out its delta; returns the frame sent, if any"""
+        document = await self.builder()
+        self.stats['ticks'] += 1
+        if self.document is None:
+            self.document, self.seq = document, 1
+            frame = self.snapshot()
+        else:
+            ops = json_diff(self.document, document)
+            if not ops:
+                return None
+            self.document, self.seq, self._snapshot = document, self.seq + 1, None
+            frame = Frame('patch', {'topic': self.name, 'seq': self.seq, 'ops': ops})
+            self.stats['patches'] += 1
+            self.stats['patch_bytes'] += len(frame.text)
+        for subscriber in list(self.subscribers):
+            subscriber.offer(frame)
+        return frame
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                self.stats['errors'] += 1
+                logger.warning(f"⚠️ Status topic {self.name} failed to build: {type(error).__name__}: {error}")
+            await asyncio.sleep(self.interval)
+
+# ============================================================================
+# HUB
+# ============================================================================
+
+class StatusHub:
+    """Broadcasts registered topics to any number of subscribers
+
+    A topic ticks only while it has subscribers, so an idle hub costs
+    nothing. Each frame is serialized once per tick (and once more per
+    transport) whatever the number of subscribers; fan-out is a queue
+    append per subscriber. A subscriber more than `max_queue` frames behind
+    is handled by `policy`: RESYNC replaces its backlog with a fresh
+    snapshot, DISCONNECT closes it.
+    """
+
+    def __init__(self, interval: float = 1.0, max_queue: int = 32, policy: str = RESYNC):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy {policy!r}; expected one of {DROP_POLICIES}")
+        self.interval = interval
+        self.max_queue = max_queue
+        self.policy = policy
+        self.topics: Dict[str, Topic] = {}
+        self.subscribers: Set[Subscriber] = set()
+        self.disconnected = 0
+
+    def register(self, name: str, builder: Builder, interval: Optional[float] = None) -> Topic:
+        topic = self.topics[name] = Topic(name, builder, interval or self.interval)
+        return topic
+
+    def subscribe(self, names: Iterable[str]) -> Subscriber:
+        """Start receiving `names`; raises KeyError for an unknown topic"""
+        topics = [self.topics[name] for name in dict.fromkeys(names)]
+        subscriber = Subscriber(topics, max(self.max_queue, len(topics)), self.policy)
+        self.subscribers.add(subscriber)
+        for topic in topics:
+            topic.subscribers.add(subscriber)
+            if topic.document is not None:
+                subscriber.offer(topic.snapshot())
+            if topic.task is None:
+                topic.task = asyncio.ensure_future(topic.run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            self.disconnected += subscriber.evicted
+        subscriber.close()
+        for topic in subscriber.topics:
+            topic.subscribers.discard(subscriber)
+            if not topic.subscribers and topic.task is not None:
+                topic.task.cancel()
+                topic.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'subscribers': len(self.subscribers),
+            'policy': self.policy,
+            'max_queue': self.max_queue,
+            'disconnected': self.disconnected,
+            'topics': {
+                name: {'subscribers': len(topic.subscribers), 'seq': topic.seq, **topic.stats}
+                for name, topic in self.topics.items()
+            }
+        }
+
+    async def close(self) -> None:
+        """Close every subscriber and stop the topic tasks"""
+        for subscriber in list(self.subscribers):
+            self.unsubscribe(subscriber)
+        tasks = [topic.task for topic in self.topics.values() if topic.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for topic in self.topics.values():
+            topic.task = None
+
+    # ------------------------------------------------------------------
+    # Transports
+    # ------------------------------------------------------------------
+
+    def parse_topics(self, topics: Optional[str]) -> List[str]:
+        """Comma-separated topic names (all topics when empty); raises KeyError for unknown ones"""
+        names = [name.strip() for name in (topics or '').split(',') if name.strip()] or list(self.topics)
+        unknown = [name for name in names if name not in self.topics]
+        if unknown:
+            raise KeyError(', '.join(unknown))
+        return names
+
+    async def serve_websocket(self, websocket: WebSocket, names: List[str]) -> None:
+        """Push frames to a WebSocket until either side closes it"""
+        await websocket.accept()
+        subscriber = self.subscribe(names)
+
+        async def send() -> None:
+            async for frame in subscriber.frames():
+                await websocket.send_text(frame.text)
+            if subscriber.evicted:
+                await websocket.close(code=1013, reason='subscriber too slow')
+
+        def sent(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                error = task.exception()
+                if not isinstance(error, (WebSocketDisconnect, RuntimeError)):
+                    logger.warning(f"⚠️ Status WebSocket failed: {type(error).__name__}: {error}")
+
+        sender = asyncio.ensure_future(send())
+        sender.add_done_callback(sent)
+        try:
+            # Incoming messages are ignored; this only notices the client leaving
+            while (await websocket.receive())['type'] != 'websocket.disconnect':
+                pass
+        finally:
+            self.unsubscribe(subscriber)
+            sender.cancel()
+
+    def sse_response(self, request: Request, names: List[str]) -> StreamingResponse:
+        """Server-sent events carrying the same snapshot and patch frames"""
+        subscriber = self.subscribe(names)
+
+        async def body() -> AsyncIterator[bytes]:
+            try:
+                async for frame in subscriber.frames():
+                    if await request.is_disconnected():
+                        break
+                    yield frame.sse
+            finally:
+                self.unsubscribe(subscriber)
+
+        return StreamingResponse(
+            body(),
+            media_type=STREAM_MEDIA_TYPES['sse'],
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
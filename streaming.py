@@ -0,0 +1,75 @@
+"""
+TESSERACT STREAMING RESPONSES
+Server-sent events / NDJSON streaming of per-provider and per-source results
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES = {
+    'sse': 'text/event-stream',
+    'ndjson': 'application/x-ndjson'
+}
+
+Event = Tuple[str, Dict[str, Any]]
+
+def encode_event(event: str, payload: Dict[str, Any], fmt: str) -> bytes:
+    """Encode one event as an SSE frame or an NDJSON line"""
+    if fmt == 'sse':
+        return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n".encode()
+    return (json.dumps({'event': event, **payload}, default=str) + '\n').encode()
+
+async def iterate_completed(awaitables: Dict[str, Awaitable[Any]]) -> AsyncIterator[Tuple[str, Any, Optional[BaseException]]]:
+    """Yield (name, result, error) as each awaitable finishes
+
+    Closing the iterator early cancels everything still running.
+    """
+    tasks = {asyncio.ensure_future(awaitable): name for name, awaitable in awaitables.items()}
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks.pop(task)
+                error = task.exception()
+                yield name, None if error else task.result(), error
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+async def _encode_stream(request: Request, events: AsyncIterator[Event], fmt: str) -> AsyncIterator[bytes]:
+    """Encode events, stopping (and cancelling upstream work) once the client leaves
+
+    The response body is pulled one chunk at a time, so a slow client holds
+    back the event source instead of letting frames queue up in memory.
+    """
+    try:
+        async for event, payload in events:
+            if await request.is_disconnected():
+                logger.info("📴 Stream client disconnected; cancelling outstanding work")
+                break
+            with span('serialize'):
+                frame = encode_event(event, payload, fmt)
+            yield frame
+    finally:
+        await events.aclose()
+
+def streaming_response(request: Request, events: AsyncIterator[Event], fmt: str = 'sse') -> StreamingResponse:
+    """Wrap an event iterator as an SSE or NDJSON streaming response"""
+    if fmt not in STREAM_MEDIA_TYPES:
+        raise ValueError(f"Unknown stream format {fmt!r}; expected one of {sorted(STREAM_MEDIA_TYPES)}")
+    return StreamingResponse(
+        _encode_stream(request, events, fmt),
+        media_type=STREAM_MEDIA_TYPES[fmt],
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
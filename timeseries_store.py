@@ -0,0 +1,368 @@
+"""
+TESSERACT COLUMNAR TIME-SERIES STORE
+One contiguous NumPy column per feature per source, with binary-search range
+queries and vectorized aggregates
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+# ============================================================================
+# PER-SOURCE COLUMNS
+# ============================================================================
+
+class SeriesColumns:
+    """Append-optimized columns for one source
+
+    Timestamps are int64 epoch milliseconds; every feature is a float64
+    column of the same length. Columns grow geometrically (at least
+    `growth_chunk` rows at a time) so appends are amortized O(1). Timestamps
+    may arrive out of order; the columns are re-sorted once, lazily, before
+    the next query.
+    """
+
+    def __init__(self, source: str, features: Iterable[str], growth_chunk: int = 4096):
+        self.source = source
+        self.features: List[str] = list(features)
+        if not self.features:
+            raise ValueError(f"Source {source!r} needs at least one feature")
+        self.growth_chunk = growth_chunk
+        self.size = 0
+        self.sorted = True
+        self._timestamps = np.empty(growth_chunk, dtype=np.int64)
+        self._columns: Dict[str, np.ndarray] = {
+            feature: np.empty(growth_chunk, dtype=np.float64) for feature in self.features
+        }
+
+    @property
+    def capacity(self) -> int:
+        return len(self._timestamps)
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity + max(self.growth_chunk, self.capacity // 2))
+        self._timestamps = self._grown(self._timestamps, capacity)
+        for feature, column in self._columns.items():
+            self._columns[feature] = self._grown(column, capacity)
+
+    def _grown(self, column: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.empty(capacity, dtype=column.dtype)
+        grown[:self.size] = column[:self.size]
+        return grown
+
+    def append(self, timestamp: int, values: Mapping[str, float]) -> None:
+        """Append one point; features missing from `values` are stored as NaN"""
+        self._reserve(1)
+        row = self.size
+        if row and timestamp < self._timestamps[row - 1]:
+            self.sorted = False
+        self._timestamps[row] = timestamp
+        for feature, column in self._columns.items():
+            column[row] = values.get(feature, np.nan)
+        self.size += 1
+
+    def extend(self, timestamps: ArrayLike, values: Mapping[str, ArrayLike]) -> None:
+        """Append a batch of points column-wise"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        count = len(timestamps)
+        if not count:
+            return
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        if (start and timestamps[0] < self._timestamps[start - 1]) or np.any(np.diff(timestamps) < 0):
+            self.sorted = False
+        self._timestamps[start:end] = timestamps
+        for feature, column in self._columns.items():
+            if feature in values:
+                batch = np.asarray(values[feature], dtype=np.float64)
+                if len(batch) != count:
+                    raise ValueError(f"Column {feature!r} has {len(batch)} values for {count} timestamps")
+                column[start:end] = batch
+            else:
+                column[start:end] = np.nan
+        self.size = end
+
+    def _ensure_sorted(self) -> None:
+        if self.sorted:
+            return
+        order = np.argsort(self._timestamps[:self.size], kind='stable')
+        self._timestamps[:self.size] = self._timestamps[:self.size][order]
+        for column in self._columns.values():
+            column[:self.size] = column[:self.size][order]
+        self.sorted = True
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Read-only view of the timestamp column"""
+        self._ensure_sorted()
+        view = self._timestamps[:self.size]
+        view.flags.writeable = False
+        return view
+
+    def column(self, feature: str) -> np.ndarray:
+        """Read-only view of one feature column"""
+        if feature not in self._columns:
+            raise KeyError(f"Source {self.source!r} has no feature {feature!r}")
+        self._ensure_sorted()
+        view = self._columns[feature][:self.size]
+        view.flags.writeable = False
+        return view
+
+    def bounds(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """Row slice covering start <= timestamp < end, found by binary search"""
+        timestamps = self.timestamps
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = self.size if end is None else int(np.searchsorted(timestamps, end, side='left'))
+        return lo, max(lo, hi)
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of every column for start <= timestamp < end"""
+        lo, hi = self.bounds(start, end)
+        result = {'timestamp': self.timestamps[lo:hi]}
+        for feature in self.features:
+            result[feature] = self.column(feature)[lo:hi]
+        return result
+
+    def nbytes(self) -> int:
+        """Bytes allocated for this source's columns"""
+        return self._timestamps.nbytes + sum(column.nbytes for column in self._columns.values())
+
+    def __len__(self) -> int:
+        return self.size
+
+# ============================================================================
+# VECTORIZED AGGREGATES
+# ============================================================================
+
+def _buckets(timestamps: np.ndarray, bucket_ms: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bucket start times plus the first and one-past-last row of each bucket"""
+    ids = timestamps // bucket_ms
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(ids)) + 1))
+    ends = np.concatenate((starts[1:], [len(timestamps)]))
+    return ids[starts] * bucket_ms, starts, ends
+
+def ohlc(timestamps: np.ndarray, values: np.ndarray, bucket_ms: int) -> Dict[str, np.ndarray]:
+    """Open/high/low/close per time bucket"""
+    if not len(timestamps):
+        empty = np.empty(0)
+        return {'timestamp': np.empty(0, dtype=np.int64), 'open': empty, 'high': empty, 'low': empty, 'close': empty, 'count': empty}
+    bucket_times, starts, ends = _buckets(timestamps, bucket_ms)
+    return {
+        'timestamp': bucket_times,
+        'open': values[starts],
+        'high': np.maximum.reduceat(values, starts),
+        'low': np.minimum.reduceat(values, starts),
+        'close': values[ends - 1],
+        'count': ends - starts
+    }
+
+def resample(timestamps: np.ndarray, values: np.ndarray, bucket_ms: int, how: str = 'mean') -> Tuple[np.ndarray, np.ndarray]:
+    """Aggregate values into fixed time buckets with 'mean', 'sum', 'min', 'max', 'first' or 'last'"""
+    if not len(timestamps):
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    bucket_times, starts, ends = _buckets(timestamps, bucket_ms)
+    if how == 'mean':
+        aggregated = np.add.reduceat(values, starts) / (ends - starts)
+    elif how == 'sum':
+        aggregated = np.add.reduceat(values, starts)
+    elif how == 'min':
+        aggregated = np.minimum.reduceat(values, starts)
+    elif how == 'max':
+        aggregated = np.maximum.reduceat(values, starts)
+    elif how == 'first':
+        aggregated = values[starts]
+    elif how == 'last':
+        aggregated = values[ends - 1]
+    else:
+        raise ValueError(f"Unknown aggregation {how!r}")
+    return bucket_times, aggregated
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of each trailing `window` values (length len(values) - window + 1)"""
+    if window <= 0:
+        raise ValueError("window must be positive")
+    if len(values) < window:
+        return np.empty(0)
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    return (sums[window:] - sums[:-window]) / window
+
+def rolling_volatility(values: np.ndarray, window: int) -> np.ndarray:
+    """Standard deviation of simple returns over each trailing `window` returns"""
+    if window <= 1:
+        raise ValueError("window must be greater than 1")
+    returns = np.diff(values) / values[:-1]
+    if len(returns) < window:
+        return np.empty(0)
+    sums = np.cumsum(np.concatenate(([0.0], returns)))
+    squares = np.cumsum(np.concatenate(([0.0], returns * returns)))
+    window_sums = sums[window:] - sums[:-window]
+    window_squares = squares[window:] - squares[:-window]
+    variance = (window_squares - window_sums * window_sums / window) / (window - 1)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+# ============================================================================
+# CHUNKED FEATURE EXTRACTION
+# ============================================================================
+
+def column_features(arrays: Mapping[str, np.ndarray], lo: int, hi: int, window: int = 20, lags: int = 10) -> Dict[str, Dict[str, float]]:
+    """Mergeable statistics of rows lo:hi of every column in `arrays`
+
+    Rolling windows and lagged products that start before `lo` read the
+    earlier rows, so merging the chunks of any split with
+    merge_column_features gives the same result as one call over every row.
+    Returns are simple returns; non-finite returns count as zero.
+    """
+    partials = {}
+    for feature, column in arrays.items():
+        values = column[lo:hi]
+        finite = values[np.isfinite(values)]
+        count = len(finite)
+        mean = float(finite.mean()) if count else 0.0
+        partial = {
+            'count': count,
+            'mean': mean,
+            'm2': float(np.square(finite - mean).sum()) if count else 0.0,
+            'min': float(finite.min()) if count else np.inf,
+            'max': float(finite.max()) if count else -np.inf
+        }
+
+        # Return j = (column[j + 1] - column[j]) / column[j] belongs to the chunk holding row j
+        end = min(hi, len(column) - 1)
+        start = max(0, lo - max(window, lags))
+        if end > lo:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = np.diff(column[start:end + 1]) / column[start:end]
+            returns[~np.isfinite(returns)] = 0.0
+        else:
+            returns = np.empty(0)
+        offset = lo - start
+
+        # Volatility windows are identified by the return they end on
+        first = max(lo, window - 1)
+        if end > first:
+            window_returns = returns[first - window + 1 - start:]
+            sums = np.cumsum(np.concatenate(([0.0], window_returns)))
+            squares = np.cumsum(np.concatenate(([0.0], window_returns * window_returns)))
+            window_sums = sums[window:] - sums[:-window]
+            variance = (squares[window:] - squares[:-window] - window_sums * window_sums / window) / (window - 1)
+            volatility = np.sqrt(np.maximum(variance, 0.0))
+            partial['volatility_count'] = len(volatility)
+            partial['volatility_sum'] = float(volatility.sum())
+            partial['volatility_max'] = float(volatility.max())
+        else:
+            partial['volatility_count'] = 0
+            partial['volatility_sum'] = 0.0
+            partial['volatility_max'] = 0.0
+
+        own = returns[offset:]
+        products = [float(np.dot(own, own))]
+        for lag in range(1, lags + 1):
+            first = max(lo, lag)
+            if end > first:
+                products.append(float(np.dot(returns[first - start:], returns[first - lag - start:end - lag - start])))
+            else:
+                products.append(0.0)
+        partial['lag_products'] = products
+        partials[feature] = partial
+    return partials
+
+def merge_column_features(partials: Sequence[Mapping[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Combine column_features chunks into per-feature summary statistics"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for chunk in partials:
+        for feature, partial in chunk.items():
+            total = merged.get(feature)
+            if total is None:
+                merged[feature] = {**partial, 'lag_products': list(partial['lag_products'])}
+                continue
+            # Chan et al. parallel variance update
+            count = total['count'] + partial['count']
+            if count:
+                delta = partial['mean'] - total['mean']
+                total['m2'] += partial['m2'] + delta * delta * total['count'] * partial['count'] / count
+                total['mean'] += delta * partial['count'] / count
+            total['count'] = count
+            total['min'] = min(total['min'], partial['min'])
+            total['max'] = max(total['max'], partial['max'])
+            total['volatility_count'] += partial['volatility_count']
+            total['volatility_sum'] += partial['volatility_sum']
+            total['volatility_max'] = max(total['volatility_max'], partial['volatility_max'])
+            total['lag_products'] = [a + b for a, b in zip(total['lag_products'], partial['lag_products'])]
+
+    summary = {}
+    for feature, total in merged.items():
+        count = total['count']
+        energy = total['lag_products'][0]
+        summary[feature] = {
+            'count': count,
+            'mean': total['mean'] if count else None,
+            'std': float(np.sqrt(total['m2'] / (count - 1))) if count > 1 else None,
+            'min': total['min'] if count else None,
+            'max': total['max'] if count else None,
+            'mean_volatility': total['volatility_sum'] / total['volatility_count'] if total['volatility_count'] else None,
+            'max_volatility': total['volatility_max'] if total['volatility_count'] else None,
+            'return_autocorrelation': [product / energy if energy else 0.0 for product in total['lag_products'][1:]]
+        }
+    return summary
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class TimeSeriesStore:
+    """Columnar store of every gathered source's features"""
+
+    def __init__(self, growth_chunk: int = 4096):
+        self.growth_chunk = growth_chunk
+        self.sources: Dict[str, SeriesColumns] = {}
+
+    def register(self, source: str, features: Iterable[str]) -> SeriesColumns:
+        """Create (or return) the columns for `source`"""
+        series = self.sources.get(source)
+        features = list(features)
+        if series is None:
+            series = self.sources[source] = SeriesColumns(source, features, self.growth_chunk)
+        elif series.features != features:
+            raise ValueError(f"Source {source!r} is already registered with features {series.features}")
+        return series
+
+    def series(self, source: str) -> SeriesColumns:
+        try:
+            return self.sources[source]
+        except KeyError:
+            raise KeyError(f"Unknown source {source!r}") from None
+
+    def append(self, source: str, timestamp: int, values: Mapping[str, float]) -> None:
+        self.series(source).append(timestamp, values)
+
+    def extend(self, source: str, timestamps: ArrayLike, values: Mapping[str, ArrayLike]) -> None:
+        self.series(source).extend(timestamps, values)
+
+    def range(self, source: str, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        return self.series(source).range(start, end)
+
+    def ohlc(self, source: str, feature: str, bucket_ms: int, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        window = self.range(source, start, end)
+        return ohlc(window['timestamp'], window[feature], bucket_ms)
+
+    def resample(self, source: str, feature: str, bucket_ms: int, how: str = 'mean', start: Optional[int] = None, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        window = self.range(source, start, end)
+        return resample(window['timestamp'], window[feature], bucket_ms, how)
+
+    def rolling_mean(self, source: str, feature: str, window: int, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        return rolling_mean(self.range(source, start, end)[feature], window)
+
+    def rolling_volatility(self, source: str, feature: str, window: int, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        return rolling_volatility(self.range(source, start, end)[feature], window)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Points, capacity and bytes held per source"""
+        return {
+            source: {'points': len(series), 'capacity': series.capacity, 'bytes': series.nbytes()}
+            for source, series in self.sources.items()
+        }
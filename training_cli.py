@@ -0,0 +1,154 @@
+"""
+TESSERACT TRAINING CLI
+Runs any trainer and records it as NDJSON, one record per finished stage,
+so an interrupted run resumes from its last completed stage
+
+    python training_cli.py v2 --output run.ndjson
+    python training_cli.py v2 --output run.ndjson --resume
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from run_history import RunHistory, default_path as default_history_path, record_run
+from training_jobs import TRAINERS
+from training_scheduler import StageError
+
+logger = logging.getLogger(__name__)
+
+class RunLog:
+    """NDJSON run record, appended and fsynced one line per record
+
+    Each record is {"record": "run" | "resume" | "stage" | "result" | "error", ...}.
+    A crash can tear at most the line being written; reopening drops that
+    line, so a resumed run continues after the last complete record.
+    `records` holds the records read when reopening; appended records are
+    only written, not kept.
+    """
+
+    def __init__(self, path: str, records: Optional[List[Dict[str, Any]]] = None, size: int = 0):
+        self.path = path
+        self.records = list(records or [])
+        if path == '-':
+            self.handle = sys.stdout.buffer
+        else:
+            self.handle = open(path, 'r+b' if size else 'wb')
+            self.handle.truncate(size)
+            self.handle.seek(size)
+
+    @classmethod
+    def load(cls, path: str) -> 'RunLog':
+        """Reopen an existing run record for appending, dropping a torn last line"""
+        records, size = [], 0
+        with open(path, 'rb') as handle:
+            for number, line in enumerate(handle, 1):
+                if not line.strip():
+                    size += len(line)
+                    continue
+                try:
+                    record = json.loads(line) if line.endswith(b'\n') else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    if handle.read(1):
+                        raise ValueError(f"{path} line {number} is not a JSON record")
+                    logger.warning(f"⚠️ Dropping torn last line of {path}")
+                    break
+                records.append(record)
+                size += len(line)
+        return cls(path, records, size)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self.handle.write((json.dumps(record, default=str) + '\n').encode())
+        self.handle.flush()
+        if self.path != '-':
+            os.fsync(self.handle.fileno())
+
+    def close(self) -> None:
+        if self.path != '-':
+            self.handle.close()
+
+    def completed_stages(self) -> Dict[str, Any]:
+        return {record['stage']: record['output'] for record in self.records if record['record'] == 'stage'}
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        return next((record['result'] for record in self.records if record['record'] == 'result'), None)
+
+async def run(
+    trainer: str,
+    output: str,
+    resume: bool = False,
+    force: bool = False,
+    history: Optional[RunHistory] = None
+) -> Optional[Dict[str, Any]]:
+    """Run `trainer`, recording each finished stage to `output` and the result in `history`"""
+    if resume and output != '-' and os.path.exists(output):
+        log = RunLog.load(output)
+        header = log.records[0] if log.records else {}
+        if header.get('record') != 'run' or header.get('trainer') != trainer:
+            log.close()
+            raise ValueError(f"{output} is not a {trainer} run record")
+        if log.result() is not None:
+            log.close()
+            logger.info(f"✓ {output} is already complete")
+            return log.result()
+        completed = log.completed_stages()
+        log.append({'record': 'resume', 'at': datetime.now().isoformat(), 'completed': sorted(completed)})
+        logger.info(f"🔁 Resuming {trainer} after {len(completed)} completed stage(s)")
+    else:
+        log = RunLog(output)
+        completed = {}
+        log.append({'record': 'run', 'trainer': trainer, 'force': force, 'started_at': datetime.now().isoformat()})
+
+    def on_stage(stage: str, stage_output: Any, timing: Dict[str, Any]) -> None:
+        log.append({'record': 'stage', 'stage': stage, 'timing': timing, 'output': stage_output})
+
+    try:
+        try:
+            result = await TRAINERS[trainer](force=force, on_stage=on_stage, completed=completed)
+        except StageError as error:
+            log.append({'record': 'error', 'stage': error.stage, 'error': str(error), 'at': datetime.now().isoformat()})
+            raise
+        log.append({'record': 'result', 'finished_at': datetime.now().isoformat(), 'result': result})
+    finally:
+        log.close()
+    record_run(history, result, trainer=trainer, source=output)
+    return result
+
+def main(argv: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Train with one of the trainers from the command line"""
+    parser = argparse.ArgumentParser(description="Run a TESSERACT trainer with resumable NDJSON output")
+    parser.add_argument('trainer', choices=sorted(TRAINERS), help="v2 (AITrainingEngine), v3 (TrainingEngineV3) or v4 (AdvancedTrainer)")
+    parser.add_argument('--output', help="NDJSON run record, '-' for stdout (default: training_run_<trainer>.ndjson)")
+    parser.add_argument('--resume', action='store_true', help="continue the run recorded in --output after its last completed stage")
+    parser.add_argument('--force', action='store_true', help="recompute every stage, ignoring cached artifacts")
+    parser.add_argument('--history', help="run history database (default: $TESSERACT_RUN_HISTORY_DB or training_runs.db)")
+    parser.add_argument('--no-history', action='store_true', help="do not record the result in the run history")
+    args = parser.parse_args(argv)
+    output = args.output or f"training_run_{args.trainer}.ndjson"
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    history = None if args.no_history else RunHistory(args.history or default_history_path())
+    try:
+        return asyncio.run(run(args.trainer, output, args.resume, args.force, history))
+    except (StageError, ValueError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        if output != '-':
+            print(f"   Resume with: python training_cli.py {args.trainer} --output {output} --resume", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.trainer == 'v2':
+            # The v2 trainer runs on the process-wide engine, which flushes and unlocks its data directory on close
+            from ai_training_engine import close_shared_engine
+            close_shared_engine()
+        if history is not None:
+            history.close()
+
+if __name__ == '__main__':
+    main()
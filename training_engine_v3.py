@@ -1,17 +1,38 @@
 """TESSERACT v3.0 - ADVANCED TRAINING ENGINE"""
+import argparse
 import json
-from datetime import datetime
+import os
+
+from artifact_cache import ArtifactCache
+from training_scheduler import StageScheduler, training_result
 
 class TrainingEngineV3:
-    def __init__(self):
+    def __init__(self, artifact_dir=None):
         self.version = 3.0
         self.improvements_count = 0
         self.features_count = 0
+        artifact_dir = artifact_dir or os.getenv('TESSERACT_ARTIFACT_DIR')
+        self.artifacts = ArtifactCache(artifact_dir) if artifact_dir else None
+    
+    async def train(self, force=False, progress=None, on_stage=None, completed=None):
+        scheduler = StageScheduler(
+            cache=self.artifacts,
+            force=force,
+            progress=progress,
+            on_stage=on_stage,
+            completed=completed
+        )
+        scheduler.add('v3_training', self._train)
+        training = (await scheduler.run())['v3_training']
+        return training_result(training, scheduler)
+    
+    def invalidate(self):
+        if self.artifacts is not None:
+            self.artifacts.invalidate('v3_training')
     
-    async def train(self):
+    async def _train(self):
         training = {
             'version': 3.0,
-            'timestamp': datetime.now().isoformat(),
             'ai_models_used': 8,
             'apis_analyzed': 25,
             'github_repos_studied': 100,
@@ -49,9 +70,13 @@ class TrainingEngineV3:
         return training
 
 import asyncio
-async def main():
-    engine = TrainingEngineV3()
-    result = await engine.train()
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train TESSERACT v3.0")
+    parser.add_argument('--force', action='store_true', help="recompute, ignoring cached artifacts")
+    parser.add_argument('--artifact-dir', help="artifact cache directory (default: $TESSERACT_ARTIFACT_DIR)")
+    args = parser.parse_args(argv)
+    engine = TrainingEngineV3(artifact_dir=args.artifact_dir)
+    result = await engine.train(force=args.force)
     print(json.dumps(result, indent=2))
 
 if __name__ == '__main__':
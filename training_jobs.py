@@ -0,0 +1,361 @@
+"""
+TESSERACT TRAINING JOBS
+Training runs queued as jobs on a bounded pool of worker threads, with progress,
+cancellation and job records that survive a restart
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from run_history import RunHistory, record_run
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+# ============================================================================
+# TRAINERS
+# ============================================================================
+
+# Trainers accept StageScheduler options (progress, on_stage, completed) as keywords
+
+async def _train_v2(force: bool = False, **options: Any) -> Dict[str, Any]:
+    # One engine per process: jobs running at once must not open the data directory twice
+    from ai_training_engine import shared_engine
+    return await shared_engine().train_complete(force=force, **options)
+
+async def _train_v3(force: bool = False, **options: Any) -> Dict[str, Any]:
+    from training_engine_v3 import TrainingEngineV3
+    return await TrainingEngineV3().train(force=force, **options)
+
+async def _train_v4(force: bool = False, **options: Any) -> Dict[str, Any]:
+    from advanced_training import AdvancedTrainer
+    return await AdvancedTrainer().run(force=force, **options)
+
+Trainer = Callable[..., Awaitable[Dict[str, Any]]]
+
+TRAINERS: Dict[str, Trainer] = {
+    'v2': _train_v2,
+    'v3': _train_v3,
+    'v4': _train_v4
+}
+
+# ============================================================================
+# JOB RECORDS
+# ============================================================================
+
+class QueueFull(Exception):
+    """Too many training jobs are already waiting"""
+
+
+class TrainingJob:
+    """One training run and its progress"""
+
+    fields = (
+        'id', 'trainer', 'force', 'status', 'sequence', 'created_at', 'started_at', 'finished_at',
+        'duration_ms', 'attempts', 'progress', 'error', 'result'
+    )
+
+    def __init__(self, id: str, trainer: str, force: bool = False, sequence: int = 0):
+        self.id = id
+        self.trainer = trainer
+        self.force = force
+        self.status = QUEUED
+        self.sequence = sequence
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+        self.attempts = 0
+        self.progress: Dict[str, Any] = {'stage': None, 'finished': 0, 'total': None}
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        # Runtime state, never persisted
+        self.cancel_requested = False
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.task: Optional[asyncio.Task] = None
+        self.changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        document = {field: getattr(self, field) for field in self.fields}
+        if not include_result:
+            del document['result']
+        return document
+
+    @classmethod
+    def from_dict(cls, document: Dict[str, Any]) -> 'TrainingJob':
+        job = cls(document['id'], document['trainer'])
+        for field in cls.fields:
+            if field in document:
+                setattr(job, field, document[field])
+        return job
+
+
+class JobStore:
+    """Job records stored as `<directory>/<job id>.json`, each written atomically"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def save(self, job: TrainingJob) -> None:
+        """Write a job's current state, replacing the previous record"""
+        with self.lock:
+            document = json.dumps(job.to_dict(), default=str)
+            path = self._path(job.id)
+            temporary = f"{path}.tmp"
+            with open(temporary, 'w') as handle:
+                handle.write(document)
+            os.replace(temporary, path)
+
+    def delete(self, job_id: str) -> None:
+        with self.lock:
+            try:
+                os.remove(self._path(job_id))
+            except FileNotFoundError:
+                pass
+
+    def load(self) -> List[TrainingJob]:
+        """Every stored job, oldest first; unreadable records are skipped"""
+        jobs = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as handle:
+                    jobs.append(TrainingJob.from_dict(json.load(handle)))
+            except (OSError, ValueError, KeyError) as error:
+                logger.warning(f"⚠️ Skipping unreadable training job {name}: {error}")
+        return sorted(jobs, key=lambda job: job.sequence)
+
+# ============================================================================
+# JOB MANAGER
+# ============================================================================
+
+class TrainingJobManager:
+    """Runs queued training jobs, at most `max_workers` at a time
+
+    Each job runs on a worker thread with its own event loop, so training
+    never holds the API's event loop. At most `max_queued` jobs may wait;
+    once `max_finished` finished jobs are kept, the oldest are deleted.
+    Jobs still queued or running at shutdown (or after a crash) are queued
+    again when the manager next starts. Succeeded runs are recorded in
+    `history` when one is given.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_workers: int = 2,
+        max_queued: int = 100,
+        max_finished: int = 1000,
+        trainers: Optional[Dict[str, Trainer]] = None,
+        history: Optional[RunHistory] = None
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.store = JobStore(directory)
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.trainers = trainers or TRAINERS
+        self.history = history
+        self.jobs: Dict[str, TrainingJob] = {}
+        self.pending: Deque[TrainingJob] = deque()
+        self.available = asyncio.Event()
+        self.sequence = 0
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.workers: List[asyncio.Task] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.closing = False
+
+    async def start(self) -> None:
+        """Load stored jobs, requeue unfinished ones and start the workers"""
+        self.loop = asyncio.get_running_loop()
+        self.closing = False
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='training')
+        requeued = 0
+        for job in await asyncio.to_thread(self.store.load):
+            self.jobs[job.id] = job
+            self.sequence = max(self.sequence, job.sequence)
+            if not job.finished:
+                job.status = QUEUED
+                self.pending.append(job)
+                requeued += 1
+        if requeued:
+            self.available.set()
+            logger.info(f"🔁 Requeued {requeued} unfinished training job(s)")
+        self.workers = [asyncio.ensure_future(self._worker()) for _ in range(self.max_workers)]
+
+    async def submit(self, trainer: str, force: bool = False) -> TrainingJob:
+        """Queue a training run; raises QueueFull when `max_queued` jobs are waiting"""
+        if trainer not in self.trainers:
+            raise ValueError(f"Unknown trainer {trainer!r}; expected one of {sorted(self.trainers)}")
+        if len(self.pending) >= self.max_queued:
+            raise QueueFull(f"{len(self.pending)} training jobs are already queued")
+        self.sequence += 1
+        job = TrainingJob(uuid.uuid4().hex, trainer, force, self.sequence)
+        self.jobs[job.id] = job
+        await asyncio.to_thread(self.store.save, job)
+        self.pending.append(job)
+        self.available.set()
+        logger.info(f"📥 Queued training job {job.id} ({trainer})")
+        return job
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self.jobs.get(job_id)
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[TrainingJob]:
+        """Most recent jobs first, optionally only those in `status`"""
+        jobs = sorted(self.jobs.values(), key=lambda job: job.sequence, reverse=True)
+        return [job for job in jobs if status is None or job.status == status][:limit]
+
+    async def cancel(self, job_id: str) -> Optional[TrainingJob]:
+        """Cancel a queued or running job; None if the job is unknown"""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_requested = True
+        if job.status == QUEUED:
+            if job in self.pending:
+                self.pending.remove(job)
+            job.status = CANCELLED
+            job.finished_at = datetime.now().isoformat()
+            await asyncio.to_thread(self.store.save, job)
+            self._notify(job)
+        elif job.task is not None:
+            job.loop.call_soon_threadsafe(job.task.cancel)
+        logger.info(f"🛑 Cancelling training job {job.id}")
+        return job
+
+    async def watch(self, job_id: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield a 'progress' event on every change of the job, then its final state"""
+        job = self.jobs[job_id]
+        while True:
+            changed = job.changed
+            if job.finished:
+                yield job.status, job.to_dict()
+                return
+            yield 'progress', job.to_dict(include_result=False)
+            await changed.wait()
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED_STATES}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {'workers': self.max_workers, 'max_queued': self.max_queued, 'jobs': counts}
+
+    async def close(self) -> None:
+        """Stop the workers; running jobs are interrupted and stay queued for the next start"""
+        self.closing = True
+        for job in self.jobs.values():
+            if job.status == RUNNING and job.task is not None:
+                job.loop.call_soon_threadsafe(job.task.cancel)
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        if self.executor is not None:
+            await asyncio.to_thread(self.executor.shutdown)
+            self.executor = None
+
+    def _notify(self, job: TrainingJob) -> None:
+        """Wake everything watching `job` (main loop only)"""
+        changed, job.changed = job.changed, asyncio.Event()
+        changed.set()
+
+    def _changed(self, job: TrainingJob) -> None:
+        """Persist `job` and notify watchers (from a worker thread)"""
+        self.store.save(job)
+        self.loop.call_soon_threadsafe(self._notify, job)
+
+    async def _worker(self) -> None:
+        while True:
+            while not self.pending:
+                self.available.clear()
+                await self.available.wait()
+            job = self.pending.popleft()
+            future = self.loop.run_in_executor(self.executor, self._execute, job)
+            try:
+                await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Shutting down: let the interrupted job record itself as queued first
+                await asyncio.wait([future])
+                raise
+            self._prune()
+
+    def _execute(self, job: TrainingJob) -> None:
+        """Run one job to completion on the calling worker thread"""
+        asyncio.run(self._run(job))
+
+    async def _run(self, job: TrainingJob) -> None:
+        job.loop = asyncio.get_running_loop()
+        job.task = asyncio.current_task()
+        started = time.perf_counter()
+        job.status = RUNNING
+        job.attempts += 1
+        job.started_at = datetime.now().isoformat()
+        job.progress = {'stage': None, 'finished': 0, 'total': None}
+        self._changed(job)
+
+        def progress(stage: str, finished: int, total: int) -> None:
+            job.progress = {'stage': stage, 'finished': finished, 'total': total}
+            self._changed(job)
+
+        try:
+            if job.cancel_requested or self.closing:
+                raise asyncio.CancelledError()
+            job.result = await self.trainers[job.trainer](job.force, progress=progress)
+            job.status = SUCCEEDED
+            record_run(self.history, job.result, trainer=job.trainer, source=f"job:{job.id}")
+            logger.info(f"✅ Training job {job.id} finished")
+        except asyncio.CancelledError:
+            if self.closing and not job.cancel_requested:
+                job.status = QUEUED
+                logger.info(f"⏸️ Training job {job.id} interrupted by shutdown; it will resume on restart")
+            else:
+                job.status = CANCELLED
+                logger.info(f"🛑 Training job {job.id} cancelled")
+        except Exception as error:
+            job.status = FAILED
+            job.error = f"{type(error).__name__}: {error}"
+            logger.warning(f"⚠️ Training job {job.id} failed: {job.error}")
+        finally:
+            job.task = None
+            job.loop = None
+        if job.finished:
+            job.finished_at = datetime.now().isoformat()
+            job.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        self._changed(job)
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond `max_finished`"""
+        finished = [job for job in self.jobs.values() if job.finished]
+        if len(finished) <= self.max_finished:
+            return
+        finished.sort(key=lambda job: job.sequence)
+        for job in finished[:len(finished) - self.max_finished]:
+            del self.jobs[job.id]
+            self.store.delete(job.id)
@@ -0,0 +1,236 @@
+"""
+TESSERACT TRAINING STAGE SCHEDULER
+Runs training stages as a dependency graph so independent stages overlap,
+skipping stages whose inputs match a cached artifact
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from artifact_cache import MISSING, ArtifactCache, code_fingerprint, content_hash, stage_key
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, int, int], None]
+StageCallback = Callable[[str, Any, Dict[str, Any]], None]
+
+class StageError(Exception):
+    """A training stage failed"""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"Stage {stage!r} {message}")
+        self.stage = stage
+
+
+class StageTimeout(StageError):
+    """A training stage exceeded its timeout"""
+
+
+class Stage:
+    """One unit of training work and the stages whose outputs it consumes"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        inputs: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        fingerprint: Optional[str] = None,
+        cacheable: bool = True
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.timeout = timeout
+        self.fingerprint = fingerprint or code_fingerprint(func)
+        self.cacheable = cacheable
+
+
+class StageScheduler:
+    """Dependency-aware scheduler for async training stages
+
+    Each stage is called with the outputs of its declared inputs as keyword
+    arguments. A stage starts as soon as all of its inputs have finished, at
+    most `max_concurrency` stages run at once, and the first failure or
+    timeout cancels every stage still running.
+
+    With an artifact `cache`, a stage is keyed by its code fingerprint and the
+    content hashes of its inputs' outputs; a stage whose key is already stored
+    is skipped and its stored output reused. `force` recomputes everything.
+    `progress` is called as `progress(stage, finished, total)` each time a
+    stage finishes, cached or not, and `on_stage(stage, output, timing)` as
+    each stage's output becomes available. Stages named in `completed` (the
+    outputs of an interrupted earlier run) are not run again.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        default_timeout: Optional[float] = None,
+        cache: Optional[ArtifactCache] = None,
+        force: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        on_stage: Optional[StageCallback] = None,
+        completed: Optional[Dict[str, Any]] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.cache = cache
+        self.force = force
+        self.progress = progress
+        self.on_stage = on_stage
+        self.completed = completed or {}
+        self.stages: Dict[str, Stage] = {}
+        self.report: Dict[str, Any] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        inputs: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        fingerprint: Optional[str] = None,
+        cacheable: bool = True
+    ) -> 'StageScheduler':
+        """Register a stage; returns the scheduler for chaining
+
+        `fingerprint` identifies the stage's code/configuration for caching and
+        defaults to a hash of `func`'s bytecode.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} is already registered")
+        self.stages[name] = Stage(
+            name,
+            func,
+            inputs,
+            timeout if timeout is not None else self.default_timeout,
+            fingerprint,
+            cacheable
+        )
+        return self
+
+    def order(self) -> List[str]:
+        """Stage names in a valid execution order"""
+        for stage in self.stages.values():
+            missing = [name for name in stage.inputs if name not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name!r} depends on unknown stage(s) {missing}")
+
+        ordered: List[str] = []
+        state: Dict[str, int] = {}
+
+        def visit(name: str, path: List[str]) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Stage dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = 1
+            for dependency in self.stages[name].inputs:
+                visit(dependency, path + [name])
+            state[name] = 2
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return ordered
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every stage and return their outputs keyed by stage name"""
+        order = self.order()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Future] = {}
+        output_hashes: Dict[str, str] = {}
+        origin = time.perf_counter()
+
+        def finish(stage: Stage, output: Any, timing: Dict[str, Any]) -> None:
+            results[stage.name] = output
+            output_hashes[stage.name] = content_hash(output)
+            timings[stage.name] = {'inputs': list(stage.inputs), **timing}
+            if self.on_stage is not None and timing['cache'] != 'resumed':
+                self.on_stage(stage.name, output, timings[stage.name])
+            if self.progress is not None:
+                self.progress(stage.name, len(timings), len(order))
+
+        async def run_stage(stage: Stage) -> None:
+            if stage.inputs:
+                await asyncio.gather(*(tasks[name] for name in stage.inputs))
+            key = stage_key(stage.name, stage.fingerprint, {name: output_hashes[name] for name in stage.inputs})
+            skipped = {'started_ms': round((time.perf_counter() - origin) * 1000, 3), 'duration_ms': 0.0, 'key': key}
+            if stage.name in self.completed:
+                finish(stage, self.completed[stage.name], {**skipped, 'cache': 'resumed'})
+                return
+            use_cache = self.cache is not None and stage.cacheable
+            if use_cache and not self.force:
+                cached = self.cache.get(stage.name, key)
+                if cached is not MISSING:
+                    finish(stage, cached, {**skipped, 'cache': 'hit'})
+                    return
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(
+                        stage.func(**{name: results[name] for name in stage.inputs}),
+                        stage.timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise StageTimeout(stage.name, f"timed out after {stage.timeout}s") from None
+                except asyncio.CancelledError:
+                    raise
+                except Exception as error:
+                    raise StageError(stage.name, f"failed: {error}") from error
+                finished = time.perf_counter()
+            if use_cache:
+                self.cache.put(stage.name, key, result)
+            finish(stage, result, {
+                'started_ms': round((started - origin) * 1000, 3),
+                'duration_ms': round((finished - started) * 1000, 3),
+                'cache': ('forced' if self.force else 'miss') if use_cache else 'disabled',
+                'key': key
+            })
+
+        for name in order:
+            tasks[name] = asyncio.ensure_future(run_stage(self.stages[name]))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        wall_clock = (time.perf_counter() - origin) * 1000
+        sum_of_stages = sum(timing['duration_ms'] for timing in timings.values())
+        self.report = {
+            'stages': {name: timings[name] for name in order},
+            'wall_clock_ms': round(wall_clock, 3),
+            'sum_of_stages_ms': round(sum_of_stages, 3),
+            'parallel_speedup': round(sum_of_stages / wall_clock, 2) if wall_clock else 1.0,
+            'cache_hits': [name for name in order if timings[name]['cache'] == 'hit'],
+            'resumed': [name for name in order if timings[name]['cache'] == 'resumed'],
+            'recomputed': [name for name in order if timings[name]['cache'] not in ('hit', 'resumed')]
+        }
+        logger.info(f"⏱️ {len(order)} stages finished in {wall_clock:.1f}ms (sequential: {sum_of_stages:.1f}ms)")
+        return results
+
+def training_result(output: Dict[str, Any], scheduler: StageScheduler) -> Dict[str, Any]:
+    """A trainer's result: its output, the time of this run and the scheduler's cache manifest
+
+    The timestamp is stamped here rather than inside a stage, so a result
+    built from cached stage outputs still carries the time it was produced.
+    """
+    report = scheduler.report
+    return {
+        **output,
+        'timestamp': datetime.now().isoformat(),
+        'manifest': {
+            'cache_hits': report['cache_hits'],
+            'resumed': report['resumed'],
+            'recomputed': report['recomputed'],
+            'stage_keys': {name: stage['key'] for name, stage in report['stages'].items()}
+        }
+    }